@@ -0,0 +1,13 @@
+import streamlit as st
+
+# Multipage entry point (streamlit run app.py). The four dashboards are pages of one app
+# and share the data layer in app_functions/data_store.py: every dataset is loaded once
+# per process (on the first visit of its dashboard) and the retrieved selections are
+# cached for all pages. The pages set their own page config, so nothing is rendered here.
+
+dashboards = st.navigation([st.Page("production_app.py", title="Production", url_path="production", default=True),
+                            st.Page("employ_app.py", title="Employment", url_path="employment"),
+                            st.Page("income_app.py", title="Income", url_path="income"),
+                            st.Page("trade_app.py", title="Trade", url_path="trade")])
+
+dashboards.run()
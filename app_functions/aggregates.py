@@ -0,0 +1,78 @@
+from app_functions.group_stats import get_group_values
+from app_functions.lazy_imports import lazy_import
+
+# Deferred until first use (see lazy_import)
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Country groups with aggregates and the names of the aggregates (pseudo-countries of the peer
+# selection, e.g. "Sub-Saharan Africa (sub-region)")
+AGGREGATE_GROUPS = {'Region': '{} (region)',
+                    'Sub-region': '{} (sub-region)',
+                    'Income Group': '{} (income group)'}
+
+# Rates of the datasets with aggregates and the indicator they are weighted with per domain
+# ({indicator: weight indicator}). All other indicators are levels (persons or $) and are summed
+AGGREGATE_WEIGHTS = {'employ': {'Unemployment rate': 'Labour force',
+                                'Labour force participation rate': 'Population in working age',
+                                'GDP Share Agriculture (%)': 'GDP, PPP (constant 2017 international $)',
+                                'GDP Share Industry (%)': 'GDP, PPP (constant 2017 international $)',
+                                'GDP Share Services (%)': 'GDP, PPP (constant 2017 international $)'}}
+
+# File of the aggregates (in the directory of the version of a dataset)
+AGGREGATES_FILE = 'aggregates.parquet'
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def build_aggregates(df, weights):
+
+    """
+    Takes the long format dataset and the weights of its rates (see AGGREGATE_WEIGHTS) as an
+    input and returns the aggregates of the country groups (see AGGREGATE_GROUPS) for all
+    indicators and years in one groupby: levels are summed and rates are averaged with the
+    weight indicator of the same country and year (e.g. the unemployment rate with the
+    labour force). Only the countries with a value (and a weight) in a year are counted.
+    The aggregates are rows like the dataset with the name of the aggregate as country and
+    without a country code. Called by the ETL.
+
+    """
+
+    values = get_group_values(df)
+    values = values[values['Group Type'].isin(list(AGGREGATE_GROUPS))].reset_index(drop=True)
+
+    # Weight of every row: the weight indicator of the country and year for rates, 1 for levels
+    df_weights = df[df['Indicator'].isin(set(weights.values())) & df['Country'].notna()]
+    df_weights = df_weights.groupby(['Country', df_weights['Year'].astype(str).astype(int), 'Indicator'])['Value'].first()
+
+    weight_indicators = values['Indicator'].map(weights)
+    is_rate = weight_indicators.notna().values
+    weight = df_weights.reindex(pd.MultiIndex.from_arrays([values['Country'], values['Year'], weight_indicators])).values
+    weight = np.where(is_rate, weight, 1.0)
+
+    # Weighted sums and weights of every group, indicator and year
+    counted = ~np.isnan(weight)
+    sums = values[['Group Type', 'Group', 'Indicator', 'Year']].assign(
+        Weighted=np.where(counted, values['Value'].values * weight, np.nan),
+        Weight=np.where(counted, weight, np.nan)).groupby(['Group Type', 'Group', 'Indicator', 'Year'], sort=False).agg(
+        Weighted=('Weighted', 'sum'), Weight=('Weight', 'sum'), Countries=('Weight', 'count')).reset_index()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        aggregate_values = np.where(sums['Indicator'].map(weights).notna(), sums['Weighted'] / sums['Weight'], sums['Weighted'])
+    aggregate_values[sums['Countries'].values == 0] = np.nan
+
+    # Rows like the dataset (the aggregate as country, its group in the column of the group type)
+    indicator_codes = df.groupby('Indicator')['Indicator Code'].first()
+    aggregates = pd.DataFrame({'Country': [AGGREGATE_GROUPS[group_type].format(group)
+                                           for group_type, group in zip(sums['Group Type'], sums['Group'])],
+                               'Indicator Code': sums['Indicator'].map(indicator_codes).values,
+                               'Indicator': sums['Indicator'].values,
+                               'Year': sums['Year'].values,
+                               'Value': aggregate_values})
+
+    for group_type in AGGREGATE_GROUPS:
+        aggregates[group_type] = sums['Group'].where(sums['Group Type'] == group_type).values
+
+    return aggregates.dropna(subset=['Value']).reset_index(drop=True)
@@ -0,0 +1,100 @@
+from app_functions.data_store import load_cube
+from app_functions.figure_cache import get_figure, apply_layout
+from app_functions.lazy_imports import lazy_import
+
+# Deferred until first use (see lazy_import)
+np = lazy_import('numpy')
+go = lazy_import('plotly.graph_objects')
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Milliseconds a year is shown and the transition to the next year takes
+FRAME_DURATION = 800
+TRANSITION_DURATION = 400
+
+# Colors of the chosen country and of the comparison countries
+COUNTRY_COLOR = '#d62728'
+PEER_COLOR = '#1f77b4'
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def get_animation_data(cube, selection):
+
+    """
+    Takes the cube of a dataset (see load_cube) and the selection of a comparison chart
+    (countries, start year, end year and indicators) as an input and returns the frames
+    of the animation: the years and the values of the countries in each year (years x
+    countries), taken from the cube in one step. Every year of the selected range is a
+    frame, so the slider shows the whole range (years without values have NaN values).
+
+    """
+
+    countries, start_year, end_year, indicators = selection
+    countries = [country for country in countries if country in cube['country_index']]
+
+    years = np.arange(start_year, end_year + 1)
+    values = np.full((len(years), len(countries)), np.nan)
+
+    i = cube['indicators'].get(indicators[0])
+    if i is None or not countries:
+        return years, countries, values
+
+    # Years x countries of the indicator (one slice of the cube), the years outside the cube stay NaN
+    first = max(start_year, cube['first_year'])
+    last = min(end_year, cube['first_year'] + cube['values'].shape[1] - 1)
+    if first <= last:
+        cube_values = cube['values'][i, first - cube['first_year']:last - cube['first_year'] + 1]
+        values[first - start_year:last - start_year + 1] = cube_values[:, [cube['country_index'][country] for country in countries]]
+
+    return years, countries, values
+
+
+def build_animation(animation_data):
+
+    """
+    Animated bar chart of the chosen and the comparison countries through the years. Takes
+    the cube, the selection, the title and the label of the values as an input. The
+    countries, colors and layout are in the figure once and every frame only holds the
+    values of its year, so the size of the figure grows with the number of years times
+    countries (not with the traces and layout per frame).
+
+    """
+
+    cube, selection, title, value_label = animation_data
+    years, countries, values = get_animation_data(cube, selection)
+
+    # First year as the chart, one frame per year with only the values. The colors are
+    # matched by name, as the chosen country (first of the selection) may not be in the cube
+    color_map = {selection[0][0]: COUNTRY_COLOR}
+    colors = [color_map.get(country, PEER_COLOR) for country in countries]
+    fig = go.Figure(data=[go.Bar(x=countries, y=values[0] if len(years) else [], marker_color=colors,
+                                 hovertemplate='%{x}: %{y}<extra></extra>')],
+                    frames=[go.Frame(data=[go.Bar(y=row)], traces=[0], name=str(year))
+                            for year, row in zip(years, values)])
+
+    # Play button and slider of the years
+    animate = dict(mode='immediate', frame=dict(duration=FRAME_DURATION, redraw=False),
+                   transition=dict(duration=TRANSITION_DURATION))
+    fig.update_layout(updatemenus=[dict(type='buttons', showactive=False, x=0, y=-0.25, xanchor='left',
+                                        buttons=[dict(label='Play', method='animate', args=[None, animate])])],
+                      sliders=[dict(x=0.1, len=0.9, y=-0.15, currentvalue=dict(prefix='Year: '),
+                                    steps=[dict(label=str(year), method='animate', args=[[str(year)], animate])
+                                           for year in years])])
+
+    # Y-axis fixed to the largest value of all years (the axis does not jump between frames)
+    y_max = np.nanmax(values) if np.isfinite(values).any() else 1
+
+    return apply_layout(fig, y_range=[0, y_max * 1.2], title=title, yaxis_title=value_label, showlegend=False)
+
+
+def get_animated_figure(domain, version, chart_id, selection, title, value_label):
+
+    """
+    Returns the animated version of a comparison chart (see build_animation) from the figure
+    cache. The frames are taken from the cube of the dataset, so no data is filtered per year.
+
+    """
+
+    return get_figure(f'{chart_id}_animation', selection, version, build_animation,
+                      (load_cube(domain, version), selection, title, value_label), year_axis=False)
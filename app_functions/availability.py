@@ -0,0 +1,161 @@
+from app_functions.gap_filling import IMPUTED_COLUMN
+from app_functions.lazy_imports import lazy_import
+
+# Deferred until first use (see lazy_import)
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# File of the availability matrix (in the directory of the version of a dataset)
+AVAILABILITY_FILE = 'availability.npz'
+
+# Message of the sections without data for the selection
+NO_DATA_MESSAGE = "Data for this selection is not available. Try adjusting the selection on the side."
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def build_availability(df):
+
+    """
+    Takes the long format dataset as an input and returns its availability matrix: one bit
+    per country, indicator and year that is set if the dataset has an observed value for it.
+    The bits of the years are packed (8 years per byte), so the matrix of a dataset only
+    takes a few kB. Returns the packed bits (country x indicator x bytes of the years) with
+    the countries, indicators, first year and number of years. If the gaps of the dataset
+    were filled (see app_functions/gap_filling.py), a second matrix with the filled values
+    (filled_bits) is added, so the charts with filled gaps can be shown for a country that
+    only has filled values. Called by the ETL.
+
+    """
+
+    df = df[df['Country'].notna() & df['Indicator'].notna() & df['Value'].notna()]
+
+    countries = pd.Index(df['Country'].unique())
+    indicators = pd.Index(df['Indicator'].unique())
+    years = df['Year'].astype(str).astype(int).values
+    first_year = int(years.min())
+    positions = countries.get_indexer(df['Country']), indicators.get_indexer(df['Indicator']), years - first_year
+
+    available = np.zeros((len(countries), len(indicators), int(years.max()) - first_year + 1), dtype=bool)
+    available[positions] = True
+
+    availability = {'countries': np.array(countries, dtype=str),
+                    'indicators': np.array(indicators, dtype=str),
+                    'first_year': first_year,
+                    'years': available.shape[2]}
+
+    if IMPUTED_COLUMN not in df.columns or not df[IMPUTED_COLUMN].any():
+        return {'bits': np.packbits(available, axis=2), **availability}
+
+    # Observed values only (the filled values are set in the second matrix)
+    imputed = df[IMPUTED_COLUMN].to_numpy(dtype=bool)
+    observed = np.zeros_like(available)
+    observed[tuple(position[~imputed] for position in positions)] = True
+
+    return {'bits': np.packbits(observed, axis=2), 'filled_bits': np.packbits(available, axis=2), **availability}
+
+
+def write_availability(df, path):
+
+    """
+    Writes the availability matrix of a dataset (see build_availability) to path (npz).
+
+    """
+
+    np.savez_compressed(path, **build_availability(df))
+
+
+def get_available(availability, countries, indicators, filled=False):
+
+    """
+    Takes the availability matrix (see load_availability), a list of countries and a list
+    of indicators as an input and returns the availability of the pairs of countries and
+    indicators in every year (country x indicator x year, unpacked), of the observed
+    values or (filled) also of the filled values. Countries and indicators that are not in
+    the dataset have no data.
+
+    """
+
+    bits = availability['filled_bits'] if filled and 'filled_bits' in availability else availability['bits']
+
+    country_index, indicator_index = availability['country_index'], availability['indicator_index']
+    known_countries = [i for i, country in enumerate(countries) if country in country_index]
+    known_indicators = [i for i, ind in enumerate(indicators) if ind in indicator_index]
+
+    # Only the rows of the selection are unpacked
+    available = np.zeros((len(countries), len(indicators), availability['years']), dtype=bool)
+    if known_countries and known_indicators:
+        bits = bits[np.ix_([country_index[countries[i]] for i in known_countries],
+                                           [indicator_index[indicators[i]] for i in known_indicators])]
+        available[np.ix_(known_countries, known_indicators)] = np.unpackbits(bits, axis=2, count=availability['years'])
+
+    return available
+
+
+def has_data(availability, selection, how='any', filled=False):
+
+    """
+    Takes the availability matrix and a selection (country or countries, start year, end
+    year and indicators) as an input and returns whether the dataset has data for it: any
+    value of the selection (how='any') or a value of every country and indicator within the
+    years (how='all'). Only observed values count, unless filled is set (charts whose gaps
+    can be filled, see select_gap_filling). Sections test this before they retrieve any
+    data. Returns True if the availability is unknown (the ETL of the version did not
+    write it).
+
+    """
+
+    if availability is None:
+        return True
+
+    countries, start_year, end_year, indicators = selection
+    countries = [countries] if isinstance(countries, str) else list(countries)
+
+    first = max(start_year - availability['first_year'], 0)
+    last = min(end_year - availability['first_year'], availability['years'] - 1)
+    if first > last:
+        return False
+
+    available = get_available(availability, countries, indicators, filled)[:, :, first:last + 1].any(axis=2)
+
+    return bool(available.all() if how == 'all' else available.any())
+
+
+def get_latest_year(availability, countries, indicators):
+
+    """
+    Returns the latest year in which the dataset has a value of every indicator for every
+    country (None if there is no such year or the availability is unknown).
+
+    """
+
+    if availability is None:
+        return None
+
+    covered = np.flatnonzero(get_available(availability, countries, indicators).all(axis=(0, 1)))
+
+    return availability['first_year'] + int(covered[-1]) if len(covered) else None
+
+
+def get_coverage_year(availability, countries, indicators):
+
+    """
+    Returns the latest year in which the dataset has a value of every indicator for every
+    country, only counting the indicators a country has in any year (None if there is no
+    such year or the availability is unknown). Shown as a hint below the year slider of the
+    sidebar (see select_years), the selected years are not changed.
+
+    """
+
+    if availability is None:
+        return None
+
+    available = get_available(availability, countries, indicators)
+
+    # Years with every pair that has data in any year
+    pairs = available.any(axis=2)
+    covered = np.flatnonzero(available[pairs].all(axis=0)) if pairs.any() else []
+
+    return availability['first_year'] + int(covered[-1]) if len(covered) else None
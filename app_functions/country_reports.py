@@ -0,0 +1,228 @@
+import functools
+import html
+import itertools
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+from app_functions.data_store import read_metadata, read_table
+from app_functions.data_versions import read_manifest
+from app_functions.employ_tables import get_table1, get_table2, get_latest_table_year, TABLE1_FILE, TABLE2_FILE
+from app_functions.static_pages import (DASHBOARDS, CHUNK_SIZE, COUNTRY_LABEL, RUN_TIMEOUT, PAGE_TEMPLATE,
+                                        PLOTLY_JS, get_page_name, render_node, run_dashboard, write_file)
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Charts of the reports: the dashboards and the tabs of their charts ({url path: (key of the tabs,
+# positions of the tabs)}). Chart 2.1 (GDP and GNI per capita) of the income dashboard and
+# the LPI bar charts 4.1 to 4.3 of the trade dashboard
+REPORT_CHARTS = {'income': ('income_row2_tabs', [0]),
+                 'trade': ('trade_row3_tabs', [0, 1, 2])}
+
+# Tables of the reports (precomputed tables of the employment dashboard): title, file and lookup
+REPORT_TABLES = {"Table 1 - Women's share": (TABLE1_FILE, get_table1),
+                 "Table 2 - Employment shares by sector": (TABLE2_FILE, get_table2)}
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+@functools.lru_cache(maxsize=None)
+def _read_employ_table(version, table_file):
+    return read_table('employ', version, table_file)
+
+
+def get_report_tables(country, version):
+
+    """
+    Retrieves the tables of the report of a country (see REPORT_TABLES) for the latest year
+    of the country in each table. Returns {title (year): table}, tables without data for the
+    country are left out.
+
+    """
+
+    tables = {}
+
+    for title, (table_file, get_table) in REPORT_TABLES.items():
+        df_table = _read_employ_table(version, table_file)
+        year = get_latest_table_year(df_table, country)
+        if year is not None:
+            tables[f"{title} ({year})"] = get_table(df_table, country, year)
+
+    return tables
+
+
+def find_tab_column(node, tabs_key):
+
+    """
+    Returns the column of the element tree of a dashboard run that holds the tabs with the
+    given key (None if there is none).
+
+    """
+
+    children = list(node.children.values()) if hasattr(node, 'children') else []
+
+    if node.type == 'column' and any(getattr(child, 'key', None) == tabs_key for child in children):
+        return node
+
+    for child in children:
+        column = find_tab_column(child, tabs_key)
+        if column is not None:
+            return column
+
+    return None
+
+
+def get_report_charts(at, country, tabs_key, positions):
+
+    """
+    Runs a dashboard (AppTest) for a country and returns the charts of the given tabs (plotly
+    chart elements of the column of the tabs). Returns no charts if the country is not in the
+    dashboard.
+
+    """
+
+    selectbox = next(widget for widget in at.sidebar.selectbox if widget.label == COUNTRY_LABEL)
+    if country not in selectbox.options:
+        return []
+
+    run_dashboard(at, country)
+    charts = []
+
+    for position in positions:
+        at.radio(key=tabs_key).set_value(position).run()
+        column = find_tab_column(at.main, tabs_key)
+        if column is not None:
+            charts += [child for child in column.children.values() if child.type == 'plotly_chart']
+
+    return charts
+
+
+def get_chart_data(chart):
+
+    """
+    Takes a plotly chart element as an input and returns the title of the chart and its data
+    (one row per point with a value: series, year and value).
+
+    """
+
+    spec = json.loads(chart.proto.spec)
+    title = spec['layout'].get('title', {}).get('text', '')
+
+    df = pd.concat([pd.DataFrame({'Series': trace.get('name', ''), 'Year': trace['x'], 'Value': trace['y']})
+                    for trace in spec['data']], ignore_index=True)
+
+    return title, df.dropna(subset=['Value'])
+
+
+def get_sheet_name(title):
+
+    """
+    Returns the name of the xlsx sheet of a table or chart (the number of the table or chart,
+    e.g. "Chart 4.1", at most 31 characters without the characters excel does not allow).
+
+    """
+
+    return re.sub(r'[\[\]:*?/\\]', '', re.split(r' [–-] ', title)[0])[:31]
+
+
+def write_report(output_dir, country, tables, charts):
+
+    """
+    Writes the report bundle of a country to output_dir/<country>/: the tables and charts as
+    html page (report.html) and their data as xlsx file with one sheet per table and chart
+    (report.xlsx). Both are written atomically.
+
+    """
+
+    report_dir = os.path.join(output_dir, os.path.splitext(get_page_name(country))[0])
+    os.makedirs(report_dir, exist_ok=True)
+
+    # Html page
+    chart_ids = itertools.count(1)
+    body = f'<h1>Country report - {html.escape(country)}</h1>'
+    body += ''.join(f'<h3>{html.escape(title)}</h3>' + table.to_html(border=0) for title, table in tables.items())
+    body += ''.join(render_node(chart, chart_ids) for chart in charts)
+    write_file(os.path.join(report_dir, 'report.html'),
+               PAGE_TEMPLATE.format(title=f"Country report - {html.escape(country)}", plotly_js=PLOTLY_JS, body=body))
+
+    # Xlsx file
+    xlsx_path = os.path.join(report_dir, 'report.xlsx')
+    tmp_path = os.path.join(report_dir, 'report.tmp.xlsx')
+    with pd.ExcelWriter(tmp_path, engine='openpyxl') as writer:
+        for title, table in tables.items():
+            table.to_excel(writer, sheet_name=get_sheet_name(title), index=table.index.name is not None)
+        for chart in charts:
+            title, df_chart = get_chart_data(chart)
+            df_chart.to_excel(writer, sheet_name=get_sheet_name(title), index=False)
+    os.replace(tmp_path, xlsx_path)
+
+
+def export_reports(countries, output_dir):
+
+    """
+    Writes the reports of a list of countries (one task of the process pool, the dashboards
+    are run once per task and only the country is changed for the next report). Returns the
+    countries with a report and the errors ({country: message}).
+
+    """
+
+    version = read_manifest()['employ']
+    dashboards = {url_path: AppTest.from_file(DASHBOARDS[url_path][0], default_timeout=RUN_TIMEOUT).run()
+                  for url_path in REPORT_CHARTS}
+    reports, errors = [], {}
+
+    for country in countries:
+        try:
+            tables = get_report_tables(country, version)
+            charts = [chart for url_path, (tabs_key, positions) in REPORT_CHARTS.items()
+                      for chart in get_report_charts(dashboards[url_path], country, tabs_key, positions)]
+            write_report(output_dir, country, tables, charts)
+            reports.append(country)
+        except Exception as e:
+            errors[country] = repr(e)
+
+    return reports, errors
+
+
+def get_report_countries():
+
+    """
+    Returns the countries of the reports: the countries of the employment, income and trade
+    datasets (in the order of their metadata).
+
+    """
+
+    countries = {}
+    for domain in ['employ', 'income', 'trade']:
+        countries.update(dict.fromkeys(read_metadata(domain, read_manifest()[domain])['countries']))
+
+    return list(countries)
+
+
+def export_country_reports(output_dir, countries=None, workers=None):
+
+    """
+    Writes the report bundles of all countries (or the given countries) to output_dir. The
+    countries are processed in chunks on a process pool. Returns the countries with a
+    report, the errors and the duration.
+
+    """
+
+    start = time.perf_counter()
+    countries = get_report_countries() if countries is None else countries
+    os.makedirs(output_dir, exist_ok=True)
+
+    reports, errors = [], {}
+
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [executor.submit(export_reports, countries[i:i + CHUNK_SIZE], output_dir)
+                   for i in range(0, len(countries), CHUNK_SIZE)]
+        for future in futures:
+            chunk_reports, chunk_errors = future.result()
+            reports += chunk_reports
+            errors.update(chunk_errors)
+
+    return reports, errors, time.perf_counter() - start
@@ -0,0 +1,165 @@
+import streamlit as st
+from app_functions.data_store import load_cube, load_group_stats, get_cross_section, get_cross_section_years
+from app_functions.figure_cache import get_figure, apply_layout
+from app_functions.group_stats import get_group_position, GROUP_QUANTILES
+from app_functions.lazy_imports import lazy_import
+from app_functions.profiling import profile_section, plotly_chart
+
+# Deferred until first use (see lazy_import)
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+px = lazy_import('plotly.express')
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Number of countries shown in the ranking (the chosen country is always shown)
+RANKING_COUNTRIES = 15
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def get_cross_section_data(cube, indicator, year):
+
+    """
+    Takes the cube of a dataset, an indicator and a year as an input and returns the
+    countries with a value in that year (country, country code and value), sorted by value
+    (highest first) with their rank.
+
+    """
+
+    values = get_cross_section(cube, indicator, year)
+    rows = np.flatnonzero(~np.isnan(values))
+
+    df = pd.DataFrame({'Country': cube['countries'][rows],
+                       'Country Code': cube['country_codes'][rows],
+                       'Value': values[rows]})
+    df = df.sort_values('Value', ascending=False, ignore_index=True)
+
+    return df.assign(Rank=np.arange(1, len(df) + 1))
+
+
+def build_map(map_data):
+
+    """
+    World map of an indicator in a year. Takes the data, the indicator and the year as an
+    input.
+
+    """
+
+    map_data, indicator, year = map_data
+
+    # Configure plot
+    fig = px.choropleth(map_data,
+                        locations='Country Code',
+                        color='Value',
+                        hover_name='Country',
+                        color_continuous_scale='Blues',
+                        title=f"{indicator} in {year}")
+
+    return apply_layout(fig, margin=dict(l=0, r=0, b=0), geo=dict(showframe=False))
+
+
+def build_ranking(ranking_data):
+
+    """
+    Ranking of the countries with the highest values of an indicator in a year, with the
+    chosen country highlighted. Takes the data, the chosen country and the title as an input.
+
+    """
+
+    ranking_data, selected_country, title = ranking_data
+
+    # Top countries and the chosen country (if it is not among them)
+    top = ranking_data.head(RANKING_COUNTRIES)
+    top = pd.concat([top, ranking_data[(ranking_data['Country'] == selected_country) & (ranking_data['Rank'] > RANKING_COUNTRIES)]])
+    top = top.assign(Label=top['Rank'].astype(str) + '. ' + top['Country'],
+                     Selected=np.where(top['Country'] == selected_country, selected_country, 'Other countries'))
+
+    # Configure plot
+    fig = px.bar(top,
+                 x='Value',
+                 y='Label',
+                 orientation='h',
+                 color='Selected',
+                 title=title,
+                 labels={'Label': '', 'Selected': ''},
+                 color_discrete_map={selected_country: '#d62728', 'Other countries': '#1f77b4'})
+
+    fig.update_yaxes(autorange='reversed')
+
+    return apply_layout(fig, height=500)
+
+
+@st.fragment
+def show_cross_section(domain, version, indicators, selected_country):
+
+    """
+    Row with the world map and the ranking of an indicator in a year (all countries of the
+    dataset) and the position of the chosen country within its country groups. The values are a slice of the year-sliced index of the dataset (see load_cube),
+    so choosing another indicator or year only reruns this row and does not scan the dataset.
+
+    """
+
+    st.header("")
+    st.subheader(f"How does {selected_country} compare worldwide?")
+
+    with profile_section('load_data', f'{domain} cube'):
+        cube = load_cube(domain, version)
+
+    # Indicator and year (the years in which the indicator has values, the latest by default)
+    col1, col2, col3 = st.columns([1,0.05,1])
+    with col1:
+        indicator = st.selectbox("Choose the indicator", [ind for ind in indicators if ind in cube['indicators']],
+                                 key=f'{domain}_cross_section_indicator')
+    years = get_cross_section_years(cube, indicator)
+    if not years:
+        st.error("There is no data for this indicator.")
+        return
+
+    with col3:
+        year = st.select_slider("Choose the year", years, value=years[-1], key=f'{domain}_cross_section_year') if len(years) > 1 else years[0]
+
+    with profile_section('filter_data', 'cross_section'):
+        cross_section_data = get_cross_section_data(cube, indicator, year)
+
+    col1, col2, col3 = st.columns([1,0.05,1])
+    with col1:
+        # Get figure
+        fig = get_figure(f'{domain}_map', (indicator, year), version, build_map,
+                         (cross_section_data, indicator, year), year_axis=False)
+
+        # Display graph
+        plotly_chart(fig, use_container_width=True)
+
+    with col3:
+        # Rank of the chosen country
+        rank = cross_section_data.loc[cross_section_data['Country'] == selected_country, 'Rank']
+        if len(rank):
+            st.markdown(f"""<div style="text-align: justify;">In {year}, <b>{selected_country}</b> ranks
+                        <b>{rank.iloc[0]}</b> of {len(cross_section_data)} countries with data.</div>""",
+                        unsafe_allow_html=True)
+        else:
+            st.markdown(f"""<div style="text-align: justify;">There is no value for <b>{selected_country}</b>
+                        in {year}.</div>""", unsafe_allow_html=True)
+
+        # Get figure
+        fig = get_figure(f'{domain}_ranking', (indicator, year, selected_country), version, build_ranking,
+                         (cross_section_data, selected_country, f"Countries with the highest values in {year}"),
+                         year_axis=False)
+
+        # Display graph
+        plotly_chart(fig, use_container_width=True)
+
+    # Position within the country groups (precomputed by the ETL, see app_functions/group_stats.py)
+    group_stats = load_group_stats(domain, version)
+    group_position = None if group_stats is None else get_group_position(group_stats, selected_country, indicator, year)
+
+    if group_position is not None:
+        st.markdown(f"""<div style="text-align: justify;"><b>Position of {selected_country} within its country groups</b>
+                    ({indicator}, {year}): the percentile rank is the share of the countries of the group with the same
+                    or a lower value, the bands are the values of the group at these percentiles.</div>""",
+                    unsafe_allow_html=True)
+        st.table(group_position.style.format({col: '{:,.2f}' for col in list(GROUP_QUANTILES)} |
+                                             {'Percentile Rank': '{:.1f}', 'Countries': '{:.0f}'}))
+
+    st.caption('Data Sources: see data sources tab above')
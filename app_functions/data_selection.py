@@ -0,0 +1,90 @@
+from app_functions.lazy_imports import lazy_import
+
+# Deferred until first use (see lazy_import)
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Columns that describe a country (filled in for the years without data)
+COUNTRY_COLUMNS = ['Country Code', 'Region', 'Sub-region', 'Income Group',
+                   'Least Developed Countries (LDC)', 'Land Locked Developing Countries (LLDC)',
+                   'Small Island Developing States (SIDS)']
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def get_query_plan(df, selections):
+
+    """
+    Function takes the dataset and all selections of a page as an input. The selections
+    are given as a dictionary {name: (country_selec, start_year_selec, end_year_selec, indicator_selec)}.
+    All selections are resolved together with one pass over the dataset for the union of
+    their countries, indicators and years. The output is a dictionary with the filtered
+    dataframe for every selection (same format as get_filtered_data).
+
+    """
+
+    # Turn the selections into lists (country selection can be a single string)
+    plan = {}
+    for name, (country_selec, start_year_selec, end_year_selec, indicator_selec) in selections.items():
+        if isinstance(country_selec, str):
+            country_selec = [country_selec]
+        plan[name] = (list(dict.fromkeys(country_selec)), start_year_selec, end_year_selec, list(dict.fromkeys(indicator_selec)))
+
+    # Union of all countries, indicators and years of the page (order of first appearance)
+    countries = list(dict.fromkeys(c for selec in plan.values() for c in selec[0]))
+    indicators = list(dict.fromkeys(i for selec in plan.values() for i in selec[3]))
+    start_year = min(selec[1] for selec in plan.values())
+    end_year = max(selec[2] for selec in plan.values())
+
+    # Retrieve the data for the union with a single scan of the dataset
+    df_fltr = df[(df['Country'].isin(countries)) &
+                 (df['Year'] >= start_year) &
+                 (df['Indicator'].isin(indicators)) &
+                 (df['Year'] <= end_year)]
+
+    # Decode the categorical columns of the (small) filtered rows, so the merge and the
+    # filling below work on plain values like the frame as read from the file
+    df_fltr = df_fltr.astype({col: dtype.categories.dtype for col, dtype in df_fltr.dtypes.items()
+                              if isinstance(dtype, pd.CategoricalDtype)})
+
+    # Create a dataframe with all years, indicators and countries of the union
+    ## This is necessary to add the missing years with "None" values
+    df_empty = pd.MultiIndex.from_product([range(start_year, end_year+1), indicators, countries],
+                                          names=['Year', 'Indicator', 'Country']).to_frame(index=False)
+
+    ## Merge
+    df_union = pd.merge(df_empty, df_fltr, on=['Year', 'Indicator', 'Country'], how='left')
+
+    ## Fill other columns (first non-missing value within the indicator or country)
+    df_union['Indicator Code'] = df_union.groupby('Indicator')['Indicator Code'].transform('first')
+
+    for col in COUNTRY_COLUMNS:
+        df_union[col] = df_union.groupby('Country')[col].transform('first')
+
+    # Hand out the rows of every selection from the (small) union frame
+    results = {}
+    for name, (country_selec, start_year_selec, end_year_selec, indicator_selec) in plan.items():
+
+        country_pos = df_union['Country'].map({c: pos for pos, c in enumerate(country_selec)})
+        indicator_pos = df_union['Indicator'].map({i: pos for pos, i in enumerate(indicator_selec)})
+        in_selec = (country_pos.notna() & indicator_pos.notna() &
+                    df_union['Year'].between(start_year_selec, end_year_selec)).values
+
+        # Keep the order of the selection (year, indicator, country)
+        order = np.lexsort((country_pos.values[in_selec], indicator_pos.values[in_selec], df_union['Year'].values[in_selec]))
+        results[name] = df_union.iloc[np.flatnonzero(in_selec)[order]].reset_index(drop=True)
+
+    return results
+
+
+def get_filtered_data(df, country_selec, start_year_selec, end_year_selec, indicator_selec):
+
+    """
+    Function takes the user selection of the dashboard as an input and retrieves the
+    corresponding data from the dataset. The output is a filtered dataframe.
+
+    """
+
+    return get_query_plan(df, {'data': (country_selec, start_year_selec, end_year_selec, indicator_selec)})['data']
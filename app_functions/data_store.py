@@ -0,0 +1,588 @@
+import functools
+import json
+import logging
+import os
+import threading
+import streamlit as st
+from app_functions.data_selection import get_query_plan
+from app_functions.data_versions import read_manifest, get_version_path
+from app_functions.employ_tables import TABLE1_FILE, TABLE2_FILE
+from app_functions.group_stats import GROUP_RANKS_FILE, GROUP_BANDS_FILE
+from app_functions.availability import AVAILABILITY_FILE
+from app_functions.gap_filling import IMPUTED_COLUMN
+from app_functions.aggregates import AGGREGATES_FILE
+from app_functions.lazy_imports import lazy_import
+from app_functions.profiling import profile_section
+
+# Deferred until first use (see lazy_import)
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Datasets of the dashboards (one partition per domain, each loaded on first use). The files
+# are in the directory of the current version of the domain (see app_functions/data_versions.py)
+DATA_FILES = {'employ': 'employment_data.xlsx',
+              'trade': 'trade_data.xlsx',
+              'income': 'income_data.xlsx',
+              'production': 'production_data.xlsx'}
+
+# Precomputed tables that belong to the partition of a domain
+TABLE_FILES = {'employ': [TABLE1_FILE, TABLE2_FILE]}
+
+# Number of versions of a partition kept in the caches per domain (the served and the next version)
+CACHED_VERSIONS = 2
+
+# Number of page selections kept in the selection cache (shared by all dashboards)
+SELECTION_CACHE_ENTRIES = 1000
+
+# Compact dtypes of the loaded datasets: text dimensions as categoricals (codes), years as
+# int16 and the 0/1 country flags as (nullable) booleans
+CATEGORY_COLUMNS = ['Country Code', 'Country', 'Indicator Code', 'Indicator',
+                    'Region', 'Sub-region', 'Income Group']
+FLAG_COLUMNS = ['Least Developed Countries (LDC)', 'Land Locked Developing Countries (LLDC)',
+                'Small Island Developing States (SIDS)']
+
+# Dtype of the values ('float32' halves their memory but keeps only about 7 significant digits)
+VALUE_DTYPE = 'float64'
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+# Versions served to new reruns ({domain: version}), versions that are prepared in the
+# background ({(domain, version)}) and their objects until the loaders take them
+# ({(domain, version): {name: object}}), see get_data_version
+_served_versions = {}
+_preparing_versions = set()
+_prepared_versions = {}
+_versions_lock = threading.Lock()
+
+_logger = logging.getLogger(__name__)
+
+
+def cache_versions(load):
+
+    """
+    Decorator of the loaders of a version of a domain (called with the domain, the version
+    and further arguments, e.g. the table file). Like st.cache_resource, the object is
+    loaded once per process and shared by all sessions, but the objects are kept per
+    domain: the objects of the CACHED_VERSIONS most recently used versions of every domain,
+    so the new versions of one domain cannot evict the served version of another domain.
+    Concurrent calls with the same arguments load the object once.
+
+    """
+
+    # Objects of every domain ({domain: {(version, *args): object}}, least recently used first)
+    # and the locks of the objects that are being loaded
+    entries = {}
+    loading = {}
+    lock = threading.Lock()
+
+    @functools.wraps(load)
+    def load_cached(domain, version, *args):
+
+        key = (version, *args)
+
+        with lock:
+            domain_entries = entries.setdefault(domain, {})
+            if key in domain_entries:
+                domain_entries[key] = domain_entries.pop(key)
+                return domain_entries[key]
+            key_lock = loading.setdefault((domain, key), threading.Lock())
+
+        with key_lock:
+            with lock:
+                if key in domain_entries:
+                    return domain_entries[key]
+
+            try:
+                obj = load(domain, version, *args)
+            finally:
+                with lock:
+                    loading.pop((domain, key), None)
+
+            with lock:
+                domain_entries[key] = obj
+
+                # Objects of the older versions of the domain are dropped
+                versions = list(dict.fromkeys(cached_key[0] for cached_key in reversed(domain_entries)))
+                for old_key in [cached_key for cached_key in domain_entries if cached_key[0] not in versions[:CACHED_VERSIONS]]:
+                    del domain_entries[old_key]
+
+        return obj
+
+    return load_cached
+
+
+def get_data_path(domain, version):
+
+    """
+    Returns the path of the dataset (xlsx) of a version of a domain.
+
+    """
+
+    return get_version_path(domain, version, DATA_FILES[domain])
+
+
+def prepare_version(domain, version):
+
+    """
+    Reads a version of the partition of a domain (the metadata, the dataset, the
+    precomputed tables, the group statistics and the availability matrix) and returns it ({name: object}). Called in the background, so the
+    objects are handed to the caches of the loaders on their first use (see _take_prepared).
+
+    """
+
+    prepared = {'metadata': read_metadata(domain, version),
+                'dataset': read_dataset(domain, version)}
+
+    for table_file in TABLE_FILES.get(domain, []):
+        prepared[table_file] = read_table(domain, version, table_file)
+
+    prepared['group_stats'] = read_group_stats(domain, version)
+    prepared['availability'] = read_availability(domain, version)
+
+    return prepared
+
+
+def _prepare_in_background(domain, version):
+
+    try:
+        prepared = prepare_version(domain, version)
+    except Exception:
+        # The served version is kept (the version is only tried again if it is published again)
+        _logger.exception("Version %s of %s could not be prepared", version, domain)
+        return
+
+    with _versions_lock:
+        # Objects of older versions that were prepared but never used are dropped
+        for key in [key for key in _prepared_versions if key[0] == domain]:
+            del _prepared_versions[key]
+
+        _prepared_versions[(domain, version)] = prepared
+        _served_versions[domain] = version
+        _preparing_versions.discard((domain, version))
+
+
+def _take_prepared(domain, version, name):
+
+    """
+    Returns an object of a version that was prepared in the background (None if there is
+    none). The background thread has no script run context, so the streamlit caches
+    cannot be filled there: the loaders take the prepared object on their first call.
+
+    """
+
+    with _versions_lock:
+        prepared = _prepared_versions.get((domain, version), {})
+        obj = prepared.pop(name, None)
+        if not prepared:
+            _prepared_versions.pop((domain, version), None)
+
+    return obj
+
+
+def get_data_version(domain):
+
+    """
+    Returns the version of the partition of a domain that is served to new reruns. This is
+    also the watcher of the manifest (one stat per rerun): if the ETL published a new version,
+    it is prepared in a background thread and swapped in for the reruns that start once it
+    is loaded. Until then, and for reruns that already started, the previous version is
+    served, so no session waits for the new version to load.
+
+    """
+
+    latest = read_manifest()[domain]
+
+    with _versions_lock:
+        served = _served_versions.setdefault(domain, latest)
+
+        if latest != served and (domain, latest) not in _preparing_versions:
+            _preparing_versions.add((domain, latest))
+            threading.Thread(target=_prepare_in_background, args=(domain, latest), daemon=True).start()
+
+    return served
+
+
+def get_metadata_path(data_path):
+
+    """
+    Takes the path of a dataset (xlsx) as an input and returns the path of its metadata
+    sidecar (json file next to the dataset).
+
+    """
+
+    return os.path.splitext(data_path)[0] + '_metadata.json'
+
+
+def write_metadata(df, data_path, aggregates=()):
+
+    """
+    Writes the metadata sidecar of a dataset: the lists of countries, indicators, regions,
+    sub-regions, years and aggregates (see app_functions/aggregates.py) and the first and
+    last year of each country. Called by the ETL after the dataset is saved, so the
+    dashboards can show the sidebar without loading the dataset (and pandas) first.
+
+    """
+
+    years = df['Year'].astype(str).astype(int)
+    country_years = years.groupby(df['Country'], sort=False).agg(['min', 'max'])
+
+    metadata = {'countries': df['Country'].unique().tolist(),
+                'indicators': df['Indicator'].unique().tolist(),
+                'regions': df['Region'].unique().tolist(),
+                'subregions': df['Sub-region'].unique().tolist(),
+                'years': sorted(years.unique().tolist()),
+                'aggregates': list(aggregates),
+                'country_years': {country: [int(row['min']), int(row['max'])]
+                                  for country, row in country_years.iterrows()}}
+
+    with open(get_metadata_path(data_path), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False)
+
+
+@cache_versions
+def load_metadata(domain, version):
+
+    """
+    Loads the metadata sidecar of a version of the dataset of a domain (see write_metadata).
+    Shared like the datasets, so the lists must be copied before they are changed.
+
+    """
+
+    metadata = _take_prepared(domain, version, 'metadata')
+
+    return read_metadata(domain, version) if metadata is None else metadata
+
+
+def read_metadata(domain, version):
+
+    """
+    Reads the metadata sidecar of a version of a domain (uncached, see load_metadata).
+
+    """
+
+    with open(get_metadata_path(get_data_path(domain, version)), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def set_read_only(df):
+
+    """
+    Write-protects the arrays of a dataframe that is shared by all sessions, so that an
+    in-place change (e.g. df.loc[...] = ...) raises an error instead of changing the data
+    of every session. Returns the dataframe itself (no copy).
+
+    """
+
+    # The arrays of the columns (blocks) of the dataframe: numpy arrays, the codes of the
+    # categoricals and the values and mask of the nullable booleans. Text columns (object
+    # arrays) are left writeable: pandas 1.5 cannot compare read-only object arrays with a scalar.
+    for values in df._mgr.arrays:
+        for buffer in _get_buffers(values):
+            if buffer.dtype != object:
+                buffer.flags.writeable = False
+
+    return df
+
+
+def _get_buffers(values):
+
+    """
+    Returns the numpy arrays that hold the data of an array of a dataframe (see set_read_only).
+
+    """
+
+    if isinstance(values, np.ndarray):
+        return [values]
+    if isinstance(values, pd.Categorical):
+        return [values._ndarray]
+    if isinstance(values, (pd.arrays.BooleanArray, pd.arrays.IntegerArray, pd.arrays.FloatingArray)):
+        return [values._data, values._mask]
+
+    return []
+
+
+def prepare_dataset(df, value_dtype=VALUE_DTYPE):
+
+    """
+    Takes a dataset as read from the file as an input and returns it with compact dtypes:
+    categoricals for the text dimensions, int16 years, booleans for the country flags and
+    the mask of the filled values (see app_functions/gap_filling.py) and the values as value_dtype.
+
+    """
+
+    # Turn years into int (str necessary first because Streamlit)
+    years = df['Year'].astype(str).astype('int16')
+
+    dtypes = {**{col: 'category' for col in CATEGORY_COLUMNS},
+              **{col: 'boolean' for col in FLAG_COLUMNS},
+              **({IMPUTED_COLUMN: 'bool'} if IMPUTED_COLUMN in df.columns else {}),
+              'Value': value_dtype}
+
+    return df.astype(dtypes).assign(Year=years)
+
+
+@cache_versions
+def load_dataset(domain, version):
+
+    """
+    Loads a version of the dataset of a domain with compact dtypes (see prepare_dataset). The dataframe
+    is kept once per process and shared by all sessions and dashboards, so it is
+    write-protected (see set_read_only).
+
+    """
+
+    df = _take_prepared(domain, version, 'dataset')
+
+    return read_dataset(domain, version) if df is None else df
+
+
+def read_dataset(domain, version):
+
+    """
+    Reads a version of the dataset of a domain (uncached, see load_dataset). The aggregates
+    of the country groups (see app_functions/aggregates.py) are appended to the dataset if
+    the ETL of the version wrote them, so they can be selected like the peer countries.
+
+    """
+
+    df = pd.read_excel(get_data_path(domain, version), engine='openpyxl')
+
+    aggregates_path = get_version_path(domain, version, AGGREGATES_FILE)
+    if os.path.exists(aggregates_path):
+        df = pd.concat([df, pd.read_parquet(aggregates_path)], ignore_index=True)
+
+    return set_read_only(prepare_dataset(df))
+
+
+@cache_versions
+def load_table(domain, version, table_file):
+
+    """
+    Loads a precomputed table of a version of a domain (indexed by country and year for the
+    lookup). Shared and write-protected like the datasets.
+
+    """
+
+    df = _take_prepared(domain, version, table_file)
+
+    return read_table(domain, version, table_file) if df is None else df
+
+
+def read_table(domain, version, table_file):
+
+    """
+    Reads a precomputed table of a version of a domain (uncached, see load_table).
+
+    """
+
+    df = pd.read_excel(get_version_path(domain, version, table_file), engine='openpyxl')
+
+    return set_read_only(df.set_index(['Country', 'Year']).sort_index())
+
+
+@cache_versions
+def load_group_stats(domain, version):
+
+    """
+    Loads the precomputed percentile ranks and quantile bands of the country groups of a
+    version of a domain (see app_functions/group_stats.py), indexed for the lookup of a
+    country and of a group. Shared and write-protected like the datasets. Returns None if
+    the ETL of the version did not write them.
+
+    """
+
+    group_stats = _take_prepared(domain, version, 'group_stats')
+
+    return read_group_stats(domain, version) if group_stats is None else group_stats
+
+
+def read_group_stats(domain, version):
+
+    """
+    Reads the group statistics of a version of a domain (uncached, see load_group_stats).
+
+    """
+
+    ranks_path = get_version_path(domain, version, GROUP_RANKS_FILE)
+    if not os.path.exists(ranks_path):
+        return None
+
+    df_ranks = pd.read_parquet(ranks_path).set_index(['Country', 'Indicator', 'Year']).sort_index()
+    df_bands = pd.read_parquet(get_version_path(domain, version, GROUP_BANDS_FILE)).set_index(
+        ['Group Type', 'Group', 'Indicator', 'Year']).sort_index()
+
+    return set_read_only(df_ranks), set_read_only(df_bands)
+
+
+@cache_versions
+def load_availability(domain, version):
+
+    """
+    Loads the availability matrix of a version of a domain (see app_functions/availability.py),
+    so the sections can test whether there is data for their selection before they retrieve
+    it. Small and read without the dataset. Returns None if the ETL of the version did not
+    write it.
+
+    """
+
+    availability = _take_prepared(domain, version, 'availability')
+
+    return read_availability(domain, version) if availability is None else availability
+
+
+def read_availability(domain, version):
+
+    """
+    Reads the availability matrix of a version of a domain (uncached, see load_availability).
+
+    """
+
+    availability_path = get_version_path(domain, version, AVAILABILITY_FILE)
+    if not os.path.exists(availability_path):
+        return None
+
+    with np.load(availability_path) as npz:
+        availability = {name: npz[name] for name in npz.files}
+
+    for bits in ('bits', 'filled_bits'):
+        if bits in availability:
+            availability[bits].flags.writeable = False
+
+    return {**availability,
+            'first_year': int(availability['first_year']),
+            'years': int(availability['years']),
+            'country_index': {country: i for i, country in enumerate(availability['countries'])},
+            'indicator_index': {indicator: i for i, indicator in enumerate(availability['indicators'])}}
+
+
+def build_cube(df):
+
+    """
+    Takes a dataset with compact dtypes (see prepare_dataset) as an input and returns its
+    year-sliced index for the views of all countries (world map and ranking): the values as
+    a dense array of indicator x year x country, so the values of an indicator in a year are
+    a slice of the array instead of a scan of the dataset (see get_cross_section). Returns
+    the read-only array with its indicators, first year, countries (with their position in
+    the array) and country codes.
+
+    """
+
+    country_codes = df['Country'].cat.codes.values
+    indicator_codes = df['Indicator'].cat.codes.values
+    first_year = int(df['Year'].min())
+    year_codes = df['Year'].values - first_year
+
+    # Rows without a country or country code (aggregates) and filled values are not part of the cube
+    rows = (country_codes >= 0) & (indicator_codes >= 0) & (df['Country Code'].cat.codes.values >= 0)
+    if IMPUTED_COLUMN in df.columns:
+        rows &= ~df[IMPUTED_COLUMN].values
+
+    values = np.full((len(df['Indicator'].cat.categories), int(year_codes.max()) + 1,
+                      len(df['Country'].cat.categories)), np.nan)
+    values[indicator_codes[rows], year_codes[rows], country_codes[rows]] = df['Value'].values[rows]
+    values.flags.writeable = False
+
+    # ISO code of every country of the cube
+    codes = np.empty(values.shape[2], dtype=object)
+    codes[country_codes[rows]] = np.asarray(df['Country Code'])[rows]
+
+    return {'values': values,
+            'indicators': {indicator: i for i, indicator in enumerate(df['Indicator'].cat.categories)},
+            'first_year': first_year,
+            'countries': np.asarray(df['Country'].cat.categories, dtype=object),
+            'country_index': {country: i for i, country in enumerate(df['Country'].cat.categories)},
+            'country_codes': codes}
+
+
+@cache_versions
+def load_cube(domain, version):
+
+    """
+    Loads the year-sliced index of a version of the dataset of a domain (see build_cube).
+    Built once per process from the loaded dataset and shared by all sessions.
+
+    """
+
+    return build_cube(load_dataset(domain, version))
+
+
+def get_cross_section(cube, indicator, year):
+
+    """
+    Takes the cube of a dataset (see load_cube), an indicator and a year as an input and
+    returns the values of the indicator in the year for all countries of the cube (NaN if
+    a country has no value). The values are a view of the cube (no copy) and must not be
+    changed. Returns None if the indicator or year is not in the cube.
+
+    """
+
+    i = cube['indicators'].get(indicator)
+    year_code = year - cube['first_year']
+
+    if i is None or not 0 <= year_code < cube['values'].shape[1]:
+        return None
+
+    return cube['values'][i, year_code]
+
+
+def get_cross_section_years(cube, indicator):
+
+    """
+    Returns the years in which an indicator has a value for at least one country.
+
+    """
+
+    available = ~np.isnan(cube['values'][cube['indicators'][indicator]]).all(axis=1)
+
+    return [cube['first_year'] + year_code for year_code in np.flatnonzero(available)]
+
+
+@st.cache_resource(max_entries=SELECTION_CACHE_ENTRIES, show_spinner=False)
+def _get_page_data(domain, page_selections, version):
+
+    with profile_section('load_data', domain):
+        df = load_dataset(domain, version)
+
+    return {name: set_read_only(df_selec) for name, df_selec in get_query_plan(df, page_selections).items()}
+
+
+def get_page_data(domain, page_selections, version):
+
+    """
+    Resolves all selections of a page with the query plan (see get_query_plan). The results
+    are cached per domain, selections and version, so a selection that was already
+    retrieved by any session is not queried again. The dataframes are shared by the
+    sessions without a copy and write-protected (see set_read_only), so they must not be
+    changed.
+
+    """
+
+    with profile_section('filter_data', domain):
+        return _get_page_data(domain, page_selections, version)
+
+
+def get_tab_data(domain, tab_selections, name, version):
+
+    """
+    Retrieves the data of a single selection (e.g. of a tab that is shown) through the
+    selection cache. Used for the data that is only needed once it is shown.
+
+    """
+
+    return get_page_data(domain, {name: tab_selections[name]}, version)[name]
+
+
+def get_years(metadata, country_input):
+
+    """
+    Takes the metadata of a dataset and a country as an input and retrieves the corresponding
+    minimum and maximum year available. This can be used to adjust the year slider.
+
+    """
+
+    start_year, end_year = metadata['country_years'][country_input]
+
+    return start_year, end_year
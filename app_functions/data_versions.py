@@ -0,0 +1,111 @@
+import json
+import os
+import shutil
+from datetime import datetime
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Versioned datasets: the files of a version of a domain are in data/<domain>/<version>/ and the
+# manifest names the current version of every domain ({domain: version})
+DATA_DIR = 'data'
+MANIFEST_PATH = os.path.join(DATA_DIR, 'manifest.json')
+
+# Number of versions kept per domain (older versions may still be used by running sessions)
+KEEP_VERSIONS = 3
+
+# Format of the versions (time of creation, so the versions sort by age). Versions in another
+# format (e.g. the initial version of the repository) are older than all others
+VERSION_FORMAT = '%Y%m%d-%H%M%S'
+
+# Manifest as last read (modification time, manifest)
+_manifest = (None, {})
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def read_manifest():
+
+    """
+    Returns the manifest ({domain: current version}). The file is only read again once it
+    was changed, so the manifest can be checked on every rerun.
+
+    """
+
+    global _manifest
+
+    mtime = os.stat(MANIFEST_PATH).st_mtime_ns
+
+    if _manifest[0] != mtime:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            _manifest = (mtime, json.load(f))
+
+    return _manifest[1]
+
+
+def get_version_path(domain, version, file_name):
+
+    """
+    Takes a domain, a version and a file name as an input and returns the path of the file
+    in the directory of the version.
+
+    """
+
+    return os.path.join(DATA_DIR, domain, version, file_name)
+
+
+def create_version(domain):
+
+    """
+    Creates the directory of a new version of a domain and returns the version (time of
+    creation). Called by the ETL before the files are written. The version is not used by
+    the dashboards until it is published (see publish_version).
+
+    """
+
+    version = datetime.now().strftime(VERSION_FORMAT)
+    os.makedirs(os.path.join(DATA_DIR, domain, version))
+
+    return version
+
+
+def publish_version(domain, version):
+
+    """
+    Makes a version the current version of a domain (called by the ETL once all files of the
+    version are written). The manifest is replaced atomically, so the dashboards either see
+    the previous or the new version. Versions older than the last KEEP_VERSIONS are removed
+    (by the time in the version, see get_version_time), the published and the previous
+    current version are always kept.
+
+    """
+
+    manifest = dict(read_manifest()) if os.path.exists(MANIFEST_PATH) else {}
+    previous = manifest.get(domain)
+    manifest[domain] = version
+
+    tmp_path = MANIFEST_PATH + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, MANIFEST_PATH)
+
+    # Remove the oldest versions (by the time in the version, not the modification time of
+    # the directory, which changes when a file of the version is touched)
+    domain_dir = os.path.join(DATA_DIR, domain)
+    versions = sorted(os.listdir(domain_dir), key=get_version_time)
+    for old_version in versions[:-KEEP_VERSIONS]:
+        if old_version not in (version, previous):
+            shutil.rmtree(os.path.join(domain_dir, old_version))
+
+
+def get_version_time(version):
+
+    """
+    Returns the time of creation of a version (see create_version), the earliest possible
+    time for versions in another format (e.g. the initial version of the repository).
+
+    """
+
+    try:
+        return datetime.strptime(version, VERSION_FORMAT)
+    except ValueError:
+        return datetime.min
@@ -0,0 +1,140 @@
+import io
+import os
+import streamlit as st
+from app_functions.data_store import get_data_path, cache_versions
+from app_functions.lazy_imports import lazy_import
+
+# Deferred until first use (see lazy_import)
+pd = lazy_import('pandas')
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Download formats of the full datasets: file ending and mime type
+# (the xlsx file is the dataset itself, the others are written next to it by the ETL)
+DOWNLOAD_FORMATS = {'CSV (gzip)': ('.csv.gz', 'application/gzip'),
+                    'Parquet': ('.parquet', 'application/vnd.apache.parquet'),
+                    'Excel': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')}
+
+# Export formats of the current selection (the xlsx file has one sheet per chart and table)
+EXPORT_FORMATS = {'CSV': ('.csv', 'text/csv'),
+                  'Parquet': ('.parquet', 'application/vnd.apache.parquet'),
+                  'Excel': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')}
+
+# Number of selections for which the export is kept
+EXPORT_CACHE_ENTRIES = 500
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def get_download_path(data_path, download_format):
+
+    """
+    Takes the path of a dataset (xlsx) and a download format as an input and returns the
+    path of the corresponding download file and its mime type.
+
+    """
+
+    ending, mime = DOWNLOAD_FORMATS[download_format]
+
+    return os.path.splitext(data_path)[0] + ending, mime
+
+
+def write_downloads(df, data_path):
+
+    """
+    Writes the download files of a dataset (compressed csv and parquet) next to the
+    dataset. Called by the ETL after the dataset is saved, so the dashboards only have to
+    read the files from disk.
+
+    """
+
+    df.to_csv(get_download_path(data_path, 'CSV (gzip)')[0], index=False, compression='gzip')
+    df.to_parquet(get_download_path(data_path, 'Parquet')[0], index=False)
+
+
+@cache_versions
+def load_download(domain, version, download_format):
+
+    """
+    Reads the download file of a version of a domain from disk (once per process, the files
+    of the last CACHED_VERSIONS versions of every domain are kept, see cache_versions).
+
+    """
+
+    with open(get_download_path(get_data_path(domain, version), download_format)[0], 'rb') as f:
+        return f.read()
+
+
+def get_selection_data(page_data):
+
+    """
+    Takes the data of all selections of a page (output of get_query_plan) as an input and
+    combines it into one dataframe with the available values of the selected countries,
+    years and indicators.
+
+    """
+
+    df_selec = pd.concat(page_data.values(), ignore_index=True)
+    df_selec = df_selec[df_selec['Value'].notna()].drop_duplicates(['Country', 'Indicator', 'Year'])
+
+    return df_selec.sort_values(['Indicator', 'Country', 'Year']).reset_index(drop=True)
+
+
+def get_table_data(tables):
+
+    """
+    Takes the rows of the tables of a page ({name: rows with Country and Year}) as an input
+    and returns them in the long format of the selection data: one row per table row and
+    value column, with the indicator named after the labels of the row and the column
+    (e.g. "Employment - Women's share (%)") and the name of the table.
+
+    """
+
+    tables_long = []
+    for name, df_table in tables.items():
+        labels = [col for col in df_table.columns if col not in ('Country', 'Year')
+                  and not pd.api.types.is_numeric_dtype(df_table[col])]
+        df_long = df_table.melt(id_vars=['Country', 'Year'] + labels, var_name='Column', value_name='Value')
+
+        tables_long.append(pd.DataFrame({'Table': name,
+                                         'Country': df_long['Country'],
+                                         'Indicator': df_long[labels + ['Column']].astype(str).agg(' - '.join, axis=1),
+                                         'Year': df_long['Year'],
+                                         'Value': df_long['Value']}))
+
+    return pd.concat(tables_long, ignore_index=True)
+
+
+@st.cache_data(max_entries=EXPORT_CACHE_ENTRIES, show_spinner=False)
+def export_selection(page_selections, version, export_format, _page_data, table_selection=None, _tables=None):
+
+    """
+    Serializes the data of the current selection of a page in the chosen export format.
+    The data is taken from the retrieved selections of the page (_page_data) and the rows
+    of the tables shown on the page (_tables, {name: rows}, see get_table_rows, retrieved
+    for table_selection), the export is cached per selection and dataset version.
+
+    """
+
+    buffer = io.BytesIO()
+    tables = {name: df_table for name, df_table in (_tables or {}).items() if df_table is not None}
+
+    # One sheet per chart and table
+    if export_format == 'Excel':
+        with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+            for name, df_chart in _page_data.items():
+                df_chart[df_chart['Value'].notna()].to_excel(writer, sheet_name=name, index=False)
+            for name, df_table in tables.items():
+                df_table.to_excel(writer, sheet_name=name, index=False)
+
+    else:
+        df_selec = get_selection_data(_page_data)
+        if tables:
+            df_selec = pd.concat([df_selec, get_table_data(tables)], ignore_index=True)[list(df_selec.columns) + ['Table']]
+
+        if export_format == 'Parquet':
+            df_selec.to_parquet(buffer, index=False)
+        else:
+            df_selec.to_csv(buffer, index=False)
+
+    return buffer.getvalue()
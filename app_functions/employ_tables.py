@@ -0,0 +1,209 @@
+from app_functions.lazy_imports import lazy_import
+
+# Deferred until first use (see lazy_import)
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Table 1 - Women's share (total indicators first, then the corresponding female indicators)
+TABLE1_INDICATORS = ['Population',
+                     'Population in working age',
+                     'Labour force',
+                     'Employment',
+                     'Youth unemployment',
+                     'Population, female share',
+                     'Population in working age, female share',
+                     'Labour force, female share',
+                     'Employment, female share',
+                     'Youth unemployment, female share']
+
+TABLE1_NAMES = ['Population', 'Working age population', 'Labour force', 'Employment', 'Youth unemployment']
+
+# Table 2 - Employment share across the sub sectors
+TABLE2_FEATUREMAP = {'Employment Agriculture; forestry and fishing': 'Primary',
+                     'Employment Mining and quarrying': 'Primary',
+                     'Employment Manufacturing': 'Secondary',
+                     'Employment Electricity; gas; steam and air conditioning supply': 'Secondary',
+                     'Employment Water supply; sewerage, waste management and remediation activities': 'Secondary',
+                     'Employment Construction': 'Secondary',
+                     'Employment Wholesale and retail trade; repair of motor vehicles and motorcycles': 'Tertiary',
+                     'Employment Transportation and storage': 'Tertiary',
+                     'Employment Accomodation and food service activities': 'Tertiary',
+                     'Employment Information and communication': 'Tertiary',
+                     'Employment Financial and insurance activities': 'Tertiary',
+                     'Employment Real estate activities': 'Tertiary',
+                     'Employment Professional, scientific and technical activities': 'Tertiary',
+                     'Employment Administrative and support service activities': 'Tertiary',
+                     'Employment Public administration and defence; compulsory social security': 'Tertiary',
+                     'Employment Education': 'Tertiary',
+                     'Employment Human health and social work activities': 'Tertiary',
+                     'Employment Arts, entertainment and recreation': 'Tertiary',
+                     'Employment Other service activities': 'Tertiary',
+                     'Employment Activities of households as employers; undifferentiated goods- and services-producing activities of households for own use': 'Secondary',
+                     'Employment Activities of extraterritorial organizations and bodies': 'Tertiary',
+                     'Employment Not elsewhere classified': 'Other'
+                     }
+
+SECTOR_ORDER = ['Primary', 'Secondary', 'Tertiary', 'Other']
+
+# Files of the precomputed tables (in the directory of the version of the employment data)
+TABLE1_FILE = 'employment_table1.xlsx'
+TABLE2_FILE = 'employment_table2.xlsx'
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def get_wide_values(df, indicators):
+
+    """
+    Takes the long format dataset and a list of indicators as an input and returns
+    a wide dataframe with one row per (Country, Year) and one column per indicator.
+
+    """
+
+    df_fltr = df[df['Indicator'].isin(indicators)]
+    df_wide = df_fltr.pivot_table(index=['Country', 'Year'], columns='Indicator', values='Value', aggfunc='first')
+
+    return df_wide.reindex(columns=indicators)
+
+
+def build_table1(df):
+
+    """
+    Takes the employment dataset as an input and creates Table 1 (women's share) for all
+    countries and years in one vectorized step. Only country-years for which all
+    indicators are available are kept. The output is a long dataframe with the columns
+    Country, Year, Indicator, Total, Women and Women's share (%).
+
+    """
+
+    df_wide = get_wide_values(df, TABLE1_INDICATORS).dropna()
+
+    # Total and women values (rounded to full persons)
+    total = np.round(df_wide[TABLE1_INDICATORS[:5]].values)
+    women = np.round(df_wide[TABLE1_INDICATORS[5:]].values)
+
+    # Women's share (%) rounded to two digits
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = np.round(women / np.round(total / 100), 2)
+
+    # Long format: one row per country, year and indicator
+    n_rows = len(df_wide)
+    table1 = pd.DataFrame({
+        'Country': np.repeat(df_wide.index.get_level_values('Country'), 5),
+        'Year': np.repeat(df_wide.index.get_level_values('Year'), 5),
+        'Indicator': np.tile(TABLE1_NAMES, n_rows),
+        'Total': total.ravel().astype('int64'),
+        'Women': women.ravel().astype('int64'),
+        "Women's share (%)": share.ravel()})
+
+    return table1
+
+
+def build_table2(df):
+
+    """
+    Takes the employment dataset as an input and creates Table 2 (employment share across
+    the sub sectors) for all countries and years in one vectorized step. The not classified
+    employment and the rest that is missing to 100% are combined into "Other". Only
+    country-years with data for at least half of the sub sectors are kept. The output is a
+    long dataframe with the columns Country, Year, Sector, Sub Sector and Employment Share (%).
+
+    """
+
+    sub_sectors = [ind for ind in TABLE2_FEATUREMAP.keys() if ind != 'Employment Other service activities']
+    df_wide = get_wide_values(df, list(TABLE2_FEATUREMAP.keys()) + ['Employment'])
+
+    # Employment shares of the sub sectors
+    shares = df_wide[sub_sectors].div(df_wide['Employment'], axis=0).mul(100).round(2)
+
+    # Combine not classified employment and the missing share into "Other"
+    missing_value = (100 - shares.sum(axis=1)).round(2)
+    shares['Other'] = shares.pop('Employment Not elsewhere classified').fillna(0) + missing_value
+
+    # Long format: one row per country, year and sub sector
+    table2 = shares.reset_index().melt(id_vars=['Country', 'Year'], var_name='Sub Sector', value_name='Employment Share (%)')
+    table2['Sector'] = pd.Categorical(table2['Sub Sector'].map(TABLE2_FEATUREMAP).fillna('Other'),
+                                      categories=SECTOR_ORDER, ordered=True)
+    table2['Sub Sector'] = table2['Sub Sector'].str.replace('^Employment ', '', regex=True)
+
+    # Check if data available (at least half of the rows)
+    n_missing = table2['Employment Share (%)'].isna().groupby([table2['Country'], table2['Year']]).transform('sum')
+    table2 = table2[n_missing < (len(shares.columns) / 2)]
+
+    # Sort by sector and share
+    table2 = table2.sort_values(by=['Country', 'Year', 'Sector', 'Employment Share (%)'],
+                                ascending=[True, True, True, False])
+
+    return table2[['Country', 'Year', 'Sector', 'Sub Sector', 'Employment Share (%)']].reset_index(drop=True)
+
+
+def get_table1(df_table1, country, year):
+
+    """
+    Retrieves Table 1 for a country and a year from the precomputed tables (indexed by
+    Country and Year) and formats it for display. Returns None if the data is not available.
+
+    """
+
+    try:
+        table1 = df_table1.loc[[(country, year)]]
+    except KeyError:
+        return None
+
+    table1 = table1.set_index('Indicator')
+
+    # Add commas and round to two digits
+    return pd.DataFrame({'Total': [format(x, ',d') for x in table1['Total']],
+                         'Women': [format(x, ',d') for x in table1['Women']],
+                         "Women's share (%)": [format(x, '.2f') for x in table1["Women's share (%)"]]},
+                        index=table1.index)
+
+
+def get_table2(df_table2, country, year):
+
+    """
+    Retrieves Table 2 for a country and a year from the precomputed tables (indexed by
+    Country and Year). Returns None if the data is not available.
+
+    """
+
+    try:
+        table2 = df_table2.loc[[(country, year)]]
+    except KeyError:
+        return None
+
+    table2 = table2.reset_index(drop=True)
+    table2['Sector'] = pd.Categorical(table2['Sector'], categories=SECTOR_ORDER, ordered=True)
+
+    return table2
+
+
+def get_table_rows(df_table, country, year):
+
+    """
+    Retrieves the rows of a precomputed table (indexed by Country and Year) for a country
+    and a year as stored (with the columns Country and Year, unformatted), e.g. for the
+    export of the current selection. Returns None if the data is not available.
+
+    """
+
+    try:
+        return df_table.loc[[(country, year)]].reset_index()
+    except KeyError:
+        return None
+
+
+def get_latest_table_year(df_table, country):
+
+    """
+    Returns the latest year of a country in a precomputed table (indexed by Country and
+    Year), or None if the country is not in the table.
+
+    """
+
+    if country not in df_table.index.get_level_values('Country'):
+        return None
+
+    return int(df_table.loc[country].index.max())
@@ -0,0 +1,135 @@
+import streamlit as st
+from app_functions.profiling import profile_section
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Legend below the chart (shared by the line and bar charts of all dashboards)
+LEGEND_BOTTOM = dict(orientation="h",
+                     yanchor="bottom",
+                     y=-0.4,
+                     xanchor="left",
+                     x=-0.05)
+
+# Eviction of the figure cache (number of figures and seconds a figure is kept)
+FIGURE_CACHE_ENTRIES = 2000
+FIGURE_CACHE_TTL = 24 * 60 * 60
+
+# Range slider of the years below the charts (selection of the years in the browser, see
+# select_years) and the shift of a legend below the chart to make room for it
+YEAR_SLIDER_KEY = 'chart_years'
+YEAR_SLIDER = dict(visible=True, thickness=0.08)
+YEAR_SLIDER_LEGEND_SHIFT = 0.15
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def apply_layout(fig, y_range=None, legend=LEGEND_BOTTOM, **layout):
+
+    """
+    Applies the layout shared by the charts of the dashboards: legend below the chart and
+    (optionally) a fixed range of the y-axis. Further layout settings can be passed as
+    keyword arguments.
+
+    """
+
+    fig.update_layout(legend=legend, **layout)
+
+    if y_range is not None:
+        fig.update_yaxes(range=y_range)
+
+    return fig
+
+
+def add_year_slider(fig):
+
+    """
+    Adds a range slider of the years below the x-axis of a chart. Moving it only changes the
+    shown range of the x-axis in the browser, the chart keeps all years it was built with.
+
+    """
+
+    fig.update_xaxes(rangeslider=YEAR_SLIDER)
+
+    # Move a legend below the chart under the slider
+    if fig.layout.legend.y is not None and fig.layout.legend.y < 0:
+        fig.update_layout(legend_y=fig.layout.legend.y - YEAR_SLIDER_LEGEND_SHIFT)
+
+    return fig
+
+
+def select_years(label, start_year, end_year, coverage_year=None):
+
+    """
+    Year selection of the sidebar. Takes the label of the slider, the first and last year
+    of the country and the latest year with data for all indicators (see get_coverage_year,
+    shown as a hint below the slider) as an input and returns the selected start and end
+    year. By default the years are selected with the slider of the sidebar: every move
+    reruns the page, which filters the data and rebuilds the charts. With the toggle, the
+    charts are built once with all years of the country and the years are selected with the
+    range slider below each chart (see add_year_slider). This is handled by plotly in the
+    browser, so the page only reruns when the country or the peer countries change.
+
+    """
+
+    chart_years = st.sidebar.toggle("Select the years in the charts",
+                                    key=YEAR_SLIDER_KEY,
+                                    help="Select the years with the slider below each chart (faster)")
+
+    if chart_years:
+        selected_years = start_year, end_year
+    else:
+        selected_years = st.sidebar.slider(label, start_year, end_year, (start_year, end_year - 1))
+
+    if coverage_year is not None:
+        st.sidebar.caption(f"Latest year with data for all indicators: {coverage_year}")
+
+    return selected_years
+
+
+def select_year(label, selected_years, default_year=None):
+
+    """
+    Year of the sections that show a single year (e.g. the tables of a country). Takes the
+    label of the slider, the selected start and end year (see select_years) and the default
+    year (e.g. the latest year with data of the country) as an input and returns the year.
+    If the years are selected with the slider of the sidebar, this is the end year. If they
+    are selected in the charts, the page has no end year, so the year is selected with a
+    slider of the sidebar.
+
+    """
+
+    if not st.session_state.get(YEAR_SLIDER_KEY):
+        return selected_years[1]
+
+    start_year, end_year = selected_years
+    if start_year == end_year:
+        return end_year
+
+    default_year = end_year if default_year is None else min(max(default_year, start_year), end_year)
+
+    return st.sidebar.slider(label, start_year, end_year, default_year)
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_ENTRIES, ttl=FIGURE_CACHE_TTL, show_spinner=False)
+def _get_cached_figure(chart_id, selection, version, year_slider, _build, _data):
+
+    fig = _build(_data)
+
+    return add_year_slider(fig) if year_slider else fig
+
+
+def get_figure(chart_id, selection, version, build, data, year_axis=True):
+
+    """
+    Returns the figure of a chart from the figure cache. The cache is shared by all sessions
+    and keyed by the chart id, the selection the chart data was retrieved with and the
+    dataset version. Only if the figure is not cached yet, build(data) is called to create it.
+    The returned figure is shared and must not be changed. Charts with the years on the
+    x-axis (year_axis) get the range slider of the years if it is chosen (see select_years).
+
+    """
+
+    year_slider = year_axis and st.session_state.get(YEAR_SLIDER_KEY, False)
+
+    with profile_section('build_figure', chart_id):
+        return _get_cached_figure(chart_id, selection, version, year_slider, build, data)
@@ -0,0 +1,140 @@
+import streamlit as st
+from app_functions.lazy_imports import lazy_import
+
+# Deferred until first use (see lazy_import)
+np = lazy_import('numpy')
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Indicators whose gaps are filled by the ETL per domain: {indicator: (method, max gap)}. 'linear'
+# interpolates between the observations before and after a gap of at most max gap years,
+# 'locf' carries the last observation forward for at most max gap years (e.g. survey scores
+# that are only published every few years)
+GAP_FILLING = {'income': {'Gini index': ('linear', 5),
+                          'Income share held by lowest 20%': ('linear', 5),
+                          'Income share held by second 20%': ('linear', 5),
+                          'Income share held by third 20%': ('linear', 5),
+                          'Income share held by fourth 20%': ('linear', 5),
+                          'Income share held by highest 20%': ('linear', 5),
+                          'Poverty Share': ('linear', 5)},
+               'trade': {'Logistics performance index: Overall (1=low to 5=high)': ('locf', 4),
+                         'Logistics performance index: Efficiency of customs clearance process (1=low to 5=high)': ('locf', 4),
+                         'Logistics performance index: Quality of trade and transport-related infrastructure (1=low to 5=high)': ('locf', 4)}}
+
+# Column of the mask of the filled values
+IMPUTED_COLUMN = 'Imputed'
+
+# Help text of the toggle of the charts
+FILL_GAPS_HELP = ("Fills the gaps between the years with data (interpolated or the last value carried forward). "
+                  "The filled values are flagged in the column Imputed of the downloads.")
+
+# Message of the charts whose selection only has filled values while the toggle is off
+FILLED_ONLY_MESSAGE = "There are only filled values for this selection. Turn on \"Fill the gaps\" to show them."
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def fill_gaps(df, gap_filling):
+
+    """
+    Takes the long format dataset and the indicators to fill (see GAP_FILLING) as an input
+    and returns the dataset with the missing values of these indicators filled within each
+    country (rows of the dataset without a value, the years of a country are not extended).
+    All countries and indicators are filled in one pass over the sorted values: the
+    positions of the observation before and after every row are found with a running
+    maximum and minimum, so no loop over the countries is needed. The filled values are
+    flagged in the column Imputed. Called by the ETL (optional).
+
+    """
+
+    # Rows sorted by country, indicator and year (by position, so the index of the dataset may
+    # have repeated labels, e.g. after a concat; the dataset keeps its order and index)
+    order = df.reset_index(drop=True).sort_values(['Country', 'Indicator', 'Year'], kind='stable').index.to_numpy()
+    df_sorted = df.iloc[order]
+
+    values = df_sorted['Value'].to_numpy(dtype=float)
+    years = df_sorted['Year'].astype(str).astype(int).to_numpy()
+    groups = df_sorted.groupby(['Country', 'Indicator'], sort=False).ngroup().to_numpy()
+
+    # Method and max gap of every row (rows of other indicators are not filled)
+    method = df_sorted['Indicator'].map({ind: fill[0] for ind, fill in gap_filling.items()}).to_numpy()
+    max_gap = df_sorted['Indicator'].map({ind: fill[1] for ind, fill in gap_filling.items()}).fillna(0).to_numpy()
+
+    # Position of the observation before and after every row (within the same country and
+    # indicator, rows without a country such as group aggregates are not filled)
+    positions = np.arange(len(df_sorted))
+    observed = ~np.isnan(values)
+    before = np.maximum.accumulate(np.where(observed, positions, -1))
+    after = np.minimum.accumulate(np.where(observed, positions, len(df_sorted))[::-1])[::-1]
+
+    has_before = (groups >= 0) & (before >= 0) & (groups == groups[np.maximum(before, 0)])
+    has_after = (after < len(df_sorted)) & (groups == groups[np.minimum(after, len(df_sorted) - 1)])
+    before, after = np.maximum(before, 0), np.minimum(after, len(df_sorted) - 1)
+
+    # Linear interpolation between the observations around gaps of at most max gap years
+    linear = (~observed & (method == 'linear') & has_before & has_after &
+              (years[after] - years[before] - 1 <= max_gap))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        share = (years - years[before]) / (years[after] - years[before])
+        linear_values = values[before] + (values[after] - values[before]) * share
+
+    # Last observation carried forward for at most max gap years
+    locf = ~observed & (method == 'locf') & has_before & (years - years[before] <= max_gap)
+
+    filled = np.where(linear, linear_values, np.where(locf, values[before], values))
+
+    # Back to the order of the dataset (inverse of the sort)
+    filled_values, imputed = np.empty_like(filled), np.empty(len(df), dtype=bool)
+    filled_values[order], imputed[order] = filled, linear | locf
+
+    return df.assign(Value=filled_values, **{IMPUTED_COLUMN: imputed})
+
+
+def get_observed(df):
+
+    """
+    Returns the dataset without the filled values (see fill_gaps), e.g. for the statistics
+    that are computed by the ETL. Returns the dataset itself if its gaps were not filled.
+
+    """
+
+    if IMPUTED_COLUMN not in df.columns:
+        return df
+
+    return df.assign(Value=df['Value'].mask(df[IMPUTED_COLUMN].fillna(False).astype(bool)))
+
+
+def has_imputed(df):
+
+    """
+    Returns whether the dataset has filled values (see fill_gaps).
+
+    """
+
+    return IMPUTED_COLUMN in df.columns and bool(df[IMPUTED_COLUMN].fillna(False).any())
+
+
+def select_gap_filling(chart_data, key, observed=True):
+
+    """
+    Toggle of the filled values of a chart (only shown if the data of the chart has filled
+    values). Takes the data of the chart, the key of the toggle and whether the selection
+    has observed values (see has_data) as an input and returns the data with or without
+    the filled values and the suffix of the chart id in the figure cache. The filled values
+    are part of the retrieved data, so the toggle only masks them (no data is retrieved or
+    filled again). If the selection only has filled values and the toggle is off, a message
+    is shown and None is returned as the data.
+
+    """
+
+    if not has_imputed(chart_data):
+        return chart_data, ''
+
+    if st.toggle("Fill the gaps", key=key, help=FILL_GAPS_HELP):
+        return chart_data, '_filled'
+
+    if not observed:
+        st.info(FILLED_ONLY_MESSAGE)
+        return None, ''
+
+    return get_observed(chart_data), ''
@@ -0,0 +1,106 @@
+from app_functions.lazy_imports import lazy_import
+
+# Deferred until first use (see lazy_import)
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Country groups: classifications with one group per value and flags with one group of the
+# countries that have the flag
+GROUP_CLASSIFICATIONS = ['Region', 'Sub-region', 'Income Group']
+GROUP_FLAGS = ['Least Developed Countries (LDC)', 'Land Locked Developing Countries (LLDC)',
+               'Small Island Developing States (SIDS)']
+
+# Quantile bands of the groups
+GROUP_QUANTILES = {'p10': 0.1, 'p25': 0.25, 'Median': 0.5, 'p75': 0.75, 'p90': 0.9}
+
+# Files of the precomputed ranks and bands (in the directory of the version of a dataset)
+GROUP_RANKS_FILE = 'group_ranks.parquet'
+GROUP_BANDS_FILE = 'group_bands.parquet'
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def get_group_values(df):
+
+    """
+    Takes the long format dataset as an input and returns the values of the countries once
+    per group they belong to (Group Type, Group, Country, Indicator, Year, Value), so the
+    statistics of all groups are computed with a single groupby. Rows without a country
+    (e.g. regional aggregates) or without a value are left out.
+
+    """
+
+    df = df[df['Country'].notna() & df['Value'].notna()].reset_index(drop=True)
+    values = df[['Country', 'Indicator', 'Year', 'Value']].assign(Year=df['Year'].astype(str).astype(int))
+
+    # Classifications: the group is the value of the classification
+    groups = [values.assign(**{'Group Type': col, 'Group': df[col]})[df[col].notna()] for col in GROUP_CLASSIFICATIONS]
+
+    # Flags: the group is the flag itself
+    groups += [values.assign(**{'Group Type': col, 'Group': col})[df[col] == 1] for col in GROUP_FLAGS]
+
+    return pd.concat(groups, ignore_index=True)[['Group Type', 'Group', 'Country', 'Indicator', 'Year', 'Value']]
+
+
+def build_group_ranks(df):
+
+    """
+    Takes the long format dataset as an input and returns the percentile rank of every
+    country within each of its groups per indicator and year (0-100, the share of the
+    countries of the group with the same or a lower value). Called by the ETL.
+
+    """
+
+    group_values = get_group_values(df)
+    keys = ['Group Type', 'Group', 'Indicator', 'Year']
+
+    ranks = group_values.groupby(keys, sort=False)['Value'].rank(method='max', pct=True) * 100
+
+    return group_values.drop(columns='Value').assign(**{'Percentile Rank': ranks.round(1)})
+
+
+def build_group_bands(df):
+
+    """
+    Takes the long format dataset as an input and returns the quantile bands (see
+    GROUP_QUANTILES) and the number of countries of every group per indicator and year.
+    Called by the ETL.
+
+    """
+
+    grouped = get_group_values(df).groupby(['Group Type', 'Group', 'Indicator', 'Year'])['Value']
+
+    bands = grouped.quantile(list(GROUP_QUANTILES.values())).unstack()
+    bands.columns = list(GROUP_QUANTILES)
+
+    return bands.assign(Countries=grouped.size()).reset_index()
+
+
+def get_group_position(group_stats, country, indicator, year):
+
+    """
+    Takes the precomputed ranks and bands (indexed, see load_group_stats), a country, an
+    indicator and a year as an input and returns the position of the country within each
+    of its groups: the percentile rank and the quantile bands of the group. Returns None if
+    the data is not available.
+
+    """
+
+    df_ranks, df_bands = group_stats
+
+    try:
+        ranks = df_ranks.loc[[(country, indicator, year)]]
+    except KeyError:
+        return None
+
+    # Bands of the groups of the country
+    band_keys = pd.MultiIndex.from_arrays([ranks['Group Type'], ranks['Group'],
+                                           np.repeat(indicator, len(ranks)), np.repeat(year, len(ranks))])
+    bands = df_bands.reindex(band_keys)
+
+    return pd.DataFrame({'Group': ranks['Group'].values,
+                         'Percentile Rank': ranks['Percentile Rank'].values,
+                         **{col: bands[col].values for col in list(GROUP_QUANTILES) + ['Countries']}},
+                        index=pd.Index(ranks['Group Type'].values, name='Group Type'))
@@ -0,0 +1,64 @@
+import importlib
+import sys
+import threading
+import types
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Optional modules that a library imports on first use without a lock (e.g. plotly checks
+# sys.modules for orjson when a figure is serialized, so a second session can get the module
+# while the first one is still importing it). They are imported together with the library
+COMPANION_MODULES = {'plotly.express': ['orjson'],
+                     'plotly.graph_objects': ['orjson']}
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+# Lock of the deferred imports: the first sessions of a process use the libraries at the same
+# time (one thread per session), so only one of them imports a library and the others wait
+_import_lock = threading.RLock()
+
+
+class _LazyModule(types.ModuleType):
+
+    """
+    Stand-in for a module that is not imported yet (see lazy_import). The module is imported
+    on first attribute access and the attributes are then looked up on the imported module.
+
+    """
+
+    def __getattr__(self, attr):
+
+        module = self.__dict__.get('_module')
+        if module is None:
+            with _import_lock:
+                module = self.__dict__.get('_module')
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    for companion in COMPANION_MODULES.get(self.__name__, []):
+                        try:
+                            importlib.import_module(companion)
+                        except ImportError:
+                            pass
+                    self.__dict__['_module'] = module
+
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+
+    """
+    Takes the name of a module as an input and returns the module without importing it yet.
+    The module is only imported on first attribute access (e.g. pd.DataFrame), so the heavy
+    libraries (pandas, numpy, plotly.express) do not delay the first paint of a dashboard.
+    The import is done under a lock and only the fully imported module is added to
+    sys.modules, so concurrent sessions of a fresh process can use the libraries safely
+    (importlib's LazyLoader is not thread-safe). If the module was already imported, it is
+    returned as is.
+
+    """
+
+    if name in sys.modules:
+        return sys.modules[name]
+
+    return _LazyModule(name)
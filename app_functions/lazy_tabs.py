@@ -0,0 +1,24 @@
+import streamlit as st
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def lazy_tabs(labels, key):
+
+    """
+    Replacement for st.tabs that only renders the tab the user has chosen. Takes the tab
+    labels and a widget key as an input and returns the label of the shown tab. Unlike
+    st.tabs, the data and charts of the other tabs are neither queried nor built until
+    they are shown (and are taken from the selection and figure caches afterwards).
+
+    """
+
+    # Tabs are chosen by position, so the choice is kept if the labels change (e.g. country)
+    position = st.radio("Choose the tab",
+                        options=range(len(labels)),
+                        format_func=lambda i: labels[i],
+                        horizontal=True,
+                        label_visibility="collapsed",
+                        key=key)
+
+    return labels[position]
@@ -0,0 +1,162 @@
+import streamlit as st
+from app_functions.data_store import load_cube, cache_versions
+from app_functions.lazy_imports import lazy_import
+
+# Deferred until first use (see lazy_import)
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Features of a country: the latest value of every indicator of the dataset within the last
+# LATEST_YEARS years of the dataset
+LATEST_YEARS = 5
+
+# Features per dashboard: an indicator or a ratio of two indicators (numerator, denominator).
+# Levels in US$ or persons would make the size of a country dominate, so only shares, rates,
+# scores and per capita values are used, and the levels are divided by a level of the same
+# dataset: the GDP by the population (employment), the trade flows by the exports (trade),
+# the capital stock by the GDP (production), the employment and unemployment by the
+# population in working age, labour force or employment (employment)
+PEER_FEATURES = {'employ': [('GDP, PPP (constant 2017 international $)', 'Population'),
+                            'GDP Share Agriculture (%)', 'GDP Share Industry (%)', 'GDP Share Services (%)',
+                            'Labour force participation rate', 'Unemployment rate',
+                            ('Employment', 'Population in working age'),
+                            ('Youth unemployment', 'Labour force'),
+                            ('Employment, female share', 'Employment'),
+                            ('Labour force, female share', 'Labour force')],
+                 'income': ['GDP per capita', 'GNI per capita', 'Gini index', 'Poverty Share',
+                            'Income share held by lowest 20%', 'Income share held by highest 20%',
+                            'Labour income share estimates'],
+                 'trade': ['Trade (% of GDP)', 'Tariff rate, applied, weighted mean, all products (%)',
+                           'Logistics performance index: Overall (1=low to 5=high)',
+                           ('Exports of goods and services (current US$)', 'Imports of goods and services (current US$)'),
+                           ('Merchandise exports (current US$)', 'Exports of goods and services (current US$)'),
+                           ('Service exports (BoP, current US$)', 'Exports of goods and services (current US$)')],
+                 'production': ['GDP per capita', 'GDP Growth', 'Population Growth Rate',
+                                'Growth rate in total capital (%)',
+                                ('Capital stock (in bil. 2011US$)', 'GDP')]}
+
+# Number of suggested countries and the share of the features of the chosen country another
+# country must also have to be compared
+PEER_SUGGESTIONS = 5
+MIN_SHARED_FEATURES = 0.5
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def build_peer_index(cube, features=None):
+
+    """
+    Takes the cube of a dataset (see load_cube) and the features (see PEER_FEATURES, all
+    indicators of the cube if None) as an input and returns the index of the peer
+    suggestion: a matrix of countries x features (the latest value of every feature,
+    see LATEST_YEARS) with every feature normalized to its percentile rank among the
+    countries (0-1, missing values stay NaN), so features in US$, % and persons are
+    comparable and outliers do not dominate the distances. Features with an indicator
+    that is not in the cube are skipped.
+
+    """
+
+    features = list(cube['indicators']) if features is None else features
+    values = np.stack([_get_feature_values(cube, feature) for feature in features
+                       if all(ind in cube['indicators'] for ind in _get_feature_indicators(feature))])
+
+    # Latest year with a value of every feature and country (one step over all of them)
+    available = ~np.isnan(values)
+    latest = values.shape[1] - 1 - np.argmax(available[:, ::-1, :], axis=1)
+    features = np.take_along_axis(values, latest[:, None, :], axis=1)[:, 0, :].T
+    features[~available.any(axis=1).T] = np.nan
+
+    matrix = pd.DataFrame(features).rank(pct=True).to_numpy()
+
+    return {'matrix': matrix,
+            'countries': cube['countries'],
+            'country_index': cube['country_index']}
+
+
+def _get_feature_indicators(feature):
+
+    """
+    Returns the indicators of a feature (see PEER_FEATURES).
+
+    """
+
+    return feature if isinstance(feature, tuple) else (feature,)
+
+
+def _get_feature_values(cube, feature):
+
+    """
+    Returns the values of a feature in the last LATEST_YEARS years of the cube (year x
+    country): the values of the indicator or the ratio of the two indicators (NaN if the
+    denominator is missing or zero).
+
+    """
+
+    values = [cube['values'][cube['indicators'][ind], -LATEST_YEARS:, :] for ind in _get_feature_indicators(feature)]
+    if len(values) == 1:
+        return values[0]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = values[0] / values[1]
+
+    return np.where(np.isfinite(ratio), ratio, np.nan)
+
+
+@cache_versions
+def load_peer_index(domain, version):
+
+    """
+    Loads the index of the peer suggestion of a version of the dataset of a domain (see
+    build_peer_index), once per process.
+
+    """
+
+    return build_peer_index(load_cube(domain, version), PEER_FEATURES.get(domain))
+
+
+def suggest_peers(peer_index, country, k=PEER_SUGGESTIONS):
+
+    """
+    Takes the index of the peer suggestion, a country and a number of countries as an input
+    and returns the k countries most similar to the country (nearest neighbours). The
+    distances to all countries are computed at once and only use the features both
+    countries have (scaled to all features of the chosen country). Countries that share
+    less than MIN_SHARED_FEATURES of the features of the chosen country are not suggested.
+
+    """
+
+    i = peer_index['country_index'].get(country)
+    if i is None:
+        return []
+
+    matrix = peer_index['matrix']
+    query = matrix[i]
+    query_features = ~np.isnan(query)
+
+    # Squared differences of the features of the country (NaN if a country lacks a feature)
+    diff = matrix[:, query_features] - query[query_features]
+    shared = (~np.isnan(diff)).sum(axis=1)
+    distances = np.sqrt(np.nansum(diff ** 2, axis=1) * query_features.sum() / np.maximum(shared, 1))
+
+    distances[shared < MIN_SHARED_FEATURES * query_features.sum()] = np.inf
+    distances[i] = np.inf
+
+    # The k nearest countries (partial sort)
+    k = min(k, np.isfinite(distances).sum())
+    nearest = np.argpartition(distances, k)[:k] if k < len(distances) else np.arange(len(distances))
+    nearest = nearest[np.argsort(distances[nearest])]
+
+    return list(peer_index['countries'][nearest])
+
+
+def set_suggested_peers(domain, version, country, key):
+
+    """
+    Callback of the peer suggestion button: sets the comparison countries (multiselect with
+    the given key) to the countries most similar to the chosen country.
+
+    """
+
+    st.session_state[key] = suggest_peers(load_peer_index(domain, version), country)
@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Profiling is opt-in: for all sessions (environment variable) or for a single session with
+# the debug panel in the sidebar (query parameter, e.g. .../employment?debug=1)
+PROFILE_ENV = 'DASHBOARD_PROFILE'
+DEBUG_PARAM = 'debug'
+
+# Structured log of the profiled sections (one json record per line, see benchmarks/profile_summary.py)
+PROFILE_LOG_PATH = os.environ.get('DASHBOARD_PROFILE_LOG', 'logs/profile.jsonl')
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def _get_logger():
+
+    """
+    Returns the logger of the structured profiling log (the file is only created once
+    the first section is profiled).
+
+    """
+
+    logger = logging.getLogger('dashboard.profile')
+
+    if not logger.handlers:
+        os.makedirs(os.path.dirname(PROFILE_LOG_PATH) or '.', exist_ok=True)
+        handler = logging.FileHandler(PROFILE_LOG_PATH, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+    return logger
+
+
+def start_profile(page):
+
+    """
+    Starts the profile of a run of a page (called at the top of each dashboard). The sections
+    of the previous run are cleared, so the debug panel shows the sections of the latest run.
+
+    """
+
+    if os.environ.get(PROFILE_ENV) == '1' or st.query_params.get(DEBUG_PARAM) == '1':
+        st.session_state['_profile'] = {'page': page, 'run': uuid.uuid4().hex, 'sections': [], 'open': []}
+    else:
+        st.session_state.pop('_profile', None)
+
+
+@contextmanager
+def profile_section(section, label=None):
+
+    """
+    Context manager that records the wall time and the net change of the number of
+    allocated memory blocks (sys.getallocatedblocks: blocks allocated minus blocks freed
+    in the whole process, not the bytes allocated) of a section of a run, e.g. load_data,
+    filter_data, build_table, build_figure or plotly_chart. The label tells sections of
+    the same kind apart (e.g. the chart id). Sections can be nested (e.g. load_data within
+    filter_data): every record has its depth and its self time and blocks (without the
+    nested sections), so the totals count every second and block once. Does nothing if
+    profiling is not enabled for the session.
+
+    """
+
+    ctx = get_script_run_ctx()
+    profile = st.session_state.get('_profile') if ctx is not None else None
+
+    if profile is None:
+        yield
+        return
+
+    # Time and blocks of the nested sections ([seconds, blocks], see the parent below)
+    nested = [0.0, 0]
+    depth = len(profile['open'])
+    profile['open'].append(nested)
+
+    blocks = sys.getallocatedblocks()
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        net_blocks = sys.getallocatedblocks() - blocks
+
+        profile['open'].pop()
+        if profile['open']:
+            profile['open'][-1][0] += seconds
+            profile['open'][-1][1] += net_blocks
+
+        record = {'section': section,
+                  'label': label,
+                  'depth': depth,
+                  'seconds': seconds,
+                  'net_blocks': net_blocks,
+                  'self_seconds': seconds - nested[0],
+                  'self_blocks': net_blocks - nested[1]}
+        profile['sections'].append(record)
+
+        _get_logger().info(json.dumps({'time': datetime.now(timezone.utc).isoformat(),
+                                       'session': ctx.session_id,
+                                       'page': profile['page'],
+                                       'run': profile['run'],
+                                       **record}))
+
+
+def plotly_chart(fig, **kwargs):
+
+    """
+    Displays a figure with st.plotly_chart and profiles the call (plotly_chart section).
+
+    """
+
+    with profile_section('plotly_chart'):
+        return st.plotly_chart(fig, **kwargs)
+
+
+def show_profile():
+
+    """
+    Shows the sections of the latest run in a debug panel in the sidebar (called at the end
+    of each dashboard): the self time and blocks of every section (see profile_section) and
+    the total of the top-level sections. Only shown if profiling is enabled for the session.
+    Reruns of a single row (fragments) are only written to the log.
+
+    """
+
+    profile = st.session_state.get('_profile')
+
+    if profile is None:
+        return
+
+    with st.sidebar.expander("Debug - profile of the last run", expanded=True):
+
+        total = {}
+        for record in profile['sections']:
+            seconds, blocks, count = total.get(record['section'], (0, 0, 0))
+            total[record['section']] = (seconds + record['self_seconds'], blocks + record['self_blocks'], count + 1)
+
+        st.table({'Section': list(total),
+                  'Calls': [count for _, _, count in total.values()],
+                  'Self time [ms]': [round(seconds * 1000, 1) for seconds, _, _ in total.values()],
+                  'Net memory blocks': [blocks for _, blocks, _ in total.values()]})
+
+        # Nested sections are part of the time of their parent section
+        run_seconds = sum(record['seconds'] for record in profile['sections'] if record['depth'] == 0)
+        st.caption(f"Run {profile['run'][:8]} - {round(run_seconds * 1000, 1)} ms in the profiled sections "
+                   f"- written to {PROFILE_LOG_PATH}")
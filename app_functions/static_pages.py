@@ -0,0 +1,255 @@
+import html
+import itertools
+import os
+import re
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from markdown_it import MarkdownIt
+from plotly.offline import get_plotlyjs_version
+from streamlit.testing.v1 import AppTest
+from app_functions.data_store import read_metadata
+from app_functions.data_versions import read_manifest
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+# Dashboards of the app ({url path: (script, domain)}, see app.py)
+DASHBOARDS = {'production': ('production_app.py', 'production'),
+              'employment': ('employ_app.py', 'employ'),
+              'income': ('income_app.py', 'income'),
+              'trade': ('trade_app.py', 'trade')}
+
+# Label of the country selection of the dashboards
+COUNTRY_LABEL = "Choose your country of interest"
+
+# Seconds a run of a dashboard may take and number of countries rendered per task of the pool
+RUN_TIMEOUT = 300
+CHUNK_SIZE = 10
+
+# Plotly.js of the installed plotly version (loaded by the pages from the plotly CDN)
+PLOTLY_JS = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+
+# Markdown of the dashboards (the html in the texts is kept, like st.markdown(unsafe_allow_html=True))
+_markdown = MarkdownIt('commonmark', {'html': True})
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<script src="{plotly_js}"></script>
+<style>
+body {{font-family: sans-serif; margin: 2rem auto; max-width: 1400px; padding: 0 1rem; color: #31333f;}}
+.row {{display: flex; gap: 1rem;}}
+.caption {{color: #808495; font-size: 0.85rem;}}
+.error {{background: #ffebeb; color: #7d353b; padding: 1rem; border-radius: 0.5rem;}}
+.note {{background: #e8f1fb; padding: 1rem; border-radius: 0.5rem;}}
+table {{border-collapse: collapse;}}
+th, td {{border: 1px solid #e6e9ef; padding: 0.25rem 0.75rem;}}
+</style>
+</head>
+<body>
+{body}
+</body>
+</html>
+"""
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def get_page_name(country):
+
+    """
+    Takes a country as an input and returns the file name of its page (ascii, e.g.
+    "Cote d'Ivoire" -> "cote-d-ivoire.html").
+
+    """
+
+    name = unicodedata.normalize('NFKD', country).encode('ascii', 'ignore').decode()
+
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') + '.html'
+
+
+def write_file(path, text):
+
+    """
+    Writes a file of the static pages atomically (a web server serving the directory never
+    sees a half-written page).
+
+    """
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def render_node(node, chart_ids):
+
+    """
+    Renders a node of the element tree of a dashboard run (see AppTest) as html. Texts,
+    tables and charts are rendered, the widgets are left out. The charts are embedded as
+    their plotly json and drawn by plotly.js (chart_ids numbers the charts of the page).
+
+    """
+
+    node_type = node.type
+
+    # Blocks: columns side by side (with their widths), expanders as collapsible sections
+    if node_type == 'horizontal':
+        return '<div class="row">' + ''.join(render_node(child, chart_ids) for child in node.children.values()) + '</div>'
+
+    if node_type == 'column':
+        return (f'<div style="flex: {node.proto.weight:.3f}; min-width: 0;">'
+                + ''.join(render_node(child, chart_ids) for child in node.children.values()) + '</div>')
+
+    if node_type == 'expander':
+        return (f'<details><summary>{html.escape(node.proto.label)}</summary>'
+                + ''.join(render_node(child, chart_ids) for child in node.children.values()) + '</details>')
+
+    if node_type in ('main', 'vertical'):
+        return ''.join(render_node(child, chart_ids) for child in node.children.values())
+
+    # Elements
+    if node_type in ('title', 'header', 'subheader'):
+        tag = {'title': 'h1', 'header': 'h2', 'subheader': 'h3'}[node_type]
+        return f'<{tag}>{html.escape(node.value)}</{tag}>' if node.value else '<br>'
+
+    if node_type == 'markdown':
+        return _markdown.render(node.value)
+
+    if node_type == 'caption':
+        return f'<div class="caption">{_markdown.render(node.value)}</div>'
+
+    if node_type == 'error':
+        return f'<div class="error">{html.escape(node.value)}</div>'
+
+    if node_type == 'arrow_table':
+        return node.value.to_html(border=0)
+
+    if node_type == 'plotly_chart':
+        chart_id = f'chart{next(chart_ids)}'
+        spec = node.proto.spec.replace('</', '<\\/')
+        return (f'<div id="{chart_id}"></div><script>var spec = {spec};'
+                f'Plotly.newPlot("{chart_id}", spec.data, spec.layout, {{responsive: true, displaylogo: false}});</script>')
+
+    return ''
+
+
+def run_dashboard(at, country):
+
+    """
+    Reruns a dashboard (AppTest that was run once) for a country with the default settings:
+    only the country is changed, the other widgets keep their defaults. Raises an error if
+    the run showed an exception.
+
+    """
+
+    selectbox = next(widget for widget in at.sidebar.selectbox if widget.label == COUNTRY_LABEL)
+    if selectbox.value != country:
+        selectbox.set_value(country).run()
+
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    return at
+
+
+def render_page(at, title, app_url=None):
+
+    """
+    Renders the run of a dashboard as a static html page. If the url of the app is given,
+    the page links to it for other selections (peer countries, years, tabs).
+
+    """
+
+    note = ''
+    if app_url:
+        note = (f'<p class="note">This page shows the default selection. For comparison countries and other years, '
+                f'use the <a href="{html.escape(app_url)}">interactive dashboard</a>.</p>')
+
+    return PAGE_TEMPLATE.format(title=html.escape(title), plotly_js=PLOTLY_JS,
+                                body=note + render_node(at.main, itertools.count(1)))
+
+
+def export_pages(url_path, countries, output_dir, app_url=None):
+
+    """
+    Renders the pages of a dashboard for a list of countries (one task of the process pool,
+    the data is loaded once per worker process). Returns the written pages ({country: file
+    name}) and the errors ({country: message}).
+
+    """
+
+    script, _ = DASHBOARDS[url_path]
+    at = AppTest.from_file(script, default_timeout=RUN_TIMEOUT).run()
+    pages, errors = {}, {}
+
+    for country in countries:
+        try:
+            run_dashboard(at, country)
+            page_name = get_page_name(country)
+            write_file(os.path.join(output_dir, url_path, page_name),
+                       render_page(at, f"{url_path.capitalize()} - {country}", app_url))
+            pages[country] = page_name
+        except Exception as e:
+            errors[country] = repr(e)
+
+    return pages, errors
+
+
+def write_index(output_dir, pages):
+
+    """
+    Writes the index pages: one per dashboard with the links to its country pages and one
+    for the directory with the links to the dashboards.
+
+    """
+
+    for url_path, dashboard_pages in pages.items():
+        links = ''.join(f'<li><a href="{page_name}">{html.escape(country)}</a></li>'
+                        for country, page_name in sorted(dashboard_pages.items()))
+        write_file(os.path.join(output_dir, url_path, 'index.html'),
+                   PAGE_TEMPLATE.format(title=url_path.capitalize(), plotly_js=PLOTLY_JS,
+                                        body=f'<h1>{url_path.capitalize()}</h1><ul>{links}</ul>'))
+
+    links = ''.join(f'<li><a href="{url_path}/index.html">{url_path.capitalize()}</a></li>' for url_path in pages)
+    write_file(os.path.join(output_dir, 'index.html'),
+               PAGE_TEMPLATE.format(title="Dashboards", plotly_js=PLOTLY_JS, body=f'<h1>Dashboards</h1><ul>{links}</ul>'))
+
+
+def export_static_pages(output_dir, url_paths=tuple(DASHBOARDS), countries=None, workers=None, app_url=None):
+
+    """
+    Renders the dashboards for every country (or the given countries) at the default
+    settings to static html pages in output_dir/<dashboard>/<country>.html, which can be
+    served by any web server. The countries are rendered in chunks on a process pool.
+    Returns the written pages ({dashboard: {country: file name}}), the errors and the duration.
+
+    """
+
+    start = time.perf_counter()
+    tasks = []
+
+    for url_path in url_paths:
+        os.makedirs(os.path.join(output_dir, url_path), exist_ok=True)
+        domain = DASHBOARDS[url_path][1]
+        dashboard_countries = read_metadata(domain, read_manifest()[domain])['countries']
+        if countries is not None:
+            dashboard_countries = [country for country in dashboard_countries if country in countries]
+        tasks += [(url_path, dashboard_countries[i:i + CHUNK_SIZE]) for i in range(0, len(dashboard_countries), CHUNK_SIZE)]
+
+    pages = {url_path: {} for url_path in url_paths}
+    errors = {url_path: {} for url_path in url_paths}
+
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [(url_path, executor.submit(export_pages, url_path, chunk, output_dir, app_url)) for url_path, chunk in tasks]
+        for url_path, future in futures:
+            chunk_pages, chunk_errors = future.result()
+            pages[url_path].update(chunk_pages)
+            errors[url_path].update(chunk_errors)
+
+    write_index(output_dir, pages)
+
+    return pages, errors, time.perf_counter() - start
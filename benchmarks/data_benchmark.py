@@ -0,0 +1,160 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Microbenchmarks of the data layer at larger scales (python benchmarks/data_benchmark.py).
+# Times the queries of the dashboards on synthetic data with 1x, 10x, ... as many countries
+# (see benchmarks/synthetic_data.py):
+#   - get_filtered_data: one query per chart vs. the query plan (one pass for all charts),
+#   - get_years: scan of the dataset vs. lookup in the metadata sidecar,
+#   - values of an indicator in a year for all countries: scan vs. year-sliced index (cube),
+#   - suggestion of similar countries (nearest neighbours of the peer index),
+#   - gap filling of the sparse indicators (ETL),
+#   - the table builders (ETL) and table lookups of the employment dashboard.
+# The 100x scale of the employment data needs about 10 GB of memory, e.g.
+#   python benchmarks/data_benchmark.py --domains trade income --scales 1 10 100
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic_data import load_source, make_synthetic_data
+from app_functions.data_selection import get_filtered_data, get_query_plan
+from app_functions.data_store import (DATA_FILES, write_metadata, get_metadata_path, get_years, prepare_dataset,
+                                      build_cube, get_cross_section)
+from app_functions.gap_filling import fill_gaps, GAP_FILLING
+from app_functions.aggregates import build_aggregates, AGGREGATE_WEIGHTS
+from app_functions.peer_suggestions import build_peer_index, suggest_peers, PEER_FEATURES
+from app_functions.employ_tables import build_table1, build_table2, get_table1, get_table2
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+REPEAT = 5
+
+# Shape of the selections of a page: country and peers, charts with a few indicators each
+PEERS = 4
+CHARTS = 5
+INDICATORS_PER_CHART = 2
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def time_call(fn, repeat=REPEAT):
+
+    """
+    Calls a function repeatedly and returns the median wall time in ms.
+
+    """
+
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+
+    return 1000 * statistics.median(durations)
+
+
+def get_page_selections(df):
+
+    """
+    Returns selections of a page for a dataset: the first country with peers (taken from the
+    copies of the synthetic data, so they are spread over the dataset) for all years and
+    a few indicators per chart.
+
+    """
+
+    countries = df['Country'].dropna().unique()
+    indicators = df['Indicator'].dropna().unique()
+    country_selec = [countries[0]] + [countries[i] for i in range(len(countries) // PEERS, len(countries), len(countries) // PEERS)][:PEERS]
+
+    return {f'chart{i + 1}': (country_selec, int(df['Year'].min()), int(df['Year'].max()),
+                              list(indicators[(i * INDICATORS_PER_CHART) % len(indicators):][:INDICATORS_PER_CHART]))
+            for i in range(CHARTS)}
+
+
+def benchmark(domain, scale):
+
+    """
+    Runs the benchmarks of a domain at a scale and returns the results {name: ms}.
+
+    """
+
+    df = make_synthetic_data(load_source(domain), scale)
+    selections = get_page_selections(df)
+    country = selections['chart1'][0][0]
+    results = {'rows': len(df)}
+
+    # Filtering: one query per chart vs. one pass for all charts of the page
+    results['get_filtered_data (per chart)'] = time_call(
+        lambda: [get_filtered_data(df, *selection) for selection in selections.values()])
+    results['get_query_plan (page)'] = time_call(lambda: get_query_plan(df, selections))
+
+    # Years of a country: scan of the dataset vs. metadata sidecar (written once by the ETL)
+    results['get_years (scan)'] = time_call(
+        lambda: (df.loc[df['Country'] == country, 'Year'].min(), df.loc[df['Country'] == country, 'Year'].max()))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_path = os.path.join(tmp, 'data.xlsx')
+        results['write_metadata (ETL)'] = time_call(lambda: write_metadata(df, data_path), repeat=1)
+        with open(get_metadata_path(data_path), encoding='utf-8') as f:
+            metadata = json.load(f)
+
+    results['get_years (metadata)'] = time_call(lambda: get_years(metadata, country))
+
+    # All countries for an indicator in a year (world map and ranking): scan vs. cube slice
+    indicator, year = selections['chart1'][3][0], int(df['Year'].max())
+    results['cross section (scan)'] = time_call(
+        lambda: df.loc[(df['Indicator'] == indicator) & (df['Year'] == year), ['Country', 'Value']])
+    df_compact = prepare_dataset(df)
+    results['build_cube (once per version)'] = time_call(lambda: build_cube(df_compact), repeat=1)
+    cube = build_cube(df_compact)
+    results['cross section (cube)'] = time_call(lambda: get_cross_section(cube, indicator, year))
+
+    # Similar countries: index built once per version, nearest neighbours per query
+    results['build_peer_index (per version)'] = time_call(
+        lambda: build_peer_index(cube, PEER_FEATURES.get(domain)), repeat=1)
+    peer_index = build_peer_index(cube, PEER_FEATURES.get(domain))
+    results['suggest_peers (index)'] = time_call(lambda: suggest_peers(peer_index, country))
+
+    # Gaps of the sparse indicators: filled by the ETL in one pass
+    if domain in GAP_FILLING:
+        results['fill_gaps (ETL)'] = time_call(lambda: fill_gaps(df, GAP_FILLING[domain]), repeat=1)
+
+    # Weighted aggregates of the country groups: built by the ETL in one groupby
+    if domain in AGGREGATE_WEIGHTS:
+        results['build_aggregates (ETL)'] = time_call(lambda: build_aggregates(df, AGGREGATE_WEIGHTS[domain]), repeat=1)
+
+    # Tables of the employment dashboard: built by the ETL, looked up by the dashboard
+    if domain == 'employ':
+        results['build_table1 (ETL)'] = time_call(lambda: build_table1(df), repeat=1)
+        results['build_table2 (ETL)'] = time_call(lambda: build_table2(df), repeat=1)
+
+        df_table1 = build_table1(df).set_index(['Country', 'Year']).sort_index()
+        df_table2 = build_table2(df).set_index(['Country', 'Year']).sort_index()
+        year = int(df_table1.loc[country].index.max()) if country in df_table1.index else int(df['Year'].max())
+
+        results['get_table1 (lookup)'] = time_call(lambda: get_table1(df_table1, country, year))
+        results['get_table2 (lookup)'] = time_call(lambda: get_table2(df_table2, country, year))
+
+    return results
+
+
+#-------------------------------------- BENCHMARK ---------------------------------------------
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Microbenchmarks of the data layer at larger scales")
+    parser.add_argument('--domains', nargs='+', default=list(DATA_FILES), choices=list(DATA_FILES))
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 10])
+    args = parser.parse_args()
+
+    for domain in args.domains:
+        for scale in args.scales:
+            results = benchmark(domain, scale)
+            print(f"{domain} {scale}x ({results.pop('rows')} rows)")
+            for name, ms in results.items():
+                print(f"  {name:<32}{ms:>10.2f} ms")
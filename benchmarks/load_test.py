@@ -0,0 +1,255 @@
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from tornado.websocket import websocket_connect
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+# Load test of the dashboards (python benchmarks/load_test.py from the repository root).
+# Starts the app (streamlit run app.py) and drives it with concurrent headless sessions over
+# the websocket of the server, like browsers would. Every session opens a dashboard and then
+# repeatedly picks a random country with peer countries (one rerun) and a random year range
+# and tab (one rerun). Reports the rerun latency percentiles, the throughput and the memory
+# growth of the server process, e.g.
+#   python benchmarks/load_test.py --pages employment --sessions 20 --concurrency 8
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Pages of the app (url paths, see app.py)
+PAGES = ['production', 'employment', 'income', 'trade']
+
+# Labels of the widgets the sessions change
+COUNTRY_LABEL = "Choose your country of interest"
+PEER_LABEL = "Choose comparison countries"
+YEARS_LABEL = "Select the range"
+TAB_LABEL = "Choose the tab"
+
+MAX_PEERS = 4
+TIMEOUT = 300
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def start_server(port):
+
+    """
+    Starts the app in a headless streamlit server and waits until it is healthy. Returns
+    the server process.
+
+    """
+
+    server = subprocess.Popen([sys.executable, '-m', 'streamlit', 'run', 'app.py',
+                               '--server.headless', 'true',
+                               '--server.port', str(port),
+                               '--browser.gatherUsageStats', 'false'],
+                              cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    for _ in range(120):
+        try:
+            urllib.request.urlopen(f'http://localhost:{port}/_stcore/health', timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.5)
+
+    server.kill()
+    raise RuntimeError("The streamlit server did not start")
+
+
+def get_rss(pid):
+
+    """
+    Returns the resident memory of a process in MB (linux).
+
+    """
+
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+
+
+async def rerun(ws, page, widget_states, latencies):
+
+    """
+    Reruns a page of a session with the given widget states ({id: WidgetState}) and waits
+    until the run is finished. Records the latency and returns the widgets of the run
+    ({label: [widget proto]}). Raises if the run showed an exception.
+
+    """
+
+    msg = BackMsg()
+    msg.rerun_script.page_name = page
+    msg.rerun_script.widget_states.widgets.extend(widget_states.values())
+
+    start = time.perf_counter()
+    await ws.write_message(msg.SerializeToString(), binary=True)
+
+    widgets = {}
+    while True:
+        raw = await asyncio.wait_for(ws.read_message(), TIMEOUT)
+        if raw is None:
+            raise RuntimeError("The server closed the session")
+
+        forward_msg = ForwardMsg()
+        forward_msg.ParseFromString(raw)
+        kind = forward_msg.WhichOneof('type')
+
+        if kind == 'delta' and forward_msg.delta.WhichOneof('type') == 'new_element':
+            element = forward_msg.delta.new_element
+            element_type = element.WhichOneof('type')
+            if element_type == 'exception':
+                raise RuntimeError(element.exception.message)
+            if element_type in ('selectbox', 'multiselect', 'slider', 'radio'):
+                widget = getattr(element, element_type)
+                widgets.setdefault(widget.label, []).append(widget)
+
+        elif kind == 'script_finished':
+            if forward_msg.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                continue
+            break
+
+    latencies.append(time.perf_counter() - start)
+
+    return widgets
+
+
+def set_state(widget_states, widget, field, value):
+
+    """
+    Sets the state of a widget (field of the WidgetState proto depends on the widget type).
+
+    """
+
+    state = widget_states.setdefault(widget.id, BackMsg().rerun_script.widget_states.widgets.add())
+    state.id = widget.id
+
+    if isinstance(value, list):
+        getattr(state, field).data[:] = value
+    else:
+        setattr(state, field, value)
+
+
+async def simulate_session(url, page, interactions, rng, latencies):
+
+    """
+    Simulates a session of a dashboard: the first run and a number of interactions with
+    a random country and peers (one rerun) and a random year range and tabs (one rerun).
+
+    """
+
+    ws = await websocket_connect(url)
+
+    try:
+        widgets = await rerun(ws, page, {}, latencies)
+
+        for _ in range(interactions):
+
+            # Country and peer countries (the year slider changes with the country)
+            widget_states = {}
+            country = widgets[COUNTRY_LABEL][0]
+            peers = widgets[PEER_LABEL][0]
+            set_state(widget_states, country, 'int_value', rng.randrange(len(country.options)))
+            set_state(widget_states, peers, 'int_array_value',
+                      rng.sample(range(len(peers.options)), rng.randint(0, MAX_PEERS)))
+            widgets = await rerun(ws, page, widget_states, latencies)
+
+            # Year range within the years of the country and a tab of each tab group
+            years = widgets[YEARS_LABEL][0]
+            if years.min < years.max:
+                first = rng.randint(int(years.min), int(years.max) - 1)
+                set_state(widget_states, years, 'double_array_value', [first, rng.randint(first + 1, int(years.max))])
+            for tabs in widgets.get(TAB_LABEL, []):
+                set_state(widget_states, tabs, 'int_value', rng.randrange(len(tabs.options)))
+            widgets = await rerun(ws, page, widget_states, latencies)
+
+    finally:
+        ws.close()
+
+
+def percentile(values, q):
+
+    """
+    Returns the q-th percentile of a list of values (nearest rank).
+
+    """
+
+    values = sorted(values)
+
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+async def load_test(url, pid, page, sessions, interactions, concurrency, seed):
+
+    """
+    Runs the simulated sessions of a page (at most concurrency at the same time) and prints
+    the latency percentiles, throughput and memory growth of the server.
+
+    """
+
+    latencies, errors = [], []
+    semaphore = asyncio.Semaphore(concurrency)
+    rss_start = get_rss(pid)
+
+    async def run_session(i):
+        async with semaphore:
+            try:
+                await simulate_session(url, page, interactions, random.Random(seed + i), latencies)
+            except Exception as e:
+                errors.append(repr(e))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_session(i) for i in range(sessions)))
+    duration = time.perf_counter() - start
+    rss_end = get_rss(pid)
+
+    print(f"{page}: {sessions} sessions x {interactions} interactions, {concurrency} concurrent")
+    print(f"  reruns: {len(latencies)} in {duration:.1f}s ({len(latencies) / duration:.2f} reruns/s), errors: {len(errors)}")
+    if latencies:
+        print("  latency [ms]: p50 {:.0f}, p90 {:.0f}, p99 {:.0f}, max {:.0f}, mean {:.0f}".format(
+              *(1000 * percentile(latencies, q) for q in (50, 90, 99, 100)), 1000 * statistics.mean(latencies)))
+    print(f"  server memory [MB]: {rss_start:.0f} -> {rss_end:.0f} (+{rss_end - rss_start:.0f})")
+    for error in errors[:3]:
+        print(f"  error: {error}")
+
+    return errors
+
+
+#-------------------------------------- LOAD TEST ---------------------------------------------
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Load test of the dashboards with simulated sessions")
+    parser.add_argument('--pages', nargs='+', default=PAGES, choices=PAGES)
+    parser.add_argument('--sessions', type=int, default=10, help="simulated sessions per page")
+    parser.add_argument('--interactions', type=int, default=5, help="interactions per session")
+    parser.add_argument('--concurrency', type=int, default=4, help="sessions at the same time")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    # Free port for the server
+    with socket.socket() as s:
+        s.bind(('localhost', 0))
+        port = s.getsockname()[1]
+
+    server = start_server(port)
+    url = f'ws://localhost:{port}/_stcore/stream'
+
+    try:
+        errors = []
+        for page in args.pages:
+            errors += asyncio.run(load_test(url, server.pid, page, args.sessions, args.interactions,
+                                            args.concurrency, args.seed))
+    finally:
+        server.terminate()
+        server.wait()
+
+    sys.exit(1 if errors else 0)
@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+
+# Memory benchmark of the loaded datasets (python benchmarks/memory_benchmark.py).
+# Compares the dataframe as read from the file (object text columns, int64 years, float
+# flags) with the compact dtypes of the loader (see prepare_dataset), with float64 and with
+# float32 values: memory per column group and the time of the queries and the export of a
+# page (query plan and csv of the selection), at 1x, 10x, ... scale (see synthetic_data.py).
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic_data import load_source, make_synthetic_data
+from benchmarks.data_benchmark import time_call, get_page_selections
+from app_functions.data_selection import get_query_plan
+from app_functions.data_store import DATA_FILES, CATEGORY_COLUMNS, FLAG_COLUMNS, prepare_dataset
+from app_functions.downloads import get_selection_data
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def get_memory(df):
+
+    """
+    Returns the memory of a dataframe in MB per column group and in total.
+
+    """
+
+    memory = df.memory_usage(deep=True, index=False) / 1e6
+
+    return {'text': memory[CATEGORY_COLUMNS].sum(),
+            'flags': memory[FLAG_COLUMNS].sum(),
+            'year': memory['Year'],
+            'value': memory['Value'],
+            'total': memory.sum()}
+
+
+def benchmark(domain, scale):
+
+    """
+    Runs the benchmark of a domain at a scale and prints the memory and query times of the
+    frame as read and the compact frames.
+
+    """
+
+    df = make_synthetic_data(load_source(domain), scale)
+    selections = get_page_selections(df)
+
+    frames = {'as read': df,
+              'compact': prepare_dataset(df),
+              'compact float32': prepare_dataset(df, value_dtype='float32')}
+
+    print(f"{domain} {scale}x ({len(df)} rows)")
+    print(f"  {'':<18}{'text':>9}{'flags':>9}{'year':>9}{'value':>9}{'total':>9} MB{'query':>10}{'export':>10} ms")
+
+    for name, df_frame in frames.items():
+        memory = get_memory(df_frame)
+        query = time_call(lambda: get_query_plan(df_frame, selections))
+        export = time_call(lambda: get_selection_data(get_query_plan(df_frame, selections)).to_csv(index=False))
+        print(f"  {name:<18}" + ''.join(f"{memory[key]:>9.1f}" for key in memory) + f"{'':>3}{query:>10.1f}{export:>10.1f}")
+
+
+#-------------------------------------- BENCHMARK ---------------------------------------------
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Memory benchmark of the loaded datasets")
+    parser.add_argument('--domains', nargs='+', default=list(DATA_FILES), choices=list(DATA_FILES))
+    parser.add_argument('--scales', nargs='+', type=int, default=[1, 10])
+    args = parser.parse_args()
+
+    for domain in args.domains:
+        for scale in args.scales:
+            benchmark(domain, scale)
@@ -0,0 +1,27 @@
+import sys
+import pandas as pd
+
+# Aggregates the structured profiling log of the dashboards (see app_functions/profiling.py):
+# python benchmarks/profile_summary.py [logs/profile.jsonl]
+# Prints per page and section the number of calls, the median and 95th percentile wall time,
+# the total self time (without the nested sections, so the totals of the sections add up) and
+# the median net change of the number of allocated memory blocks (not bytes).
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+LOG_PATH = sys.argv[1] if len(sys.argv) > 1 else 'logs/profile.jsonl'
+
+#-------------------------------------- SUMMARY ---------------------------------------------
+
+df_log = pd.read_json(LOG_PATH, lines=True)
+df_log['ms'] = df_log['seconds'] * 1000
+df_log['self_ms'] = df_log.get('self_seconds', df_log['seconds']).fillna(df_log['seconds']) * 1000
+
+summary = df_log.groupby(['page', 'section']).agg(calls=('ms', 'size'),
+                                                  p50_ms=('ms', 'median'),
+                                                  p95_ms=('ms', lambda ms: ms.quantile(0.95)),
+                                                  total_self_ms=('self_ms', 'sum'),
+                                                  net_blocks=('net_blocks', 'median'))
+
+print(f"{df_log['run'].nunique()} runs of {df_log['session'].nunique()} sessions")
+print(summary.round(1).sort_values('total_self_ms', ascending=False).to_string())
@@ -0,0 +1,121 @@
+import os
+import statistics
+import subprocess
+import sys
+
+# Startup benchmark of the dashboards (python benchmarks/startup.py from the repository root).
+# Measures in fresh interpreters (like a cold start of a container)
+#   1. the import time of the modules a dashboard imports before its first paint,
+#   2. the time until the sidebar of a dashboard is rendered and the time of its first full run.
+# Fails (exit code 1) if the import time exceeds the budget or if a heavy library is imported
+# before the first paint again.
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import-time budget in seconds (median over the runs, streamlit itself takes about 0.25s)
+IMPORT_TIME_BUDGET = 0.6
+RUNS = 5
+
+# Modules imported by the dashboards before their first paint
+STARTUP_MODULES = ['streamlit',
+                   'app_functions.data_store',
+                   'app_functions.employ_tables',
+                   'app_functions.figure_cache',
+                   'app_functions.downloads',
+                   'app_functions.lazy_tabs']
+
+# Libraries that must only be imported on first use (after the sidebar is shown)
+DEFERRED_MODULES = ['pandas', 'plotly.express', 'matplotlib']
+
+PAGES = ['production_app.py', 'employ_app.py', 'income_app.py', 'trade_app.py']
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def run_python(code):
+
+    """
+    Runs python code in a fresh interpreter in the repository root and returns its output.
+
+    """
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True)
+
+    return result.stdout.strip().splitlines()[-1]
+
+
+def measure_imports():
+
+    """
+    Imports the startup modules in a fresh interpreter and returns the import time and the
+    deferred libraries that were imported anyway.
+
+    """
+
+    code = f"""
+import sys, time
+start = time.perf_counter()
+for name in {STARTUP_MODULES!r}:
+    __import__(name)
+duration = time.perf_counter() - start
+loaded = [name for name in {DEFERRED_MODULES!r}
+          if name in sys.modules]
+print(duration, ','.join(loaded))
+"""
+
+    duration, loaded = (run_python(code).split(' ') + [''])[:2]
+
+    return float(duration), [name for name in loaded.split(',') if name]
+
+
+def measure_page(page):
+
+    """
+    Runs a dashboard once in a fresh interpreter (streamlit AppTest) and returns the time
+    until its sidebar is rendered and the time of the full run. The sidebar time is taken
+    when the dataset is first loaded, which happens right after the sidebar.
+
+    """
+
+    code = f"""
+import time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+import app_functions.data_store as data_store
+sidebar = []
+load_dataset = data_store.load_dataset
+def timed_load_dataset(*args, **kwargs):
+    sidebar.append(time.perf_counter() - start)
+    return load_dataset(*args, **kwargs)
+data_store.load_dataset = timed_load_dataset
+at = AppTest.from_file({page!r}, default_timeout=120).run()
+assert not at.exception, at.exception
+print(sidebar[0], time.perf_counter() - start)
+"""
+
+    sidebar, total = run_python(code).split(' ')
+
+    return float(sidebar), float(total)
+
+
+#-------------------------------------- BENCHMARK ---------------------------------------------
+
+if __name__ == '__main__':
+
+    results = [measure_imports() for _ in range(RUNS)]
+    import_time = statistics.median(duration for duration, _ in results)
+    loaded = sorted(set(name for _, names in results for name in names))
+
+    print(f'Import time (median of {RUNS}): {import_time:.3f}s (budget {IMPORT_TIME_BUDGET:.3f}s)')
+    print(f'Deferred libraries imported before the first paint: {", ".join(loaded) or "none"}')
+
+    for page in PAGES:
+        sidebar, total = measure_page(page)
+        print(f'{page}: sidebar after {sidebar:.3f}s, first run {total:.3f}s')
+
+    if import_time > IMPORT_TIME_BUDGET or loaded:
+        sys.exit(1)
@@ -0,0 +1,85 @@
+import argparse
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+# Synthetic data of the dashboards at a larger scale (python benchmarks/synthetic_data.py).
+# Reproduces the long format schema of the datasets (one row per country, indicator and year)
+# with scale times as many countries: every country is copied (e.g. "Kenya (2)" as a stand-in
+# for sub-national series) with its classifications and values that vary by a random factor.
+# Used by benchmarks/data_benchmark.py, can also be written to disk, e.g.
+#   python benchmarks/synthetic_data.py --domain employ --scale 10 --output data/synthetic_employ_10.parquet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from app_functions.data_store import DATA_FILES, get_data_path
+from app_functions.data_versions import read_manifest
+from app_functions.downloads import get_download_path
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def load_source(domain):
+
+    """
+    Loads the current version of the dataset of a domain from its parquet download (same
+    format as the file the dashboards load).
+
+    """
+
+    df = pd.read_parquet(get_download_path(get_data_path(domain, read_manifest()[domain]), 'Parquet')[0])
+    df['Year'] = df['Year'].astype(str).astype(int)
+
+    return df
+
+
+def make_synthetic_data(df, scale, seed=0):
+
+    """
+    Takes a dataset and a scale as an input and returns a dataset in the same schema with
+    scale times as many countries (and rows). The first copy is the dataset itself.
+
+    """
+
+    if scale == 1:
+        return df.copy()
+
+    rng = np.random.default_rng(seed)
+    copy = np.repeat(np.arange(scale), len(df))
+
+    df_synth = df.iloc[np.tile(np.arange(len(df)), scale)].reset_index(drop=True)
+
+    # Names and codes of the copies (built once per country and copy, then taken per row)
+    for col in ['Country', 'Country Code']:
+        codes, uniques = pd.factorize(df_synth[col])
+        names = np.array([[str(u) if k == 0 else f"{u} ({k + 1})" for k in range(scale)] for u in uniques], dtype=object)
+        df_synth[col] = np.where(codes >= 0, names[codes.clip(0), copy], df_synth[col].values)
+
+    # Values vary by a random factor per country copy and indicator
+    country_codes = pd.factorize(df_synth['Country'])[0]
+    indicator_codes = pd.factorize(df_synth['Indicator'])[0]
+    factor = rng.lognormal(0, 0.2, size=(country_codes.max() + 1, indicator_codes.max() + 1))
+    factor[:df['Country'].nunique()] = 1
+    df_synth['Value'] = df_synth['Value'] * factor[country_codes, indicator_codes]
+
+    return df_synth
+
+
+#-------------------------------------- GENERATOR ---------------------------------------------
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Synthetic data of the dashboards at a larger scale")
+    parser.add_argument('--domain', default='employ', choices=list(DATA_FILES))
+    parser.add_argument('--scale', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', required=True, help="parquet file")
+    args = parser.parse_args()
+
+    df_synth = make_synthetic_data(load_source(args.domain), args.scale, args.seed)
+    df_synth.to_parquet(args.output, index=False)
+
+    print(f"{args.output}: {len(df_synth)} rows, {df_synth['Country'].nunique()} countries")
@@ -0,0 +1,27 @@
+import argparse
+from app_functions.country_reports import export_country_reports
+
+# Country reports (python country_reports.py --output reports).
+# Writes a briefing pack per country with the tables 1 and 2 of the employment dashboard,
+# the GDP and GNI per capita chart of the income dashboard and the LPI charts of the trade
+# dashboard: an html page and an xlsx file with the data of every table and chart in
+# reports/<country>/. The tables and charts are created by the code of the dashboards and
+# the countries are processed on a process pool, e.g.
+#   python country_reports.py --output reports --workers 8
+#   python country_reports.py --countries Kenya Ghana
+
+#-------------------------------------- REPORTS ---------------------------------------------
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Country reports with tables and charts of the dashboards")
+    parser.add_argument('--output', default='reports', help="directory of the reports")
+    parser.add_argument('--countries', nargs='+', help="only these countries (default: all)")
+    parser.add_argument('--workers', type=int, help="processes of the pool (default: number of cpus)")
+    args = parser.parse_args()
+
+    reports, errors, duration = export_country_reports(args.output, args.countries, args.workers)
+
+    print(f"{len(reports)} countries in {duration:.1f}s ({len(reports) / duration:.2f} countries/s) in {args.output}")
+    for country, error in errors.items():
+        print(f"  error {country}: {error}")
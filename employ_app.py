@@ -1,90 +1,234 @@
+import os
 import streamlit as st 
-import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.express as px
+from app_functions.data_store import load_metadata, load_availability, load_table, get_data_version, get_page_data, get_tab_data, get_years, get_data_path
+from app_functions.employ_tables import get_table1, get_table2, get_table_rows, get_latest_table_year, TABLE1_FILE, TABLE2_FILE, TABLE1_INDICATORS
+from app_functions.figure_cache import get_figure, apply_layout, select_years, select_year
+from app_functions.downloads import get_download_path, load_download, export_selection, DOWNLOAD_FORMATS, EXPORT_FORMATS
+from app_functions.lazy_tabs import lazy_tabs
+from app_functions.availability import has_data, get_coverage_year, get_latest_year, NO_DATA_MESSAGE
+from app_functions.cross_section import show_cross_section
+from app_functions.peer_suggestions import set_suggested_peers
+from app_functions.lazy_imports import lazy_import
+from app_functions.profiling import start_profile, profile_section, plotly_chart, show_profile
+
+# Heavy libraries are only imported on first use, after the sidebar is shown (see lazy_import)
+pd = lazy_import('pandas')
+px = lazy_import('plotly.express')
 
 # Git checkout
 # Use full screen 
 st.set_page_config(layout="wide")
 
-#---------------------------------- LOAD DATA AND PARAMETERS ---------------------------------#
+# Profile of the run (only if enabled, see app_functions/profiling.py)
+start_profile('employ')
 
-# Create import function with cache (cache so data is only loaded once)
-@st.cache_data
-def load_data(path):
-    df = pd.read_excel(path, engine='openpyxl')
-    return df
+#---------------------------------- LOAD DATA AND PARAMETERS ---------------------------------#
 
-# Load data 
-df_employ = load_data("data/employment_data.xlsx")
+# Load the metadata of the data (written by the ETL next to the dataset, so the sidebar
+# is shown before the dataset itself is loaded with the first selections of the page)
+# The whole run uses the version of the data that is served when it starts (see get_data_version)
+DATA_VERSION = get_data_version('employ')
+DATA_PATH = get_data_path('employ', DATA_VERSION)
+metadata = load_metadata('employ', DATA_VERSION)
 
 # Get a country, region and indicator list
-df_countries = df_employ['Country'].unique().tolist()
-df_indicators = df_employ['Indicator'].unique().tolist()
-df_regions = df_employ['Region'].unique().tolist()
-df_subregion = df_employ['Sub-region'].unique().tolist()
+df_countries = list(metadata['countries'])
+df_indicators = list(metadata['indicators'])
+df_regions = list(metadata['regions'])
+df_subregion = list(metadata['subregions'])
 df_sub_region = df_regions + df_subregion
-
-# Turn years into int (str necessary first because Streamlit)
-df_employ['Year'] = df_employ['Year'].astype(str)
-df_employ['Year'] = df_employ['Year'].astype(int)
+df_aggregates = list(metadata.get('aggregates', []))
 
 #------------------------------ Functions  ------------------------------------#
 
-# Data Selection 
+def get_latest_year_hint(country, latest_year):
 
-def get_filtered_data(country_selec, start_year_selec, end_year_selec, indicator_selec):
+    """
+    Returns the hint of the error message of the tables: the latest year of the country with
+    data for the table, or nothing if there is none.
 
     """
-    Function takes the user selection of the dashboard as an input and retrieves the
-    corresponding data from the dataset. The output is a filtered dataframe. 
+
+    return f" The latest year with data for {country} is {latest_year}." if latest_year is not None else ""
+
+
+# Charts (only built if the figure is not in the figure cache yet)
+def build_chart1(chart1_data):
 
     """
+    Chart 1 - Employment and labour force as a share of the population.
 
-    # Turn country selection into list if not list 
-    if isinstance(country_selec, str):
-        country_selec = [country_selec]
+    """
 
-    # Create a dataframe with all years and indicators first
-    ## This is necessary to add the missing years with "None" values
-    df_empty = pd.DataFrame([(year, indicator, country) 
-                            for year in range(start_year_selec, end_year_selec+1)
-                            for indicator in indicator_selec
-                            for country in country_selec],
-                            columns=['Year', 'Indicator', 'Country'])
+    ### Group data by year
+    chart1_data = chart1_data.groupby([chart1_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
 
-    
-    # Retrieve the selected data from df
-    df_fltr = df_employ[(df_employ['Country'].isin(country_selec)) & 
-                       (df_employ['Year'] >= start_year_selec) & 
-                       (df_employ['Indicator'].isin(indicator_selec)) &
-                       (df_employ['Year'] <= end_year_selec)]
-    
-    ## Merge 
-    df_merged = pd.merge(df_empty, df_fltr, on=['Year', 'Indicator', 'Country'], how='left')
+    # Configure plot
+    fig = px.line(chart1_data,
+                    x="Year", 
+                    y="Value", 
+                    color='Indicator',
+                    hover_name="Value",
+                    #title='Chart 1 - Employment and labour force as a share of the population',
+                    labels={
+                     "Value": "Number of people",
+                 }
+                    )
+
+    # Legend and y-axis fixed to zero with margin
+    return apply_layout(fig, y_range=[0, ((max(chart1_data.Value))*1.2)])
 
-    ## Fill other columns 
-    df_merged['Indicator Code'] = df_merged.groupby('Indicator')['Indicator Code'].apply(lambda x: x.fillna(method='ffill').fillna(method='bfill'))
 
-    for col in ['Country Code', 'Region', 'Sub-region', 'Income Group', 'Least Developed Countries (LDC)', 'Land Locked Developing Countries (LLDC)', 'Small Island Developing States (SIDS)']:
-        df_merged[col] = df_merged.groupby('Country')[col].apply(lambda x: x.fillna(method='ffill').fillna(method='bfill'))
+def build_chart2(chart2_data):
 
-    # Turn year column into datetime format
+    """
+    Chart 2 - Unemployment and labour force participation rate.
 
-    return df_merged
+    """
+
+    # Configure plot
+    fig = px.line(chart2_data,
+                    x="Year", 
+                    y="Value", 
+                    color='Indicator',
+                    #title ="Chart 2 - Unemployment and labour force participation rate",
+                    hover_name="Value",
+                    labels={
+                    "Value": "Percentage",
+                }
+                    )
 
-# Year Selection 
-def get_years(country_input): 
+    # Legend and y-axis fixed to always show (100%)
+    return apply_layout(fig, y_range=[0, 100])
+
+
+def build_chart2_comparison(chart2_data_comp):
 
     """
-    Takes a country as an input and retrieves the corresponding minimum and maximum year
-    available. This can be used to adjust the year slider. 
+    Chart 2.1 and 2.2 - Comparison of a rate across the selected countries.
 
     """
-    start_year_country = int(df_employ[df_employ['Country'] == country_input]['Year'].min())
-    end_year_country = int(df_employ[df_employ['Country'] == country_input]['Year'].max())
 
-    return start_year_country, end_year_country
+    # Configure plot
+    fig = px.line(chart2_data_comp,
+                    x="Year", 
+                    y="Value", 
+                    color='Country',
+                    hover_name="Value",
+                    labels={
+                    "Value": "Percentage"
+                }
+                    )
+
+    # Legend and y-axis fixed to zero with margin
+    return apply_layout(fig, y_range=[0, ((max(chart2_data_comp.Value))*1.2)])
+
+
+def build_chart3_agg(table2):
+
+    """
+    Chart 3 - Pie chart of the aggregated employment shares of the sectors.
+
+    """
+
+    # Get aggregated data
+    table2_agg = table2.groupby("Sector")["Employment Share (%)"].sum()
+    table2_agg = table2_agg.reset_index()
+
+    # Display aggregate pie chart 
+    fig_2 = px.pie(table2_agg,
+                    values="Employment Share (%)",
+                    #title=f"Aggregated employment shares for {selected_country} in {selected_end_year}",
+                    color = ['Primary', 'Secondary', 'Tertiary', 'Other'],
+                    color_discrete_map={'Primary': '#ef3c2d',
+                                        'Secondary': '#3a0ca3',
+                                        'Tertiary': '#4895ef',
+                                        'Other': 'grey'},
+                    names="Sector")
+
+    fig_2.update_layout(margin=dict(t=0, b=0, l=0, r=0))
+    fig_2.update(layout_showlegend=False)
+    fig_2.update_traces(textposition='inside', textinfo='percent+label')
+
+    return fig_2
+
+
+def build_chart3(table2):
+
+    """
+    Chart 3 - Pie chart of the employment shares of the sub sectors.
+
+    """
+
+    # Get disaggregated data (table2 is shared, so the small sectors are combined in a new dataframe)
+    table2_pie = table2.assign(**{'Sub Sector': table2['Sub Sector'].mask(table2['Employment Share (%)'] < 4, 'Other Sectors')}) # Represent only large countries
+
+    # Configure detailed pie chart
+    fig_2 = px.pie(table2_pie,
+                values="Employment Share (%)",
+                names="Sub Sector",
+                color_discrete_map={
+                    'Agriculture; forestry and fishing': '#033270',
+                    'Mining and quarrying': '#1368aa',
+                    'Manufacturing': '#4091c9',
+                    'Electricity; gas; steam and air conditioning supply': '#f29479',
+                    'Water supply; sewerage, waste management and remediation activities': '#fedfd4',
+                    'Construction': '#9dcee2',
+                    'Wholesale and retail trade; repair of motor vehicles and motorcycles': '#033270', 
+                    'Transportation and storage': '#ef3c2d',
+                    'Accomodation and food service activities': '#cb1b16',
+                    'Information and communication': '#65010c',
+                    'Financial and insurance activities': '#e66063',
+                    'Real estate activities': '#e66063',
+                    'Professional, scientific and technical activities': '#ec8385',
+                    'Administrative and support service activities': '#f1a7a9',
+                    'Public administration and defence; compulsory social security': '#e66063',
+                    'Education': '#bbdefb',
+                    'Human health and social work activities': '#90caf6',
+                    'Arts, entertainment and recreation': '#64b5f2',
+                    'Other service activities': '#42a5f5',
+                    'Activities of households as employers; undifferentiated goods- and services-producing activities of households for own use': '#1e88e5',
+                    'Activities of extraterritorial organizations and bodies': '#f26a4f',
+                    'Not elsewhere classified': '#0d47a1',
+                    'Other Sectors': 'd3d3d3'}, 
+                color = (table2_pie["Sub Sector"]))
+
+    fig_2.update_layout(margin=dict(t=0, b=0, l=0, r=0))
+    fig_2.update(layout_showlegend=False)
+    fig_2.update_traces(textposition='inside', textinfo='percent+label')
+
+    return fig_2
+
+
+def build_chart4(chart4_data):
+
+    """
+    Chart 4 - Employment and GDP shares of the three sectors. Takes Table 2 and the
+    GDP shares as an input.
+
+    """
+
+    table2, gdp_share_data = chart4_data
+
+    # define data 
+    table2_agg = table2.groupby("Sector")["Employment Share (%)"].sum()
+    table2_agg = table2_agg.reset_index()
+    bar_data = table2_agg
+    bar_data.insert(2, 'GDP Share (%)', gdp_share_data['Value'])
+    bar_data = bar_data[bar_data['Sector'] != 'Other']        
+    bar_data_long = pd.melt(bar_data, id_vars=["Sector"], var_name="Share Type", value_name="Share")
+
+    # Display bar chart
+    fig = px.bar(bar_data_long,
+                   x="Sector",
+                   y="Share",
+                   #title=f"Employment and GDP Shares for {selected_country} in {selected_end_year}",
+                   color="Share Type",
+                   barmode='group'
+                   )
+
+    # Legend
+    return apply_layout(fig, margin=dict(t=0, b=0, l=0, r=0))
 
 
 
@@ -106,42 +250,46 @@ selected_country = st.sidebar.selectbox(
     )
 
 # DESCRIPTION REGIONS/PEER COUNTRIES
-st.sidebar.caption("""If you want to compare the values of the chosen country to peer countries, please make a selection below.""")
+st.sidebar.caption("""If you want to compare the values of the chosen country to peer countries, regions or income groups, please make a selection below.""")
 
 # PEER COUNTRY INPUT WIDGET
 selected_peer = st.sidebar.multiselect(
     "Choose comparison countries",
-    df_countries
+    df_countries + df_aggregates,
+    key='employ_peers'
     )
 
+# Suggestion of the countries most similar to the chosen country (see suggest_peers)
+st.sidebar.button("Suggest similar countries", on_click=set_suggested_peers,
+                  args=('employ', DATA_VERSION, selected_country, 'employ_peers'))
+
 # START AND END YEAR SLIDER 
 
 # Update based on data availability for chosen country 
-START_YEAR, END_YEAR = get_years(selected_country)
+START_YEAR, END_YEAR = get_years(metadata, selected_country)
 
-# Widget
-selected_years = st.sidebar.slider(
-     "Select the range",
-     START_YEAR, END_YEAR, (START_YEAR,END_YEAR-1),
-    )
+# Availability of the data (bit-packed matrix written by the ETL, see app_functions/availability.py):
+# the sections test it before they retrieve their data and the slider shows the latest year with
+# data for all indicators
+availability = load_availability('employ', DATA_VERSION)
+
+# Widget (or all years with the range sliders of the charts, see select_years)
+selected_years = select_years("Select the range", START_YEAR, END_YEAR,
+                              get_coverage_year(availability, [selected_country], df_indicators))
 selected_start_year = selected_years[0]
 selected_end_year = selected_years[1]
 
-# DOWNLOAD WIDGET 
-
-# Create a csv version of the dataframe (cache so it doesn't rerun)
-@st.cache_data
-def convert_df(df):
-    return df.to_csv().encode('utf-8')
+# Year of the tables and of Charts 3 and 4 (the end year, or its own slider if the years are selected
+# in the charts, by default the latest year with data for Table 1)
+selected_table_year = select_year("Select the year of the tables", selected_years,
+                                  get_latest_year(availability, [selected_country], TABLE1_INDICATORS))
 
-csv = convert_df(df_employ)
+# DOWNLOAD WIDGET (filled in once the selections of the page are retrieved, see below)
 
 # Add empty space to create some distance 
 st.sidebar.header("")
 
-st.sidebar.download_button(label="Download full data as csv file",
-                   data=csv, 
-                   file_name='employment_data.csv')
+download_box = st.sidebar.container()
 
 st.sidebar.header("")
 
@@ -154,6 +302,59 @@ st.sidebar.info("""Please note that this dashboard is a prototype.
                 reliability, or suitability for any specific purpose.""")
 
 
+#---------------------------------------- PAGE SELECTIONS ---------------------------------------
+
+# Declare all selections of the page so they are retrieved with one pass over the dataset
+page_selections = {
+    'chart1': (selected_country, selected_start_year, selected_end_year, ['Population', 'Population in working age', 'Labour force', 'Employment']),
+    'gdp_share': ([selected_country], selected_table_year, selected_table_year, ['GDP Share Agriculture (%)', 'GDP Share Industry (%)', 'GDP Share Services (%)'])
+    }
+
+# Selections of the tabs (only retrieved once their tab is shown, see lazy_tabs)
+tab_selections = {
+    'chart2': (selected_country, selected_start_year, selected_end_year, ['Labour force participation rate', 'Unemployment rate']),
+    'chart2_unemp': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Unemployment rate']),
+    'chart2_lf': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Labour force participation rate'])
+    }
+page_data = get_page_data('employ', page_selections, DATA_VERSION)
+
+# Precomputed tables (shared like the dataset and only loaded once the sidebar is shown)
+with profile_section('load_data', 'tables'):
+    df_table1 = load_table('employ', DATA_VERSION, TABLE1_FILE)
+    df_table2 = load_table('employ', DATA_VERSION, TABLE2_FILE)
+
+
+#---------------------------------------- DOWNLOAD ---------------------------------------------
+
+with download_box:
+
+    # Full data or only the current selection (country, peers, years and indicators of the page)
+    download_scope = st.radio("Choose the data", ["Full data", "Current selection"])
+
+    # The download files of the full data are written by the ETL next to the dataset and only read from disk
+    if download_scope == "Full data":
+        download_format = st.selectbox("Choose the file format", list(DOWNLOAD_FORMATS))
+        download_path, download_mime = get_download_path(DATA_PATH, download_format)
+        download_data = load_download('employ', DATA_VERSION, download_format)
+        download_name = os.path.basename(download_path)
+
+    # The export of the current selection is created from the retrieved data of the page
+    else:
+        download_format = st.selectbox("Choose the file format", list(EXPORT_FORMATS))
+        download_ending, download_mime = EXPORT_FORMATS[download_format]
+        download_data = export_selection({**page_selections, **tab_selections}, DATA_VERSION, download_format,
+                                         get_page_data('employ', {**page_selections, **tab_selections}, DATA_VERSION),
+                                         (selected_country, selected_table_year),
+                                         {'table1': get_table_rows(df_table1, selected_country, selected_table_year),
+                                          'table2': get_table_rows(df_table2, selected_country, selected_table_year)})
+        download_name = os.path.splitext(os.path.basename(DATA_PATH))[0] + f"_{selected_country}{download_ending}"
+
+    st.download_button(label=f"Download {download_scope.lower()}",
+                       data=download_data,
+                       file_name=download_name,
+                       mime=download_mime)
+
+
 #---------------------------------------- MAIN PAGE --------------------------------------------
 
 # Add a title and intro text
@@ -189,663 +390,465 @@ with st.expander("ℹ️ - About the data sources", expanded=False):
         <li>World Bank. “GDP, PPP (constant 2017 international $).” World Development Indicators, The World Bank Group, 2022, data.worldbank.org/indicator/NY.GDP.MKTP.PP.KD.</li> 
         """,unsafe_allow_html=True)
     
+# The rows of the page are fragments (st.fragment): a widget inside a row only reruns that
+# row. Every row takes the inputs it depends on as arguments.
+
 ############################# ROW 1 ###################################
 
-st.header("")
+@st.fragment
+def show_row1(selected_country, chart1_data, page_selections):
 
-# Display subheading 
-st.subheader(f"Who is working in the economy in {selected_country}?")
+    """
+    Row 1 - Working population (Chart 1).
 
-# Configure columns
-col1, col2, col3 = st.columns([1,0.05,1])
+    """
 
-### GRAPH AND TEXT 1 ###
+    st.header("")
 
-with col1: 
+    # Display subheading 
+    st.subheader(f"Who is working in the economy in {selected_country}?")
 
-    # Create distance
-    st.header("")
+    # Configure columns
+    col1, col2, col3 = st.columns([1,0.05,1])
 
-    #### Explanatory text box 1
-    st.markdown("""<div style="text-align: justify;">All the goods and services an economy creates are formed 
-                by three different factors of production: <strong>land</strong>, <strong>capital</strong>, and 
-                <strong>labour</strong>. Let us take a closer look at 
-                the latter: Who is working in an economy?</div> 
-                <br>
-                <div style="text-align: justify;">Naturally, the population of a country 
-                can be thought of as a starting point. However, children must not work. Hence, 
-                the working-age population is the population above the legal working age. Although 
-                the legal working age might be higher, the ILO sets the minimum working age for 
-                statistical purposes at 15 years. You can see the corresponding ILO <em>estimates</em> of 
-                the working age population in chart 1. The gap to the population line is consequently 
-                the number of children or rather those under 15 years in the country of interest.</div>""", unsafe_allow_html=True
-    )
-    
-    #st.header("")
+    ### GRAPH AND TEXT 1 ###
 
-    #### Graph 1
+    with col1: 
 
-with col3: 
+        # Create distance
+        st.header("")
 
-    # Get data
-    chart1_data = get_filtered_data(selected_country, selected_start_year, selected_end_year, ['Population', 'Population in working age', 'Labour force', 'Employment'])
-    
-    ### Group data by year
-    chart1_data = chart1_data.groupby([chart1_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
-    
-    # Configure plot
-    fig = px.line(chart1_data,
-                    x="Year", 
-                    y="Value", 
-                    color='Indicator',
-                    hover_name="Value",
-                    #title='Chart 1 - Employment and labour force as a share of the population',
-                    labels={
-                     "Value": "Number of people",
-                 }
-                    )
-     
-    # Legend
-    fig.update_layout(legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.4,
-        xanchor="left",
-        x=-0.05,
-        ))
+        #### Explanatory text box 1
+        st.markdown("""<div style="text-align: justify;">All the goods and services an economy creates are formed 
+                    by three different factors of production: <strong>land</strong>, <strong>capital</strong>, and 
+                    <strong>labour</strong>. Let us take a closer look at 
+                    the latter: Who is working in an economy?</div> 
+                    <br>
+                    <div style="text-align: justify;">Naturally, the population of a country 
+                    can be thought of as a starting point. However, children must not work. Hence, 
+                    the working-age population is the population above the legal working age. Although 
+                    the legal working age might be higher, the ILO sets the minimum working age for 
+                    statistical purposes at 15 years. You can see the corresponding ILO <em>estimates</em> of 
+                    the working age population in chart 1. The gap to the population line is consequently 
+                    the number of children or rather those under 15 years in the country of interest.</div>""", unsafe_allow_html=True
+        )
     
-    # Set yaxis to zero
-    #fig.update_yaxes(rangemode="tozero")
+        #st.header("")
 
-    # Fix y-axis to zero and add margin
-    fig.update_yaxes(range = [0, ((max(chart1_data.Value))*1.2)])
-    
-    #Title 
-    st.header("")
-    st.markdown(f"""<div style="text-align: justify;"><b>Chart 1 - Employment 
-                and labour force as a share of the population</div></b>""", unsafe_allow_html=True)
+        #### Graph 1
 
+    with col3: 
 
-    # Display graph
-    st.plotly_chart(fig, use_container_width=True)
+        #Title 
+        st.header("")
+        st.markdown(f"""<div style="text-align: justify;"><b>Chart 1 - Employment 
+                    and labour force as a share of the population</div></b>""", unsafe_allow_html=True)
+
+        # Check if data available (see has_data)
+        if has_data(availability, page_selections['chart1']):
+            # Get figure
+            fig = get_figure('employ_chart1', page_selections['chart1'], DATA_VERSION, build_chart1, chart1_data)
+
+            # Display graph
+            plotly_chart(fig, use_container_width=True)
+        else:
+            st.error(NO_DATA_MESSAGE)
     
-    # Caption graph
-    st.caption('Data Sources: World Bank, ILO (for more information see data sources tab above)')
+        # Caption graph
+        st.caption('Data Sources: World Bank, ILO (for more information see data sources tab above)')
 
-# Create distance
-st.header("")
+    # Create distance
+    st.header("")
 
+show_row1(selected_country, page_data['chart1'], page_selections)
 
 ############################# ROW 2 ###################################
 
-# Subheader 
-st.subheader("Who is being paid for work?")
+@st.fragment
+def show_row2(selected_country, selected_peer, tab_selections):
 
-### GRAPH AND TEXT 2 ###
-# Configure columns
-col1, col2, col3 = st.columns([1,0.05,1])
+    """
+    Row 2 - Unemployment and labour force participation (Chart 2 and comparison tabs).
 
-with col1: 
+    """
 
-    st.header("")
+    # Subheader 
+    st.subheader("Who is being paid for work?")
 
-    #### Explanatory text box 1
-    st.markdown("""<div style="text-align: justify;">Next, let us ask who among those persons in working age is paid for work. For instance, 
-                household work (which is worldwide predominantly performed by women) such as cleaning and cooking, 
-                or childcare and caring for elderly are all not being paid. Also, be aware that subsistence farmers 
-                who mainly produce for their own consumption and not for the market do not gain income. In this sense, 
-                all those persons who are engaged in any activity to produce for pay or profit are understood as being 
-                employed. In turn, all those persons who are without such an engagement but are available and search 
-                for it are considered as unemployed. The sum of the persons employed and unemployed is called labour 
-                force. Consequently, if you subtract employment from the labour force you get unemployment.</div> 
-                <br>
-                <div style="text-align: justify;">The indicators in chart 1 can be set closer into relation. For instance, if you divide the 
-                working age population by the labour force you get the labour force participation rate. The 
-                same way, the unemployment rate is calculated: Divide the working age population by unemployment. 
-                Both rates are shown in chart 2.</div>""", unsafe_allow_html=True
-        )
-    st.header("")    
+    ### GRAPH AND TEXT 2 ###
+    # Configure columns
+    col1, col2, col3 = st.columns([1,0.05,1])
 
-#### Graph 2
+    with col1: 
 
-with col3:
+        st.header("")
 
-    # Get data for country and for comparison chosen
-    chart2_data = get_filtered_data(selected_country, selected_start_year, selected_end_year, ['Labour force participation rate', 'Unemployment rate'])
-    chart2_data_unemp = get_filtered_data([selected_country]  + selected_peer, selected_start_year, selected_end_year, ['Unemployment rate'])
-    chart2_data_lf = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Labour force participation rate'])
-    
-    #  Graphs
-    tab1, tab2, tab3 = st.tabs([selected_country, "Unemployment Comparison", "Labour Force Comparison"])
+        #### Explanatory text box 1
+        st.markdown("""<div style="text-align: justify;">Next, let us ask who among those persons in working age is paid for work. For instance, 
+                    household work (which is worldwide predominantly performed by women) such as cleaning and cooking, 
+                    or childcare and caring for elderly are all not being paid. Also, be aware that subsistence farmers 
+                    who mainly produce for their own consumption and not for the market do not gain income. In this sense, 
+                    all those persons who are engaged in any activity to produce for pay or profit are understood as being 
+                    employed. In turn, all those persons who are without such an engagement but are available and search 
+                    for it are considered as unemployed. The sum of the persons employed and unemployed is called labour 
+                    force. Consequently, if you subtract employment from the labour force you get unemployment.</div> 
+                    <br>
+                    <div style="text-align: justify;">The indicators in chart 1 can be set closer into relation. For instance, if you divide the 
+                    working age population by the labour force you get the labour force participation rate. The 
+                    same way, the unemployment rate is calculated: Divide the working age population by unemployment. 
+                    Both rates are shown in chart 2.</div>""", unsafe_allow_html=True
+            )
+        st.header("")    
+
+    #### Graph 2
+
+    with col3:
+
+        #  Graphs
+        tab_labels = [selected_country, "Unemployment Comparison", "Labour Force Comparison"]
+        tab = lazy_tabs(tab_labels, key='employ_row2_tabs')
 
-    with tab1:
+        # Tabs without data for the selection are skipped before their data is retrieved (see has_data)
+        if tab == tab_labels[0] and not has_data(availability, tab_selections['chart2']):
+            st.error(NO_DATA_MESSAGE)
+
+        elif tab == tab_labels[0]:
+
+            # Get data
+            chart2_data = get_tab_data('employ', tab_selections, 'chart2', DATA_VERSION)
       
-        # Configure plot
-        fig = px.line(chart2_data,
-                        x="Year", 
-                        y="Value", 
-                        color='Indicator',
-                        #title ="Chart 2 - Unemployment and labour force participation rate",
-                        hover_name="Value",
-                        labels={
-                        "Value": "Percentage",
-                    }
-                        )
-        
-        # Fix y-axis to always show (100%)
-        fig.update_yaxes(range=[0, 100])
-
-        # Move legend 
-        fig.update_layout(legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.4,
-            xanchor="left",
-            x=-0.05
-            ))
+            # Get figure
+            fig = get_figure('employ_chart2', tab_selections['chart2'], DATA_VERSION, build_chart2, chart2_data)
 
-        # Title
-        st.markdown(f"""<div style="text-align: justify;"><b>Chart 2 - Unemployment 
-                    and labour force participation rate in {selected_country}</div></b>""", unsafe_allow_html=True)
+            # Title
+            st.markdown(f"""<div style="text-align: justify;"><b>Chart 2 - Unemployment 
+                        and labour force participation rate in {selected_country}</div></b>""", unsafe_allow_html=True)
 
-        # Display graph
-        st.plotly_chart(fig, use_container_width=True)
+            # Display graph
+            plotly_chart(fig, use_container_width=True)
 
-        # Caption graph
-        st.caption('Data Source: ILO (for more information see data sources tab above)')
+            # Caption graph
+            st.caption('Data Source: ILO (for more information see data sources tab above)')
 
-        # Subtitle
-        #st.markdown(f"""<div style="text-align: justify;"><em>Chart 2 - Unemployment and labour force 
-         #           participation rate in {selected_country} (Data Source: ILOSTAT)</div></em>""", unsafe_allow_html=True)
-        st.header("")
+            # Subtitle
+            #st.markdown(f"""<div style="text-align: justify;"><em>Chart 2 - Unemployment and labour force 
+             #           participation rate in {selected_country} (Data Source: ILOSTAT)</div></em>""", unsafe_allow_html=True)
+            st.header("")
 
     
-    with tab2: 
+        elif tab == tab_labels[1]:
 
-        # If the peer selection is empty show error message
-        if not selected_peer: 
-            st.error("Please choose one or several comparison countries.")
-        
-        # if peer selection chosen display graph
-        else:
+            # If the peer selection is empty show error message
+            if not selected_peer: 
+                st.error("Please choose one or several comparison countries.")
 
-            # Configure plot
-            fig = px.line(chart2_data_unemp,
-                            x="Year", 
-                            y="Value", 
-                            color='Country',
-                            #title="Chart 2.1 - Comparison of unemployment rates across the selected countries",
-                            hover_name="Value",
-                            labels={
-                            "Value": "Percentage"
-                        }
-                            )
-            
-            # Move legend 
-            fig.update_layout(legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.4,
-            xanchor="left",
-            x=-0.05
-            ))
-            
-            # Fix y-axis to zero and add margin
-            fig.update_yaxes(range = [0, ((max(chart2_data_unemp.Value))*1.2)])
+            # Skipped before the data is retrieved if there is no data for the selection (see has_data)
+            elif not has_data(availability, tab_selections['chart2_unemp']):
+                st.error(NO_DATA_MESSAGE)
 
-            # Title
-            st.markdown(f"""<div style="text-align: justify;"><b>Chart 2.1 - Comparison 
-                        of unemployment rates across the selected countries</div></b>""", unsafe_allow_html=True)
+            # if peer selection chosen display graph
+            else:
 
-            # Display graph
-            st.plotly_chart(fig, use_container_width=True)
+                # Get data and figure
+                chart2_data_unemp = get_tab_data('employ', tab_selections, 'chart2_unemp', DATA_VERSION)
+                fig = get_figure('employ_chart2_unemp', tab_selections['chart2_unemp'], DATA_VERSION,
+                                 build_chart2_comparison, chart2_data_unemp)
+            
+                # Title
+                st.markdown(f"""<div style="text-align: justify;"><b>Chart 2.1 - Comparison 
+                            of unemployment rates across the selected countries</div></b>""", unsafe_allow_html=True)
 
-             # Caption graph
-            st.caption('Data Source: ILO (for more information see data sources tab above)')
+                # Display graph
+                plotly_chart(fig, use_container_width=True)
+
+                 # Caption graph
+                st.caption('Data Source: ILO (for more information see data sources tab above)')
             
-            st.header("")
+                st.header("")
     
-    with tab3: 
+        elif tab == tab_labels[2]:
         
-        # If the peer selection is empty show error message
-        if not selected_peer: 
-            st.error("Please choose one or several countries in the sidebar.")
-        
-        # if peer selection chosen display graph
-        else:
+            # If the peer selection is empty show error message
+            if not selected_peer: 
+                st.error("Please choose one or several countries in the sidebar.")
+
+            # Skipped before the data is retrieved if there is no data for the selection (see has_data)
+            elif not has_data(availability, tab_selections['chart2_lf']):
+                st.error(NO_DATA_MESSAGE)
+
+            # if peer selection chosen display graph
+            else:
           
-            # Configure plot
-            fig = px.line(chart2_data_lf,
-                            x="Year", 
-                            y="Value", 
-                            color='Country',
-                            #title="Chart 2.2 - Comparison of labour force rates across the selected countries",
-                            hover_name="Value",
-                            labels={
-                            "Value": "Percentage"
-                        }
-                            )
+                # Get data and figure
+                chart2_data_lf = get_tab_data('employ', tab_selections, 'chart2_lf', DATA_VERSION)
+                fig = get_figure('employ_chart2_lf', tab_selections['chart2_lf'], DATA_VERSION,
+                                 build_chart2_comparison, chart2_data_lf)
             
-            # Move legend 
-            fig.update_layout(legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.4,
-            xanchor="left",
-            x=-0.05
-            ))
-            
-            # Fix y-axis to zero and add margin
-            fig.update_yaxes(range = [0, ((max(chart2_data_lf.Value))*1.2)])
-            
-            # Title
-            st.markdown(f"""<div style="text-align: justify;"><b>Chart 2.2 - 
-                        Comparison of labour force rates across the selected countries</div></b>""", unsafe_allow_html=True)
+                # Title
+                st.markdown(f"""<div style="text-align: justify;"><b>Chart 2.2 - 
+                            Comparison of labour force rates across the selected countries</div></b>""", unsafe_allow_html=True)
 
 
-            # Display graph
-            st.plotly_chart(fig, use_container_width=True)
+                # Display graph
+                plotly_chart(fig, use_container_width=True)
 
     
-             # Caption graph
-            st.caption('Data Source: ILO (for more information see data sources tab above)')
+                 # Caption graph
+                st.caption('Data Source: ILO (for more information see data sources tab above)')
             
-            st.header("")
+                st.header("")
 
+show_row2(selected_country, selected_peer, tab_selections)
 
+############################# ROW 3 ###################################
 
-############################# ROW 2 ###################################
 
+@st.fragment
+def show_row3(selected_country, selected_end_year):
 
-### TABLE AND TEXT 2 ###
+    """
+    Row 3 - Women's share (Table 1).
 
-st.subheader(f"What's the women's share in {selected_country}?")
+    """
 
-# Configure columns
-col1, col2, col3 = st.columns([0.9,0.05,1])
+    ### TABLE AND TEXT 2 ###
 
-#with col1: 
+    st.subheader(f"What's the women's share in {selected_country}?")
+
+    # Configure columns
+    col1, col2, col3 = st.columns([0.9,0.05,1])
+
+    #with col1: 
  
-st.markdown(f"""<div style="text-align: justify;">Additionally, the indicators can be broken down by sex.  
-            Table 1 shows for a given year for all indicators the total 
-            number of persons, the number of women within each group, and 
-            lastly their relative share. The table below shows the data for 
-            <span style="color: red;">{selected_country}</span>
-            for the year <span style="color: red;">{selected_end_year}</span>. </div>
-            """, unsafe_allow_html=True
-)
+    st.markdown(f"""<div style="text-align: justify;">Additionally, the indicators can be broken down by sex.  
+                Table 1 shows for a given year for all indicators the total 
+                number of persons, the number of women within each group, and 
+                lastly their relative share. The table below shows the data for 
+                <span style="color: red;">{selected_country}</span>
+                for the year <span style="color: red;">{selected_end_year}</span>. </div>
+                """, unsafe_allow_html=True
+    )
     
-st.header("")    
+    st.header("")    
 
-    #### (3) Table 1
+        #### (3) Table 1
 
-table1_indicators = ['Population', 
-                    'Population in working age',
-                    'Labour force',
-                    'Employment',
-                    'Youth unemployment', 
-                    'Population, female share', 
-                    'Population in working age, female share',
-                    'Labour force, female share',
-                    'Employment, female share',
-                    'Youth unemployment, female share']
+    # Retrieve the precomputed table for the country and year (only if all its indicators are
+    # available in the year, see has_data)
+    table1 = None
+    if has_data(availability, (selected_country, selected_end_year, selected_end_year, TABLE1_INDICATORS), how='all'):
+        with profile_section('build_table', 'table1'):
+            table1 = get_table1(df_table1, selected_country, selected_end_year)
 
-table1_data = get_filtered_data(selected_country, selected_end_year, selected_end_year, table1_indicators)
+    # Check whether the data for the given year is available
+    if table1 is not None: 
 
-# Try whether the data for the given year is available
-try: 
-    # Create the table 
-    indicator_values = {}
-    for ind in table1_indicators:
+        # Title
+        st.markdown(f"""<div style="text-align: justify;"><b>Table 1 - Women's share</div></b>""", unsafe_allow_html=True)
+        st.header("")
+    
+        st.table(table1)
 
-        # Retrieve the values
-        indicator_values[ind] = round(table1_data[table1_data['Indicator'] == ind].values[0][5])
+        st.caption("Data Sources: World Bank, ILO (for more information see data sources tab above)")
 
-    # Create table
-    table1_dict = {
-        'Indicator': ['Population', 'Working age population', 'Labour force', 'Employment', 'Youth unemployment'],
-        'Total': [indicator_values[ind] for ind in table1_indicators[:5]],
-        'Women': [indicator_values[ind] for ind in table1_indicators[5:]]}
+    else: 
+        st.error("Data for this year is not available. Try adjusting the selection on the side." +
+                 get_latest_year_hint(selected_country, get_latest_year(availability, [selected_country], TABLE1_INDICATORS)))
 
-    table1 = pd.DataFrame(table1_dict).reset_index(drop=True)
-    table1.set_index('Indicator', inplace=True)
+    #st.table(chart1_data)
+    # Create distance
+    st.header("")
 
-    # Add women's share column and round to two digits
-    table1["Women's share (%)"] = round(table1['Women'] / table1['Total'].apply(lambda x: round(x / 100)),2)
-    table1["Women's share (%)"] = table1["Women's share (%)"].apply(lambda x: format(x,".2f" ))
+show_row3(selected_country, selected_table_year)
 
-    #add commas 
-    table1['Total'] = table1["Total"].apply(lambda x: format (x, ',d'))
-    table1['Women'] = table1["Women"].apply(lambda x: format (x, ',d'))
+############################# ROW 4 ###################################
 
-    # Round to millions 
-    #table1["Total (Million)"] = table1["Total (Million)"].apply(lambda x: x/1000000).apply(lambda x: round(x,2)).apply(lambda x: format(x,".2f" ))
-    #table1["Women (Million)"] = table1["Women (Million)"].apply(lambda x: x/1000000).apply(lambda x: round(x,2)).apply(lambda x: format(x,".2f" ))
+@st.fragment
+def show_row4(selected_country, selected_end_year, table2):
 
-    # Display table
+    """
+    Row 4 - Employment share across the sub sectors (Table 2).
 
-    # Title
-    st.markdown(f"""<div style="text-align: justify;"><b>Table 1 - Women's share</div></b>""", unsafe_allow_html=True)
-    st.header("")
-    
-    st.table(table1)
+    """
 
-    st.caption("Data Sources: World Bank, ILO (for more information see data sources tab above)")
+    ### TABLE AND TEXT 2 ###
+
+    #with col1: 
+    st.subheader("Where do people work?")
+
+    st.markdown(f"""<div style="text-align: justify;">Let us take a closer look at those 
+                persons who are employed: In which sectors do they work? Table 2 provides 
+                a listing for the sectors Agriculture, Forestry and Fishing (primary sector), 
+                Industry (secondary sector), and services (tertiary sector). The two latter 
+                sectors are again broken down by further sub-sectors following the 
+                <a href="https://unstats.un.org/unsd/publication/seriesm/seriesm_4rev4e.pdf">2008 
+                International Standard Industrial Classification (ISIC, revision 4)</a>. 
+                For comparison, the table also provides information what share of GDP is 
+                created in which sector. Note that due to statistical reasons these GDP shares 
+                often do not sum up to 100%.</div>
+                <br>
+                <div style="text-align: justify;">When comparing the sectoral GDP shares and 
+                sectoral employment shares, for low-income countries you will often observe 
+                that while a large share of employment takes place in the primary sector only 
+                a relatively small amount of value is produced in that sector. This is one 
+                explanation why in low income countries there is such high income inequality: 
+                A large share of the labour force is working in a sector where little value and 
+                thus little income is generated – while, comparing to high-income countries, a 
+                relatively small proportion of the labour force is working in the tertiary sector 
+                where usually considerably more value is created. The table below shows the data for 
+                <span style="color: red;">{selected_country}</span>
+                for the year <span style="color: red;">{selected_end_year}</span>.</div>
+                """, unsafe_allow_html=True
+    )
 
-except ValueError: 
-    st.error("Data for this year is not available. Try adjusting the selection on the side.")
+    st.header("")
 
-#st.table(chart1_data)
-# Create distance
-st.header("")
+    # Check if data available
+    if table2 is not None: 
 
+        # Title 
+        st.markdown(f"""<div style="text-align: justify;"><b>Table 2 - Employment share across different subsectors</div></b>""", unsafe_allow_html=True)
+        st.header("")
 
-############################# ROW 4 ###################################
+        # Display table (round to two digits)
+        st.table(table2.set_index("Sub Sector").style.format({'Employment Share (%)': '{:.2f}'}))
 
-### TABLE AND TEXT 2 ###
-
-#with col1: 
-st.subheader("Where do people work?")
-
-st.markdown(f"""<div style="text-align: justify;">Let us take a closer look at those 
-            persons who are employed: In which sectors do they work? Table 2 provides 
-            a listing for the sectors Agriculture, Forestry and Fishing (primary sector), 
-            Industry (secondary sector), and services (tertiary sector). The two latter 
-            sectors are again broken down by further sub-sectors following the 
-            <a href="https://unstats.un.org/unsd/publication/seriesm/seriesm_4rev4e.pdf">2008 
-            International Standard Industrial Classification (ISIC, revision 4)</a>. 
-            For comparison, the table also provides information what share of GDP is 
-            created in which sector. Note that due to statistical reasons these GDP shares 
-            often do not sum up to 100%.</div>
-            <br>
-            <div style="text-align: justify;">When comparing the sectoral GDP shares and 
-            sectoral employment shares, for low-income countries you will often observe 
-            that while a large share of employment takes place in the primary sector only 
-            a relatively small amount of value is produced in that sector. This is one 
-            explanation why in low income countries there is such high income inequality: 
-            A large share of the labour force is working in a sector where little value and 
-            thus little income is generated – while, comparing to high-income countries, a 
-            relatively small proportion of the labour force is working in the tertiary sector 
-            where usually considerably more value is created. The table below shows the data for 
-            <span style="color: red;">{selected_country}</span>
-            for the year <span style="color: red;">{selected_end_year}</span>.</div>
-            """, unsafe_allow_html=True
-)
-
-st.header("")    
-
-
-#### Table 2
-
-table2_featureMap = {'Employment Agriculture; forestry and fishing': 'Primary',
-                    'Employment Mining and quarrying': 'Primary',
-                    'Employment Manufacturing': 'Secondary',
-                    'Employment Electricity; gas; steam and air conditioning supply': 'Secondary',
-                    'Employment Water supply; sewerage, waste management and remediation activities': 'Secondary',
-                    'Employment Construction': 'Secondary',
-                    'Employment Wholesale and retail trade; repair of motor vehicles and motorcycles': 'Tertiary', 
-                    'Employment Transportation and storage': 'Tertiary',
-                    'Employment Accomodation and food service activities': 'Tertiary',
-                    'Employment Information and communication': 'Tertiary',
-                    'Employment Financial and insurance activities': 'Tertiary',
-                    'Employment Real estate activities': 'Tertiary',
-                    'Employment Professional, scientific and technical activities': 'Tertiary',
-                    'Employment Administrative and support service activities': 'Tertiary',
-                    'Employment Public administration and defence; compulsory social security': 'Tertiary',
-                    'Employment Education': 'Tertiary',
-                    'Employment Human health and social work activities': 'Tertiary',
-                    'Employment Arts, entertainment and recreation': 'Tertiary',
-                    'Employment Other service activities': 'Tertiary',
-                    'Employment Activities of households as employers; undifferentiated goods- and services-producing activities of households for own use': 'Secondary',
-                    'Employment Activities of extraterritorial organizations and bodies': 'Tertiary',
-                    'Employment Not elsewhere classified': 'Other'
-                    }                     
-
-table2_data = get_filtered_data(selected_country, selected_end_year, selected_end_year, table2_featureMap.keys())
-
-#  Retrieve employment value for the year
-employment_in_year = get_filtered_data(selected_country, selected_end_year, selected_end_year, ["Employment"]).values[0][5]
-
-# Create the table 
-indicator_values_table2 = {}
-
-for ind in table2_featureMap.keys():
-
-    # Retrieve the value 
-    employ_value = table2_data[table2_data['Indicator'] == ind].values[0][5]
-
-    # Assign value
-    #indicator_values_table2[ind] = format(round((employ_value / employment_in_year) *100,2),".2f")
-    indicator_values_table2[ind] = round((employ_value / employment_in_year) *100,2)
-
-table2_dict = {
-    'Sub Sector': indicator_values_table2.keys(),
-    'Employment Share (%)': indicator_values_table2.values()}
-
-table2 = pd.DataFrame(table2_dict).reset_index(drop=True)
-
-# Add sector column
-table2["Sector"] = table2['Sub Sector'].map(table2_featureMap)
-
-# Take out employment 
-table2["Sub Sector"] = table2["Sub Sector"].apply(lambda x: x[11:])
-
-# Reorder columns
-table2 = table2[['Sector', 'Sub Sector', 'Employment Share (%)']]
-
-# Drop old other column and add new other so that percentages add up to 100% 
-table2 = table2[table2['Sub Sector'] != 'Other service activities']
-sum_columns = table2['Employment Share (%)'].apply(lambda x: float(x)).sum()
-missing_value = 100 - sum_columns
-missing_value = round(missing_value,2)
-new_row = pd.DataFrame({'Sector': ['Other'],
-                         'Sub Sector': ['Other'],
-                         'Employment Share (%)': [missing_value]})
-# Append the new row to the DataFrame
-table2 = table2.append(new_row, ignore_index=True)
-
-# Combine both "Other" columns 
-rows_to_combine = table2[(table2['Sector'] == 'Other') | (table2['Sub Sector'] == 'Not elsewhere classified')]
-combined_value = rows_to_combine['Employment Share (%)'].sum()
-new_row = pd.DataFrame({'Employment Share (%)': [combined_value], 'Sub Sector': 'Other', 'Sector': 'Other'})
-table2 = table2.append(new_row, ignore_index=True)
-table2 = table2.drop(rows_to_combine.index)
-
-
-# Sort the values
-table2['Employment Share (%)'] = table2['Employment Share (%)'].astype(float)
-order = ['Primary', 'Secondary', 'Tertiary', 'Other']
-table2['Sector'] = pd.Categorical(table2['Sector'], categories=order, ordered=True)
-table2 = table2.sort_values('Sector')
-table2 = table2.sort_values(by=['Sector', 'Employment Share (%)'], ascending=[True, False])
-table2 = table2.reset_index(drop=True)
-table2['Employment Share (%)'] = [f'{value:.2f}' for value in table2['Employment Share (%)']]
-
-
-# Check if data available
-if sum(table2['Employment Share (%)'] == 'nan') < (len(table2['Employment Share (%)']) /2): 
-
-    # Title 
-    st.markdown(f"""<div style="text-align: justify;"><b>Table 2 - Employment share across different subsectors</div></b>""", unsafe_allow_html=True)
-    st.header("")
+        # Subtitle
+        #st.markdown(f"""<div style="text-align: justify;"><em>Table 2 - Employment share across different subsectors (Data Source: ILOSTAT)</div></em>""", unsafe_allow_html=True)
+        #st.header("")
 
-    # Display table
-    st.table(table2.set_index("Sub Sector"))
+        # Caption graph
+        st.caption('Data Source: ILO (for more information see data sources tab above)')
+        st.header("")
 
-    # Subtitle
-    #st.markdown(f"""<div style="text-align: justify;"><em>Table 2 - Employment share across different subsectors (Data Source: ILOSTAT)</div></em>""", unsafe_allow_html=True)
-    #st.header("")
+     ###### TEXT PIE AND BAR
 
-    # Caption graph
-    st.caption('Data Source: ILO (for more information see data sources tab above)')
-    st.header("")
+        # Configure columns
+        col1, col2, col3 = st.columns([1,0.05,1])
 
- ###### TEXT PIE AND BAR
+        # Pie Chart
+        with col1:
 
-    # Configure columns
-    col1, col2, col3 = st.columns([1,0.05,1])
+            # Explanatory text
+            st.markdown(f"""<div style="text-align: justify;">As a graphical representation of the table above, 
+                        the pie chart below provides a visual overview of employment shares across the different 
+                        subsectors. To see the aggregated shares of employment for the primary, secondary and 
+                        tertiary sector, please click on the toggle below. A remaining percentage share of employment
+                        has not been classified. This can be seen in the graph under the category "Other".</div>""", unsafe_allow_html=True)
+        
+        with col3: 
 
-    # Pie Chart
-    with col1:
+            # Explanatory text
+            st.markdown(f"""<div style="text-align: justify;"> To get a better picture of the productivity in the different sectors, 
+                        one can see a comparison between Employment Share (%) and GDP Share (%) in the bar chart below. The chart also 
+                        gives an indication of the labour- and capital-intensivity of the three different sectors.</div>""", unsafe_allow_html=True)
 
-        # Explanatory text
-        st.markdown(f"""<div style="text-align: justify;">As a graphical representation of the table above, 
-                    the pie chart below provides a visual overview of employment shares across the different 
-                    subsectors. To see the aggregated shares of employment for the primary, secondary and 
-                    tertiary sector, please click on the toggle below. A remaining percentage share of employment
-                    has not been classified. This can be seen in the graph under the category "Other".</div>""", unsafe_allow_html=True)
-        
-    with col3: 
+    else: 
+        st.error("Data for this year is not available. Try adjusting the selection on the side." +
+                 get_latest_year_hint(selected_country, get_latest_table_year(df_table2, selected_country)))
 
-        # Explanatory text
-        st.markdown(f"""<div style="text-align: justify;"> To get a better picture of the productivity in the different sectors, 
-                    one can see a comparison between Employment Share (%) and GDP Share (%) in the bar chart below. The chart also 
-                    gives an indication of the labour- and capital-intensivity of the three different sectors.</div>""", unsafe_allow_html=True)
-        
 
 ### PIE AND BAR CHARTS
 
-    # Configure columns
-    col1, col2, col3 = st.columns([1,0.05,1])
+@st.fragment
+def show_chart3(selected_country, selected_end_year, table2):
 
-    with col1:
+    """
+    Chart 3 - Pie chart of the employment shares (the toggle only reruns this chart).
+
+    """
         
-        # Title
-        st.subheader("")
-        st.markdown(f"""<div style="text-align: justify;"><b>Chart 3 - Employment shares 
-                    for {selected_country} in {selected_end_year}</div></b>""", unsafe_allow_html=True)
+    # Title
+    st.subheader("")
+    st.markdown(f"""<div style="text-align: justify;"><b>Chart 3 - Employment shares 
+                for {selected_country} in {selected_end_year}</div></b>""", unsafe_allow_html=True)
         
-        st.subheader("")
+    st.subheader("")
 
-        # Toggle
-        on = st.toggle('Show aggregates')
+    # Toggle
+    on = st.toggle('Show aggregates')
 
-        # Get disaggregated data
-        table2['Employment Share (%)'] = table2['Employment Share (%)'].astype(float)
-        table2.loc[table2['Employment Share (%)'] < 4, 'Sub Sector'] = 'Other Sectors' # Represent only large countries
-
-        # Get aggregated data
-        table2_agg = table2
-        table2_agg['Employment Share (%)'] = table2_agg['Employment Share (%)'].astype(float)
-        table2_agg = table2_agg.groupby("Sector")["Employment Share (%)"].sum()
-        table2_agg = table2_agg.reset_index()
-
-        # If the toggle is activated 
-        if on:
+    # If the toggle is activated 
+    if on:
           
-            # Display aggregate pie chart 
-            fig_2 = px.pie(table2_agg,
-                            values="Employment Share (%)",
-                            #title=f"Aggregated employment shares for {selected_country} in {selected_end_year}",
-                            color = ['Primary', 'Secondary', 'Tertiary', 'Other'],
-                            color_discrete_map={'Primary': '#ef3c2d',
-                                                'Secondary': '#3a0ca3',
-                                                'Tertiary': '#4895ef',
-                                                'Other': 'grey'},
-                            names="Sector")
-                        
-            fig_2.update_layout(margin=dict(t=0, b=0, l=0, r=0))
-            fig_2.update(layout_showlegend=False)
-            fig_2.update_traces(textposition='inside', textinfo='percent+label')
-
-                    
-            # Display graph
-            st.plotly_chart(fig_2, use_container_width=True)
+        # Get aggregate pie chart 
+        fig_2 = get_figure('employ_chart3_agg', (selected_country, selected_end_year), DATA_VERSION, build_chart3_agg, table2,
+                           year_axis=False)
 
-            # Subtitle
-            st.caption("Data Source: ILO (for more information see data sources tab above)")    
+        # Display graph
+        plotly_chart(fig_2, use_container_width=True)
+
+        # Subtitle
+        st.caption("Data Source: ILO (for more information see data sources tab above)")    
         
-        # If toggle not activated
-        else:
+    # If toggle not activated
+    else:
 
-            # Configure detailed pie chart
-            fig_2 = px.pie(table2,
-                        values="Employment Share (%)",
-                        names="Sub Sector",
-                        color_discrete_map={
-                            'Agriculture; forestry and fishing': '#033270',
-                            'Mining and quarrying': '#1368aa',
-                            'Manufacturing': '#4091c9',
-                            'Electricity; gas; steam and air conditioning supply': '#f29479',
-                            'Water supply; sewerage, waste management and remediation activities': '#fedfd4',
-                            'Construction': '#9dcee2',
-                            'Wholesale and retail trade; repair of motor vehicles and motorcycles': '#033270', 
-                            'Transportation and storage': '#ef3c2d',
-                            'Accomodation and food service activities': '#cb1b16',
-                            'Information and communication': '#65010c',
-                            'Financial and insurance activities': '#e66063',
-                            'Real estate activities': '#e66063',
-                            'Professional, scientific and technical activities': '#ec8385',
-                            'Administrative and support service activities': '#f1a7a9',
-                            'Public administration and defence; compulsory social security': '#e66063',
-                            'Education': '#bbdefb',
-                            'Human health and social work activities': '#90caf6',
-                            'Arts, entertainment and recreation': '#64b5f2',
-                            'Other service activities': '#42a5f5',
-                            'Activities of households as employers; undifferentiated goods- and services-producing activities of households for own use': '#1e88e5',
-                            'Activities of extraterritorial organizations and bodies': '#f26a4f',
-                            'Not elsewhere classified': '#0d47a1',
-                            'Other Sectors': 'd3d3d3'}, 
-                        color = (table2["Sub Sector"]))
+        # Get detailed pie chart
+        fig_2 = get_figure('employ_chart3', (selected_country, selected_end_year), DATA_VERSION, build_chart3, table2,
+                           year_axis=False)
             
-            fig_2.update_layout(margin=dict(t=0, b=0, l=0, r=0))
-            fig_2.update(layout_showlegend=False)
-            fig_2.update_traces(textposition='inside', textinfo='percent+label')
-            
-            # Display graph
-            st.plotly_chart(fig_2, use_container_width=True)
+        # Display graph
+        plotly_chart(fig_2, use_container_width=True)
 
-            # Subtitle
-            #st.subheader("")
-            #st.markdown(f"""<div style="text-align: justify;"><em>Chart 3 - Employment share across different subsectors (Data Source: ILOSTAT)</div></em>""", unsafe_allow_html=True)
-            st.caption("Data Source: ILO (for more information see data sources tab above)")
+        # Subtitle
+        #st.subheader("")
+        #st.markdown(f"""<div style="text-align: justify;"><em>Chart 3 - Employment share across different subsectors (Data Source: ILOSTAT)</div></em>""", unsafe_allow_html=True)
+        st.caption("Data Source: ILO (for more information see data sources tab above)")
 
 
-    ### BAR CHART
+@st.fragment
+def show_chart4(selected_country, selected_end_year, table2, gdp_share_data):
 
-    with col3:
+    """
+    Chart 4 - Employment and GDP shares of the three sectors.
 
-        # Title
-        st.subheader("")
-        st.markdown(f"""<div style="text-align: justify;"><b> Chart 4 - Employment and GDP shares for {selected_country} in {selected_end_year}</div></b>""", unsafe_allow_html=True)
-        st.header("")
-        st.header("")
+    """
 
-        # define data 
-        gdp_share_data = get_filtered_data([selected_country], selected_end_year, selected_end_year, ['GDP Share Agriculture (%)', 'GDP Share Industry (%)', 'GDP Share Services (%)'])
-        bar_data = table2_agg
-        bar_data.insert(2, 'GDP Share (%)', gdp_share_data['Value'])
-        bar_data = bar_data[bar_data['Sector'] != 'Other']        
-        bar_data_long = pd.melt(bar_data, id_vars=["Sector"], var_name="Share Type", value_name="Share")
-
-        # Display bar chart
-        fig = px.bar(bar_data_long,
-                       x="Sector",
-                       y="Share",
-                       #title=f"Employment and GDP Shares for {selected_country} in {selected_end_year}",
-                       color="Share Type",
-                       barmode='group'
-                       )
-                                           
-        fig.update_layout(margin=dict(t=0, b=0, l=0, r=0))
-        #fig.update(layout_showlegend=False)
-
-        # Move legend 
-        fig.update_layout(legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.4,
-        xanchor="left",
-        x=-0.05
-        ))
+    # Title
+    st.subheader("")
+    st.markdown(f"""<div style="text-align: justify;"><b> Chart 4 - Employment and GDP shares for {selected_country} in {selected_end_year}</div></b>""", unsafe_allow_html=True)
+    st.header("")
+    st.header("")
+
+    # Get figure
+    fig = get_figure('employ_chart4', (selected_country, selected_end_year), DATA_VERSION,
+                     build_chart4, (table2, gdp_share_data), year_axis=False)
         
-        # Display graph
-        st.plotly_chart(fig, use_container_width=True)
+    # Display graph
+    plotly_chart(fig, use_container_width=True)
 
-        # Subtitle
-        #st.subheader("")
-        #st.markdown(f"""<div style="text-align: justify;"><em>Chart 4 - Employment vs GDP Share (Data Sources: WDI, ILOSTAT)</div></em>""", unsafe_allow_html=True)
-        st.caption("Data Sources: World Bank, ILO (for more information see data sources tab above)")
-else: 
-    #with col1:
-        st.error("Data for this year is not available. Try adjusting the selection on the side.")
\ No newline at end of file
+    # Subtitle
+    #st.subheader("")
+    #st.markdown(f"""<div style="text-align: justify;"><em>Chart 4 - Employment vs GDP Share (Data Sources: WDI, ILOSTAT)</div></em>""", unsafe_allow_html=True)
+    st.caption("Data Sources: World Bank, ILO (for more information see data sources tab above)")
+
+
+# Retrieve the precomputed table for the country and year (only if the employment is available
+# in the year, the shares of the sub sectors are relative to it, see has_data)
+table2 = None
+if has_data(availability, (selected_country, selected_table_year, selected_table_year, ['Employment'])):
+    with profile_section('build_table', 'table2'):
+        table2 = get_table2(df_table2, selected_country, selected_table_year)
+
+show_row4(selected_country, selected_table_year, table2)
+
+# Display the pie and bar charts if data available
+if table2 is not None:
+
+    # Configure columns
+    col1, col2, col3 = st.columns([1,0.05,1])
+
+    with col1:
+        show_chart3(selected_country, selected_table_year, table2)
+
+    with col3:
+        show_chart4(selected_country, selected_table_year, table2, page_data['gdp_share'])
+
+############################# ROW 5 ###################################
+
+# World map and ranking of an indicator for all countries (see show_cross_section)
+show_cross_section('employ', DATA_VERSION, df_indicators, selected_country)
+
+# Debug panel with the profile of the run (only if enabled)
+show_profile()
@@ -1,6 +1,13 @@
 import pandas as pd 
 from api_functions.wb_data import get_wb_data
 from api_functions.ilo_data import get_ilo_data
+from app_functions.employ_tables import build_table1, build_table2, TABLE1_FILE, TABLE2_FILE
+from app_functions.downloads import write_downloads
+from app_functions.data_store import write_metadata, get_data_path
+from app_functions.group_stats import build_group_ranks, build_group_bands, GROUP_RANKS_FILE, GROUP_BANDS_FILE
+from app_functions.availability import write_availability, AVAILABILITY_FILE
+from app_functions.aggregates import build_aggregates, AGGREGATE_WEIGHTS, AGGREGATES_FILE
+from app_functions.data_versions import create_version, publish_version, get_version_path
 
 ########################### SPECIFY START AND END YEAR ###############################
 
@@ -101,29 +108,37 @@ ilo_data.loc[conditions, 'Value'] = ilo_data.loc[conditions, 'Value'] * 1000
 # Concat dataframes and append country classifications
 df_employ = pd.concat([wb_data, ilo_data])
 
-# Calculate region values for the indicators and attach to df
-
-# # Region 
-# mean_values = df_employ.groupby(['Region' , 'Indicator', 'Year'])['Value'].mean().reset_index()
-# mean_values = mean_values[~(mean_values['Region'] == 0)]
-# mean_values.rename(columns={'Region': 'Country'}, inplace=True)
-# df_employ = pd.concat([df_employ, mean_values])
-
-
-# # Other
-# selected_cols  = ['Income Group', 'Least Developed Countries (LDC)', 
-#                   'Land Locked Developing Countries (LLDC)', 
-#                   'Small Island Developing States (SIDS)']
-
-# for ele in selected_cols: 
-#     mean_values = df_employ.groupby([ele , 'Indicator', 'Year'])['Value'].mean().reset_index()
-#     mean_values = mean_values[~(mean_values[ele] == 0)]
-#     mean_values[ele] = mean_values[ele].apply(lambda x: ele)
-#     mean_values.rename(columns={ele: 'Country'}, inplace=True)
-#     df_employ = pd.concat([df_employ, mean_values])
-
-# Save as excel file
-df_employ.to_excel('data/employment_data.xlsx', index=False)
+# Save as excel file (in the directory of a new version of the data)
+VERSION = create_version('employ')
+DATA_PATH = get_data_path('employ', VERSION)
+df_employ.to_excel(DATA_PATH, index=False)
+
+# Write the download files (compressed csv and parquet) and the metadata sidecar next to the dataset
+write_downloads(df_employ, DATA_PATH)
+
+# Aggregates of the regions, sub-regions and income groups (sums of the levels, rates weighted
+# with the labour force, the working age population or the GDP), saved next to the dataset
+# and selectable as comparison countries
+df_aggregates = build_aggregates(df_employ, AGGREGATE_WEIGHTS['employ'])
+df_aggregates.to_parquet(get_version_path('employ', VERSION, AGGREGATES_FILE), index=False)
+write_metadata(df_employ, DATA_PATH, aggregates=df_aggregates['Country'].unique())
+
+# Precompute the percentile ranks and quantile bands of the countries within their groups
+# (region, sub-region, income group, LDC/LLDC/SIDS) so the dashboards only have to look them up
+build_group_ranks(df_employ).to_parquet(get_version_path('employ', VERSION, GROUP_RANKS_FILE), index=False)
+build_group_bands(df_employ).to_parquet(get_version_path('employ', VERSION, GROUP_BANDS_FILE), index=False)
+
+# Bit-packed availability matrix (country x indicator x year), so the sections can skip a
+# selection without data before they retrieve it
+write_availability(pd.concat([df_employ, df_aggregates]), get_version_path('employ', VERSION, AVAILABILITY_FILE))
+
+# Precompute Table 1 (women's share) and Table 2 (employment share across sub sectors)
+# for all countries and years so the dashboard only has to look them up
+build_table1(df_employ).to_excel(get_version_path('employ', VERSION, TABLE1_FILE), index=False)
+build_table2(df_employ).to_excel(get_version_path('employ', VERSION, TABLE2_FILE), index=False)
+
+# Publish the version (the dashboards swap to it in the background, see get_data_version)
+publish_version('employ', VERSION)
 
 
 
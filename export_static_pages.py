@@ -0,0 +1,29 @@
+import argparse
+from app_functions.static_pages import DASHBOARDS, export_static_pages
+
+# Static pages of the dashboards (python export_static_pages.py --output static).
+# Renders every dashboard for every country at the default settings (no comparison
+# countries, default years and tabs) to html pages with the plotly charts embedded, so the
+# views of a single country can be served by a plain web server and the streamlit servers
+# only handle the custom selections. Run after the ETL, e.g.
+#   python export_static_pages.py --output static --workers 8 --app-url https://example.org
+
+#-------------------------------------- EXPORT ---------------------------------------------
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Static pages of the dashboards for every country")
+    parser.add_argument('--output', default='static', help="directory of the pages")
+    parser.add_argument('--dashboards', nargs='+', default=list(DASHBOARDS), choices=list(DASHBOARDS))
+    parser.add_argument('--countries', nargs='+', help="only these countries (default: all)")
+    parser.add_argument('--workers', type=int, help="processes of the pool (default: number of cpus)")
+    parser.add_argument('--app-url', help="url of the streamlit app (linked from the pages)")
+    args = parser.parse_args()
+
+    pages, errors, duration = export_static_pages(args.output, args.dashboards, args.countries, args.workers, args.app_url)
+
+    count = sum(len(dashboard_pages) for dashboard_pages in pages.values())
+    print(f"{count} pages in {duration:.1f}s ({count / duration:.2f} pages/s) in {args.output}")
+    for url_path, dashboard_errors in errors.items():
+        for country, error in dashboard_errors.items():
+            print(f"  error {url_path} {country}: {error}")
@@ -1,92 +1,198 @@
+import os
 import streamlit as st 
-import pandas as pd
-import plotly.express as px
+from app_functions.data_store import load_metadata, load_availability, get_data_version, get_page_data, get_tab_data, get_years, get_data_path
+from app_functions.figure_cache import get_figure, apply_layout, select_years
+from app_functions.downloads import get_download_path, load_download, export_selection, DOWNLOAD_FORMATS, EXPORT_FORMATS
+from app_functions.lazy_tabs import lazy_tabs
+from app_functions.availability import has_data, get_coverage_year, NO_DATA_MESSAGE
+from app_functions.cross_section import show_cross_section
+from app_functions.peer_suggestions import set_suggested_peers
+from app_functions.animation import get_animated_figure
+from app_functions.gap_filling import select_gap_filling
+from app_functions.lazy_imports import lazy_import
+from app_functions.profiling import start_profile, plotly_chart, show_profile
+
+# Heavy libraries are only imported on first use, after the sidebar is shown (see lazy_import)
+pd = lazy_import('pandas')
+px = lazy_import('plotly.express')
 #import altair as alt
 
 
 st.set_page_config(layout="wide")
 
-#---------------------------------- LOAD DATA AND PARAMETERS ---------------------------------#
+# Profile of the run (only if enabled, see app_functions/profiling.py)
+start_profile('income')
 
-# Create import function with cache (cache so data is only loaded once)
-@st.cache_data
-def load_data(path):
-    df = pd.read_excel(path, engine='openpyxl')
-    return df
+#---------------------------------- LOAD DATA AND PARAMETERS ---------------------------------#
 
-# Load data 
-df_income = load_data("data/income_data.xlsx")
+# Load the metadata of the data (written by the ETL next to the dataset, so the sidebar
+# is shown before the dataset itself is loaded with the first selections of the page)
+# The whole run uses the version of the data that is served when it starts (see get_data_version)
+DATA_VERSION = get_data_version('income')
+DATA_PATH = get_data_path('income', DATA_VERSION)
+metadata = load_metadata('income', DATA_VERSION)
 
 # Get a country, region and indicator list
-df_countries = df_income['Country'].unique().tolist()
-df_indicators = df_income['Indicator'].unique().tolist()
-df_regions = df_income['Region'].unique().tolist()
-df_subregion = df_income['Sub-region'].unique().tolist()
+df_countries = list(metadata['countries'])
+df_indicators = list(metadata['indicators'])
+df_regions = list(metadata['regions'])
+df_subregion = list(metadata['subregions'])
 df_sub_region = df_regions + df_subregion
 
 
-# Turn years into int (str necessary first because Streamlit)
-df_income['Year'] = df_income['Year'].astype(str)
-df_income['Year'] = df_income['Year'].astype(int)
-
 #------------------------------ Functions  ------------------------------------#
 
-# Data Selection 
+# Charts (only built if the figure is not in the figure cache yet)
+def build_chart1(chart1_data):
+
+    """
+    Chart 1 - Labour income share estimates.
+
+    """
+
+    ### Group data by year
+    chart1_data = chart1_data.groupby([chart1_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
+
+    #Configure plot
+    fig = px.line(chart1_data,
+                    x="Year", 
+                    y="Value",   
+                    color='Country',
+                    hover_name="Country",
+                    title= "Chart 1 - Labour income share estimates as percent of GDP",
+                    labels={
+                        "Value": "Percentage"
+                    },
+                    )
+
+    # Legend and y-axis fixed to 100%
+    return apply_layout(fig, y_range=[0, 100])
 
-# Data Selection 
 
-def get_filtered_data(country_selec, start_year_selec, end_year_selec, indicator_selec):
+def build_chart2(chart2_data):
 
     """
-    Function takes the user selection of the dashboard as an input and retrieves the
-    corresponding data from the dataset. The output is a filtered dataframe. 
+    Chart 2.1 - GDP per capita and GNI per capita.
 
     """
 
-    # Turn country selection into list if not list 
-    if isinstance(country_selec, str):
-        country_selec = [country_selec]
+    ### Group data by year
+    chart2_data = chart2_data.groupby([chart2_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
+
+    # Configure plot
+    fig = px.line(chart2_data,
+                    x="Year", 
+                    y="Value",   
+                    color='Indicator',
+                    title='Chart 2.1 – GDP per capita and GNI per capita',
+                    labels={'Value': '2017 international $'},
+                    hover_name="Country",
+                    )
+
+    # Legend
+    return apply_layout(fig)
 
-    # Create a dataframe with all years and indicators first
-    ## This is necessary to add the missing years with "None" values
-    df_empty = pd.DataFrame([(year, indicator, country) 
-                            for year in range(start_year_selec, end_year_selec+1)
-                            for indicator in indicator_selec
-                            for country in country_selec],
-                            columns=['Year', 'Indicator', 'Country'])
 
-    
-    # Retrieve the selected data from df
-    df_fltr = df_income[(df_income['Country'].isin(country_selec)) & 
-                       (df_income['Year'] >= start_year_selec) & 
-                       (df_income['Indicator'].isin(indicator_selec)) &
-                       (df_income['Year'] <= end_year_selec)]
-    
-    ## Merge 
-    df_merged = pd.merge(df_empty, df_fltr, on=['Year', 'Indicator', 'Country'], how='left')
+def build_chart2_comparison(chart2_data_comp):
 
-    ## Fill other columns 
-    df_merged['Indicator Code'] = df_merged.groupby('Indicator')['Indicator Code'].apply(lambda x: x.fillna(method='ffill').fillna(method='bfill'))
+    """
+    Chart 2.2 and 2.3 - Comparison across the selected countries. Takes the data and the
+    title of the chart as an input.
 
-    for col in ['Country Code', 'Region', 'Sub-region', 'Income Group', 'Least Developed Countries (LDC)', 'Land Locked Developing Countries (LLDC)', 'Small Island Developing States (SIDS)']:
-        df_merged[col] = df_merged.groupby('Country')[col].apply(lambda x: x.fillna(method='ffill').fillna(method='bfill'))
+    """
 
-    # Turn year column into datetime format
+    chart2_data_comp, title = chart2_data_comp
 
-    return df_merged
+    # Configure plot
+    fig = px.line(chart2_data_comp,
+                    x="Year", 
+                    y="Value",   
+                    color='Country',
+                    title=title,
+                    labels={'Value': '2017 international $'},
+                    hover_name="Country",
+                    )
 
-# Year Selection 
-def get_years(country_input): 
+    # Legend
+    return apply_layout(fig)
+
+
+def build_chart3(chart3_data):
 
     """
-    Takes a country as an input and retrieves the corresponding minimum and maximum year
-    available. This can be used to adjust the year slider. 
+    Chart 3 - Gini Index.
 
     """
-    start_year_country = int(df_income[df_income['Country'] == country_input]['Year'].min())
-    end_year_country = int(df_income[df_income['Country'] == country_input]['Year'].max())
 
-    return start_year_country, end_year_country
+    ### Group data by year
+    chart3_data = chart3_data.groupby(['Indicator'],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,['Year'])
+
+    # Configure plot
+    fig = px.line(chart3_data,
+                  x='Year', 
+                  y='Value',
+                  color='Country',
+                  title='Chart 3 – Gini Index',
+                  labels={'Value': 'Index Score'},# Update y-axis label
+                  hover_name='Country'
+                  )
+
+    # Legend and y-axis fixed to 100
+    return apply_layout(fig, y_range=[0, 100])
+
+
+def build_chart4(chart4_data):
+
+    """
+    Chart 4 - Income shares of GNI.
+
+    """
+
+    ### Group data by year
+    chart4_data = chart4_data.groupby([chart4_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
+
+    # Configure plot
+    fig = px.bar(chart4_data,
+                    x="Year", 
+                    y="Value",
+                    color='Indicator',
+                    facet_col='Country',
+                    title='Chart 4 – Income shares of GNI',
+                    facet_col_wrap=2,
+                    hover_name="Country",
+                    labels={
+                        'Value':'Percentage'
+                    }
+                    )
+
+    # Legend
+    return apply_layout(fig, height=600)
+
+
+def build_chart5(chart5_data):
+
+    """
+    Chart 5 - Share of population that lives with less than 2.15$ per person a day.
+
+    """
+
+    ### Group data by year
+    chart5_data = chart5_data.groupby([chart5_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
+
+    # Configure plot
+    fig = px.line(chart5_data,
+                    x="Year", 
+                    y="Value",   
+                    color='Country',
+                    title='Chart 5 – Share of population that lives with less than 2.15$ per person a day',
+                    hover_name="Country",
+                    labels={
+                        'Value':'Percentage'
+                    }
+                    )
+
+    # Legend and y-axis fixed to 100%
+    return apply_layout(fig, y_range=[0, 100])
 
 #---------------------------------------- SIDEBAR ---------------------------------
 
@@ -114,37 +220,36 @@ st.sidebar.caption("""If you want to compare the values of the chosen country
 # REGION INPUT WIDGET
 selected_peer = st.sidebar.multiselect(
     "Choose comparison countries",
-    df_countries
+    df_countries,
+    key='income_peers'
     )
 
+# Suggestion of the countries most similar to the chosen country (see suggest_peers)
+st.sidebar.button("Suggest similar countries", on_click=set_suggested_peers,
+                  args=('income', DATA_VERSION, selected_country, 'income_peers'))
+
 # START AND END YEAR SLIDER 
 
 # Update based on data availability for chosen country 
-START_YEAR, END_YEAR = get_years(selected_country)
+START_YEAR, END_YEAR = get_years(metadata, selected_country)
 
-# Widget
-selected_years = st.sidebar.slider(
-     "Select the range",
-     START_YEAR, END_YEAR, (START_YEAR,END_YEAR-1),
-    )
+# Availability of the data (bit-packed matrix written by the ETL, see app_functions/availability.py):
+# the sections test it before they retrieve their data and the slider shows the latest year with
+# data for all indicators
+availability = load_availability('income', DATA_VERSION)
+
+# Widget (or all years with the range sliders of the charts, see select_years)
+selected_years = select_years("Select the range", START_YEAR, END_YEAR,
+                              get_coverage_year(availability, [selected_country], df_indicators))
 selected_start_year = selected_years[0]
 selected_end_year = selected_years[1]
 
-# DOWNLOAD WIDGET 
-
-# Create a csv version of the dataframe (cache so it doesn't rerun)
-@st.cache_data
-def convert_df(df):
-    return df.to_csv().encode('utf-8')
-
-csv = convert_df(df_income)
+# DOWNLOAD WIDGET (filled in once the selections of the page are retrieved, see below)
 
 # Add empty space to create some distance 
 st.sidebar.header("")
 
-st.sidebar.download_button(label="Download full data as csv file",
-                   data=csv, 
-                   file_name='income_data.xlsx')
+download_box = st.sidebar.container()
 
 st.sidebar.header("")
 
@@ -157,6 +262,53 @@ st.sidebar.info("""Please note that this dashboard is a prototype.
                 reliability, or suitability for any specific purpose.""")
 
 
+#---------------------------------------- PAGE SELECTIONS ---------------------------------------
+
+# Declare all selections of the page so they are retrieved with one pass over the dataset
+page_selections = {
+    'chart1': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Labour income share estimates']),
+    'chart3': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Gini index']),
+    'chart4': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Income share held by lowest 20%', 'Income share held by fourth 20%', 'Income share held by third 20%', 'Income share held by second 20%', 'Income share held by highest 20%']),
+    'chart5': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Poverty Share'])
+    }
+
+# Selections of the tabs (only retrieved once their tab is shown, see lazy_tabs)
+tab_selections = {
+    'chart2': (selected_country, selected_start_year, selected_end_year, ['GDP per capita', 'GNI per capita']),
+    'chart2_gdp': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['GDP per capita']),
+    'chart2_gni': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['GNI per capita'])
+    }
+page_data = get_page_data('income', page_selections, DATA_VERSION)
+
+
+#---------------------------------------- DOWNLOAD ---------------------------------------------
+
+with download_box:
+
+    # Full data or only the current selection (country, peers, years and indicators of the page)
+    download_scope = st.radio("Choose the data", ["Full data", "Current selection"])
+
+    # The download files of the full data are written by the ETL next to the dataset and only read from disk
+    if download_scope == "Full data":
+        download_format = st.selectbox("Choose the file format", list(DOWNLOAD_FORMATS))
+        download_path, download_mime = get_download_path(DATA_PATH, download_format)
+        download_data = load_download('income', DATA_VERSION, download_format)
+        download_name = os.path.basename(download_path)
+
+    # The export of the current selection is created from the retrieved data of the page
+    else:
+        download_format = st.selectbox("Choose the file format", list(EXPORT_FORMATS))
+        download_ending, download_mime = EXPORT_FORMATS[download_format]
+        download_data = export_selection({**page_selections, **tab_selections}, DATA_VERSION, download_format,
+                                         get_page_data('income', {**page_selections, **tab_selections}, DATA_VERSION))
+        download_name = os.path.splitext(os.path.basename(DATA_PATH))[0] + f"_{selected_country}{download_ending}"
+
+    st.download_button(label=f"Download {download_scope.lower()}",
+                       data=download_data,
+                       file_name=download_name,
+                       mime=download_mime)
+
+
 #---------------------------------------- MAIN PAGE --------------------------------------------
 
 # Add a title and intro text
@@ -188,384 +340,344 @@ with st.expander("ℹ️ - About the data sources", expanded=False):
         <li>World Bank. “Poverty headcount ratio at $2.15 a day (2017 PPP) (% of population).” World Development Indicators, The World Bank Group, 2022, data.worldbank.org/indicator/SI.POV.DDAY.</li>
         """, unsafe_allow_html=True)
     
+# The rows of the page are fragments (st.fragment): a widget inside a row only reruns that
+# row. Every row takes the inputs it depends on as arguments.
+
 ############################# ROW 1 ###################################
-st.header("")
-st.subheader("Two sources of income: Labour and Capital")
 
-col1, col2, col3 = st.columns([1,0.05,1])
+@st.fragment
+def show_row1(chart1_data, page_selections):
+
+    """
+    Row 1 - Labour and capital income (Chart 1).
+
+    """
 
-with col1:
-    # Create distance 
     st.header("")
-    ### Explanatory text box 1
-    st.markdown("""<div style="text-align: justify;">Considering <a href="https://gdp-dashboard.streamlit.app/">the amount of goods and services produced 
-                every year (GDP)</a>, one might start to ask the questions: <i>Who buys all these products?</i> 
-                <i>And where actually do these people get all the money from?</i> To answer these questions just 
-                think about what the companies are doing with the money they earn by selling newly produced 
-                products: They use it either
-                <ol type="i">
-                <li>to pay a return to their owners or lenders (<i>capital share</i>)</li>
-                <li>to pay wages and salaries (<i>labour share</i>)</li>
-                <li>to pay other production costs.</li></ol>
-                These other costs (iii) are in turn the earnings of supplying companies 
-                which again distribute their earnings in the ways (i)-(iii). However, following the supply chain 
-                to its very end, all earnings sooner or later flow as (i) capital share or (ii) labour share to 
-                <i>households</i>. Graph 1 shows estimates of whether the value of the annual production of a country (GDP) 
-                either flows to owners and lenders (capital share) or to employees (labour share).</div>""", unsafe_allow_html=True
-                )
+    st.subheader("Two sources of income: Labour and Capital")
+
+    col1, col2, col3 = st.columns([1,0.05,1])
+
+    with col1:
+        # Create distance 
+        st.header("")
+        ### Explanatory text box 1
+        st.markdown("""<div style="text-align: justify;">Considering <a href="https://gdp-dashboard.streamlit.app/">the amount of goods and services produced 
+                    every year (GDP)</a>, one might start to ask the questions: <i>Who buys all these products?</i> 
+                    <i>And where actually do these people get all the money from?</i> To answer these questions just 
+                    think about what the companies are doing with the money they earn by selling newly produced 
+                    products: They use it either
+                    <ol type="i">
+                    <li>to pay a return to their owners or lenders (<i>capital share</i>)</li>
+                    <li>to pay wages and salaries (<i>labour share</i>)</li>
+                    <li>to pay other production costs.</li></ol>
+                    These other costs (iii) are in turn the earnings of supplying companies 
+                    which again distribute their earnings in the ways (i)-(iii). However, following the supply chain 
+                    to its very end, all earnings sooner or later flow as (i) capital share or (ii) labour share to 
+                    <i>households</i>. Graph 1 shows estimates of whether the value of the annual production of a country (GDP) 
+                    either flows to owners and lenders (capital share) or to employees (labour share).</div>""", unsafe_allow_html=True
+                    )
     
 
 
- #### Graph 1
+     #### Graph 1
 
-with col3: 
-    # Get data
-    chart1_data = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Labour income share estimates'])
-    ### Group data by year
-    chart1_data = chart1_data.groupby([chart1_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
-    
-    #Configure plot
-    fig = px.line(chart1_data,
-                    x="Year", 
-                    y="Value",   
-                    color='Country',
-                    hover_name="Country",
-                    title= "Chart 1 - Labour income share estimates as percent of GDP",
-                    labels={
-                        "Value": "Percentage"
-                    },
-                    )
-    # Add shading above and below the line
-    #fig.update_traces(fill='tonexty')  # Shading below the line
-    #fig.update_traces(fill='tonexty')  # Shading above the line
-
-    #legend 
-    fig.update_layout(legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.4,
-        xanchor="left",
-        x=-0.05
-        ))
-    
-    # Fix y-axis to zero and add margin
-    fig.update_yaxes(range = [0, 100])
-    
-    # Display graph
-    st.plotly_chart(fig, use_container_width=True)
+    with col3: 
+        # Check if data available (see has_data)
+        if has_data(availability, page_selections['chart1']):
+            # Get figure
+            fig = get_figure('income_chart1', page_selections['chart1'], DATA_VERSION, build_chart1, chart1_data)
 
-    st.markdown("""*Note that for each country, the capital income share corresponds with the space above each country line, 
-            while the labor income share with the space below.*""")
-    # Caption graph
-    st.caption('Data Source: World Bank (for more information see data sources tab above)')
+            # Display graph
+            plotly_chart(fig, use_container_width=True)
+        else:
+            st.error(NO_DATA_MESSAGE)
+
+        st.markdown("""*Note that for each country, the capital income share corresponds with the space above each country line, 
+                while the labor income share with the space below.*""")
+        # Caption graph
+        st.caption('Data Source: World Bank (for more information see data sources tab above)')
+
+show_row1(page_data['chart1'], page_selections)
 
 ############### Row 2 ####################
-st.header("")
-st.subheader("Income and production – two sides of the same coin")
-# Configure columns
-col1, col2, col3 = st.columns([1,0.05,1])
-with col1: 
+
+@st.fragment
+def show_row2(selected_country, selected_peer, tab_selections):
+
+    """
+    Row 2 - Income and production (Chart 2).
+
+    """
+
     st.header("")
-    st.markdown(f"""<div style="text-align: justify;">If the value of the <i>newly produced final goods and services (GDP)</i> flows 
-                as <i>income</i> to households, then GDP <i>almost coincides with the income (before taxes) of the population – i.e.,
-                the Gross National Income (GNI).</i> In fact, GDP and GNI are identical in an economy in which citizens do not 
-                receive some of their income from abroad. As Chart 2 shows this difference is usually <i>relatively</i> small. 
-                In this sense, GDP per capita is a close approximation of GNI per capita and thus not only a measure of 
-                production per capita – but also of the <i>average income</i> of a country's population.<br>
-                Now, if you are a full-time employee, please do not take GNI per capita (or GDP per capita) as a perfect benchmark 
-                for your personal annual: bear in mind that GNI per capita is calculated by dividing GNI by the total population. 
-                However, not everyone is working  full-time, and some are not working at all (e.g., children). A large fraction of 
-                society is also doing unpaid work, for example childcare or home production for own use, which is thus not considered 
-                in GNI (or GDP). Also, GNI does not only reflect wages and salaries (income from labour) but also income from capital. 
-                Bearing all this in mind, GNI per capita still gives you at least some orientation whether your gross income, and thus 
-                somehow your <i>standard of living</i>, is above your country’s average or below. </div>
-                """, unsafe_allow_html=True
-                )
+    st.subheader("Income and production – two sides of the same coin")
+    # Configure columns
+    col1, col2, col3 = st.columns([1,0.05,1])
+    with col1: 
+        st.header("")
+        st.markdown(f"""<div style="text-align: justify;">If the value of the <i>newly produced final goods and services (GDP)</i> flows 
+                    as <i>income</i> to households, then GDP <i>almost coincides with the income (before taxes) of the population – i.e.,
+                    the Gross National Income (GNI).</i> In fact, GDP and GNI are identical in an economy in which citizens do not 
+                    receive some of their income from abroad. As Chart 2 shows this difference is usually <i>relatively</i> small. 
+                    In this sense, GDP per capita is a close approximation of GNI per capita and thus not only a measure of 
+                    production per capita – but also of the <i>average income</i> of a country's population.<br>
+                    Now, if you are a full-time employee, please do not take GNI per capita (or GDP per capita) as a perfect benchmark 
+                    for your personal annual: bear in mind that GNI per capita is calculated by dividing GNI by the total population. 
+                    However, not everyone is working  full-time, and some are not working at all (e.g., children). A large fraction of 
+                    society is also doing unpaid work, for example childcare or home production for own use, which is thus not considered 
+                    in GNI (or GDP). Also, GNI does not only reflect wages and salaries (income from labour) but also income from capital. 
+                    Bearing all this in mind, GNI per capita still gives you at least some orientation whether your gross income, and thus 
+                    somehow your <i>standard of living</i>, is above your country’s average or below. </div>
+                    """, unsafe_allow_html=True
+                    )
     
         
-with col3:
-    # Get data for country and for comparison chosen
-    chart2_data = get_filtered_data(selected_country, selected_start_year, selected_end_year, ['GDP per capita', 'GNI per capita'])
-    chart2_data_gdp = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, ['GDP per capita'])
-    chart2_data_gni = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, ['GNI per capita'])
+    with col3:
     
-    #  Graphs
-    tab1, tab2, tab3 = st.tabs([selected_country, "GDP per capita comparison", "GNI per capita comparison"])
+        #  Graphs
+        tab_labels = [selected_country, "GDP per capita comparison", "GNI per capita comparison"]
+        tab = lazy_tabs(tab_labels, key='income_row2_tabs')
 
-    ### Group data by year
-    chart2_data = chart2_data.groupby([chart2_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
-    
-    # Configure plots
-    with tab1:
-        fig = px.line(chart2_data,
-                        x="Year", 
-                        y="Value",   
-                        color='Indicator',
-                        title='Chart 2.1 – GDP per capita and GNI per capita',
-                        labels={'Value': '2017 international $'},
-                        hover_name="Country",
-                        )
-        
-        # Move legend 
-        fig.update_layout(legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.4,
-            xanchor="left",
-            x=-0.05
-            ))
-        
-        # Display graph
-        st.plotly_chart(fig, use_container_width=True)
+        # Tabs without data for the selection are skipped before their data is retrieved (see has_data)
+        if tab == tab_labels[0] and not has_data(availability, tab_selections['chart2']):
+            st.error(NO_DATA_MESSAGE)
 
-        st.markdown("""*To allow comparison across time and between countries, 
-                    all \$ values are in 2017 international \$ reflecting purchasing power parity 
-                    (between countries) and constant prices (across time).*""")
-        
-        # Caption graph
-        st.caption('Data Source: World Bank (for more information see data sources tab above)')
+        elif tab == tab_labels[0]:
 
-    with tab2:
-        # If the peer selection is empty show error message
-        if not selected_peer: 
-            st.error("Please choose one or several comparison countries.")
+            # Get data
+            chart2_data = get_tab_data('income', tab_selections, 'chart2', DATA_VERSION)
+            fig = get_figure('income_chart2', tab_selections['chart2'], DATA_VERSION, build_chart2, chart2_data)
         
-        # if peer selection chosen display graph
-        else:
-
-            fig = px.line(chart2_data_gdp,
-                            x="Year", 
-                            y="Value",   
-                            color='Country',
-                            title='Chart 2.2 – Comparison of GDP per capita across the selected countries',
-                            labels={'Value': '2017 international $'},
-                            hover_name="Country",
-                            )
-            
-            # Move legend 
-            fig.update_layout(legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=-0.4,
-                xanchor="left",
-                x=-0.05
-                ))
-            
             # Display graph
-            st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
 
             st.markdown("""*To allow comparison across time and between countries, 
                         all \$ values are in 2017 international \$ reflecting purchasing power parity 
                         (between countries) and constant prices (across time).*""")
-
+        
             # Caption graph
             st.caption('Data Source: World Bank (for more information see data sources tab above)')
 
-    with tab3:
-    # If the peer selection is empty show error message
-        if not selected_peer: 
-            st.error("Please choose one or several comparison countries.")
-        
-        # if peer selection chosen display graph
-        else:
-            fig = px.line(chart2_data_gni,
-                            x="Year", 
-                            y="Value",   
-                            color='Country',
-                            title='Chart 2.3 – Comparison of GNI per capita across the selected countries',
-                            labels={'Value': '2017 international $'},
-                            hover_name="Country",
-                            )
-            
-            # Move legend 
-            fig.update_layout(legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=-0.4,
-                xanchor="left",
-                x=-0.05
-                ))
+        elif tab == tab_labels[1]:
+            # If the peer selection is empty show error message
+            if not selected_peer: 
+                st.error("Please choose one or several comparison countries.")
+
+            # Skipped before the data is retrieved if there is no data for the selection (see has_data)
+            elif not has_data(availability, tab_selections['chart2_gdp']):
+                st.error(NO_DATA_MESSAGE)
+
+            # if peer selection chosen display graph
+            else:
+
+                # Animation through the years (the toggle only reruns this row)
+                animate = st.toggle("Animate the years", key='income_row2_animate_gdp')
+
+                # Get data and figure (or the animation from the year-sliced index)
+                if animate:
+                    fig = get_animated_figure('income', DATA_VERSION, 'income_chart2_gdp', tab_selections['chart2_gdp'],
+                                              'Chart 2.2 – Comparison of GDP per capita across the selected countries', '2017 international $')
+                else:
+                    chart2_data_gdp = get_tab_data('income', tab_selections, 'chart2_gdp', DATA_VERSION)
+                    fig = get_figure('income_chart2_gdp', tab_selections['chart2_gdp'], DATA_VERSION,
+                                     build_chart2_comparison, (chart2_data_gdp, 'Chart 2.2 – Comparison of GDP per capita across the selected countries'))
             
-            # Display graph
-            st.plotly_chart(fig, use_container_width=True)
+                # Display graph
+                plotly_chart(fig, use_container_width=True)
 
-            st.markdown("""*To allow comparison across time and between countries, all \$ values are in 2017 
-                        international \$ reflecting purchasing power parity (between countries) 
-                        and constant prices (across time).*""")
+                st.markdown("""*To allow comparison across time and between countries, 
+                            all \$ values are in 2017 international \$ reflecting purchasing power parity 
+                            (between countries) and constant prices (across time).*""")
 
-            # Caption graph
-            st.caption('Data Source: World Bank (for more information see data sources tab above)')
+                # Caption graph
+                st.caption('Data Source: World Bank (for more information see data sources tab above)')
 
+        elif tab == tab_labels[2]:
+        # If the peer selection is empty show error message
+            if not selected_peer: 
+                st.error("Please choose one or several comparison countries.")
+
+            # Skipped before the data is retrieved if there is no data for the selection (see has_data)
+            elif not has_data(availability, tab_selections['chart2_gni']):
+                st.error(NO_DATA_MESSAGE)
+
+            # if peer selection chosen display graph
+            else:
+                # Animation through the years (the toggle only reruns this row)
+                animate = st.toggle("Animate the years", key='income_row2_animate_gni')
+
+                # Get data and figure (or the animation from the year-sliced index)
+                if animate:
+                    fig = get_animated_figure('income', DATA_VERSION, 'income_chart2_gni', tab_selections['chart2_gni'],
+                                              'Chart 2.3 – Comparison of GNI per capita across the selected countries', '2017 international $')
+                else:
+                    chart2_data_gni = get_tab_data('income', tab_selections, 'chart2_gni', DATA_VERSION)
+                    fig = get_figure('income_chart2_gni', tab_selections['chart2_gni'], DATA_VERSION,
+                                     build_chart2_comparison, (chart2_data_gni, 'Chart 2.3 – Comparison of GNI per capita across the selected countries'))
+            
+                # Display graph
+                plotly_chart(fig, use_container_width=True)
+
+                st.markdown("""*To allow comparison across time and between countries, all \$ values are in 2017 
+                            international \$ reflecting purchasing power parity (between countries) 
+                            and constant prices (across time).*""")
 
+                # Caption graph
+                st.caption('Data Source: World Bank (for more information see data sources tab above)')
+
+show_row2(selected_country, selected_peer, tab_selections)
 
 ############################### ROW 3 ###################################
-st.header("")
-st.subheader(f"How's the income distributed within {selected_country}?")
 
-col1, col2, col3 = st.columns([1,0.05,1])
+@st.fragment
+def show_row3(selected_country, chart3_data, page_selections):
+
+    """
+    Row 3 - Income distribution (Chart 3).
+
+    """
 
-with col1: 
     st.header("")
-    #### Explanatory text box 3
-    st.markdown("""<div style="text-align: justify;"> For every person above average, 
-                there has to be at least one person below average. So how is income 
-                <i>distributed within</i> a country? The <i>Gini Index</i> shown in chart 3 measures 
-                the extent to which the distribution of income among <i>households</i> within 
-                a country deviates from a perfectly equal distribution. A Gini index of 
-                0 represents <i>perfect equality</i> while a score of 100 implies <i>perfect 
-                inequality</i> (one person receives 100% of the economy’s generated income). 
-                </div>""", unsafe_allow_html=True
-                )
-    
-#### Graph 3
-with col3: 
-    # Get data
-    chart3_data = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Gini index'])
+    st.subheader(f"How's the income distributed within {selected_country}?")
+
+    col1, col2, col3 = st.columns([1,0.05,1])
+
+    with col1: 
+        st.header("")
+        #### Explanatory text box 3
+        st.markdown("""<div style="text-align: justify;"> For every person above average, 
+                    there has to be at least one person below average. So how is income 
+                    <i>distributed within</i> a country? The <i>Gini Index</i> shown in chart 3 measures 
+                    the extent to which the distribution of income among <i>households</i> within 
+                    a country deviates from a perfectly equal distribution. A Gini index of 
+                    0 represents <i>perfect equality</i> while a score of 100 implies <i>perfect 
+                    inequality</i> (one person receives 100% of the economy’s generated income). 
+                    </div>""", unsafe_allow_html=True
+                    )
     
-    ### Group data by year
-    chart3_data = chart3_data.groupby(['Indicator'],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,['Year'])
+    #### Graph 3
+    with col3: 
     
-    # Configure plot
-    fig = px.line(chart3_data,
-                  x='Year', 
-                  y='Value',
-                  color='Country',
-                  title='Chart 3 – Gini Index',
-                  labels={'Value': 'Index Score'},# Update y-axis label
-                  hover_name='Country'
-                  )
+        # Check if data available, the filled values included (see has_data)
+        if has_data(availability, page_selections['chart3'], filled=True):
+            # Filled gaps (toggle only shown if the ETL filled gaps of the data, no chart if the selection
+            # only has filled values and the toggle is off, see select_gap_filling)
+            chart3_data, filled = select_gap_filling(chart3_data, 'income_chart3_fill_gaps',
+                                                     has_data(availability, page_selections['chart3']))
+
+            if chart3_data is not None:
+                # Get figure
+                fig = get_figure('income_chart3' + filled, page_selections['chart3'], DATA_VERSION, build_chart3, chart3_data)
+
+                # Display graph
+                plotly_chart(fig, use_container_width=True)
+        else:
+            st.error(NO_DATA_MESSAGE)
 
-    # Move legend 
-    fig.update_layout(legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.4,
-        xanchor="left",
-        x=-0.05
-        ))
-
-    # Fix y-axis to zero and add margin
-    fig.update_yaxes(range = [0, 100])
-    
-    # Display graph
-    st.plotly_chart(fig, use_container_width=True)
+        # Caption graph
+        st.caption('Data Source: World Bank (for more information see data sources tab above)')
 
-    # Caption graph
-    st.caption('Data Source: World Bank (for more information see data sources tab above)')
+show_row3(selected_country, page_data['chart3'], page_selections)
+
+###################### Row 4 ######################
 
-###################### Row 3 ######################
-# Configure columns
-#col1, col2, col3 = st.columns([1,0.05,1])
-
-#with col1:
-st.header("")
-#### Explanatory text box 4
-st.markdown("""<div style="text-align: justify;"> What the Gini Index measures can alternatively be illustrated by ranking a society by 
-            its income and showing how income is allocated to <i>five</i> citizen groups of <i>equal size</i>. 
-            The result of this approach is presented in chart 4. What does it say? That (in most countries) 
-            the “upper 20%” of the population receives an over-proportional share of the generated income. 
-            Can 20% of a society work that hard that they actually produce and should therefore gain sometimes 
-            up to 50% of the total income created by that society? Consequently, can the “lowest 20%” of a society 
-            work so little that their group should receive sometimes only around 5% of GNI?  
-            </div>""", unsafe_allow_html=True
-            ) 
-#with col3:
-# Get data
-chart4_data =  get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, 
-                                        ['Income share held by lowest 20%',
-                                        'Income share held by fourth 20%',
-                                        'Income share held by third 20%',
-                                        'Income share held by second 20%',
-                                        'Income share held by highest 20%', 
-                                        ])
-### Group data by year
-chart4_data = chart4_data.groupby([chart1_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
-
-# Configure plot
-fig = px.bar(chart4_data,
-                x="Year", 
-                y="Value",
-                color='Indicator',
-                facet_col='Country',
-                title='Chart 4 – Income shares of GNI',
-                facet_col_wrap=2,
-                hover_name="Country",
-                labels={
-                    'Value':'Percentage'
-                }
-                )
-
-# Fix y-axis to always show (100%)
-#fig.update_yaxes(matches='y')
-
-# Update facet_col settings for better display
-#fig.update_xaxes(matches='x')
-
-# Move legend 
-fig.update_layout(legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.4,
-        xanchor="left",
-        x=-0.05
-        ),
-        height=600)
-
-# Display graph
-st.plotly_chart(fig, use_container_width=True)
-# Caption graph
-st.caption('Data Source: World Bank (for more information see data sources tab above)')
-
-
-# Configure columns
-col1, col2, col3 = st.columns([1,0.05,1])
-
-with col1:
+@st.fragment
+def show_row4(chart4_data, page_selections):
+
+    """
+    Row 4 - Income shares of the population quintiles (Chart 4).
+
+    """
+
+    # Configure columns
+    #col1, col2, col3 = st.columns([1,0.05,1])
+
+    #with col1:
     st.header("")
-    st.markdown("""<div style="text-align: justify;"> Let us last focus on those that have the lowest income in society. 
-                Chart 5 presents the percentage of the population living from less than 2.15 <i>2017</i> international $ per day 
-                (i.e., an <i>annual</i> income of 785 $ <i>after</i> taxes). It is worthwhile to notice that worldwide, this share 
-                decreased within 30 years (1989-2019) from 38,4% to 9%. However, if you consider the higher poverty line of 6.85 
-                international $ per day (i.e., an annual income of 2,500$ after taxes), still 47% of the world population lived 
-                beneath this line in 2019. 
+    #### Explanatory text box 4
+    st.markdown("""<div style="text-align: justify;"> What the Gini Index measures can alternatively be illustrated by ranking a society by 
+                its income and showing how income is allocated to <i>five</i> citizen groups of <i>equal size</i>. 
+                The result of this approach is presented in chart 4. What does it say? That (in most countries) 
+                the “upper 20%” of the population receives an over-proportional share of the generated income. 
+                Can 20% of a society work that hard that they actually produce and should therefore gain sometimes 
+                up to 50% of the total income created by that society? Consequently, can the “lowest 20%” of a society 
+                work so little that their group should receive sometimes only around 5% of GNI?  
                 </div>""", unsafe_allow_html=True
-                )
+                ) 
+    #with col3:
+    # Check if data available, the filled values included (see has_data)
+    if has_data(availability, page_selections['chart4'], filled=True):
+        # Filled gaps (toggle only shown if the ETL filled gaps of the data, no chart if the selection
+        # only has filled values and the toggle is off, see select_gap_filling)
+        chart4_data, filled = select_gap_filling(chart4_data, 'income_chart4_fill_gaps',
+                                                 has_data(availability, page_selections['chart4']))
+
+        if chart4_data is not None:
+            # Get figure
+            fig = get_figure('income_chart4' + filled, page_selections['chart4'], DATA_VERSION, build_chart4, chart4_data)
 
+            # Display graph
+            plotly_chart(fig, use_container_width=True)
+    else:
+        st.error(NO_DATA_MESSAGE)
+    # Caption graph
+    st.caption('Data Source: World Bank (for more information see data sources tab above)')
 
-with col3:
-    # Get data for the poverty share
-    chart5_data = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Poverty Share'])
-    
-    ### Group data by year
-    chart5_data = chart5_data.groupby([chart5_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
-    
-    # Configure plot
-    fig = px.line(chart5_data,
-                    x="Year", 
-                    y="Value",   
-                    color='Country',
-                    title='Chart 5 – Share of population that lives with less than 2.15$ per person a day',
-                    hover_name="Country",
-                    labels={
-                        'Value':'Percentage'
-                    }
+show_row4(page_data['chart4'], page_selections)
+
+###################### Row 5 ######################
+
+@st.fragment
+def show_row5(chart5_data, page_selections):
+
+    """
+    Row 5 - Poverty headcount ratio (Chart 5).
+
+    """
+
+    # Configure columns
+    col1, col2, col3 = st.columns([1,0.05,1])
+
+    with col1:
+        st.header("")
+        st.markdown("""<div style="text-align: justify;"> Let us last focus on those that have the lowest income in society. 
+                    Chart 5 presents the percentage of the population living from less than 2.15 <i>2017</i> international $ per day 
+                    (i.e., an <i>annual</i> income of 785 $ <i>after</i> taxes). It is worthwhile to notice that worldwide, this share 
+                    decreased within 30 years (1989-2019) from 38,4% to 9%. However, if you consider the higher poverty line of 6.85 
+                    international $ per day (i.e., an annual income of 2,500$ after taxes), still 47% of the world population lived 
+                    beneath this line in 2019. 
+                    </div>""", unsafe_allow_html=True
                     )
 
-    # Move legend 
-    fig.update_layout(legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.4,
-        xanchor="left",
-        x=-0.05
-        ))
+
+    with col3:
     
-    # Fix y-axis to zero and add margin
-    fig.update_yaxes(range = [0, 100])
+        # Check if data available, the filled values included (see has_data)
+        if has_data(availability, page_selections['chart5'], filled=True):
+            # Filled gaps (toggle only shown if the ETL filled gaps of the data, no chart if the selection
+            # only has filled values and the toggle is off, see select_gap_filling)
+            chart5_data, filled = select_gap_filling(chart5_data, 'income_chart5_fill_gaps',
+                                                     has_data(availability, page_selections['chart5']))
+
+            if chart5_data is not None:
+                # Get figure
+                fig = get_figure('income_chart5' + filled, page_selections['chart5'], DATA_VERSION, build_chart5, chart5_data)
+
+                # Display graph
+                plotly_chart(fig, use_container_width=True)
+        else:
+            st.error(NO_DATA_MESSAGE)
 
-    # Display graph
-    st.plotly_chart(fig, use_container_width=True)
+        # Caption graph
+        st.caption('Data Source: World Bank (for more information see data sources tab above)')
 
-    # Caption graph
-    st.caption('Data Source: World Bank (for more information see data sources tab above)')
+show_row5(page_data['chart5'], page_selections)
+
+###################### Row 6 ######################
+
+# World map and ranking of an indicator for all countries (see show_cross_section)
+show_cross_section('income', DATA_VERSION, df_indicators, selected_country)
 
+# Debug panel with the profile of the run (only if enabled)
+show_profile()
@@ -1,6 +1,12 @@
 import pandas as pd 
 from api_functions.wb_data import get_wb_data
 from api_functions.ilo_data import get_ilo_data
+from app_functions.downloads import write_downloads
+from app_functions.data_store import write_metadata, get_data_path
+from app_functions.group_stats import build_group_ranks, build_group_bands, GROUP_RANKS_FILE, GROUP_BANDS_FILE
+from app_functions.availability import write_availability, AVAILABILITY_FILE
+from app_functions.gap_filling import fill_gaps, get_observed, GAP_FILLING
+from app_functions.data_versions import create_version, publish_version, get_version_path
 
 ########################### SPECIFY START AND END YEAR ###############################
 
@@ -60,8 +66,31 @@ for ele in selected_cols:
     mean_values = mean_values[~(mean_values[ele] == 0)]
     df_income = pd.concat([df_income, mean_values])
 
-# Save data
-df_income.to_excel('data/income_data.xlsx', index=False)
+# Fill the gaps of the sparse indicators (optional, see GAP_FILLING). The filled values are
+# flagged in the column Imputed and the dashboards only show them if chosen
+df_income = fill_gaps(df_income, GAP_FILLING['income'])
+
+# Save data (in the directory of a new version of the data)
+VERSION = create_version('income')
+DATA_PATH = get_data_path('income', VERSION)
+df_income.to_excel(DATA_PATH, index=False)
+
+# Write the download files (compressed csv and parquet) and the metadata sidecar next to the dataset
+write_downloads(df_income, DATA_PATH)
+write_metadata(df_income, DATA_PATH)
+
+# Precompute the percentile ranks and quantile bands of the countries within their groups
+# (region, sub-region, income group, LDC/LLDC/SIDS) so the dashboards only have to look them up
+# (from the observed values only)
+build_group_ranks(get_observed(df_income)).to_parquet(get_version_path('income', VERSION, GROUP_RANKS_FILE), index=False)
+build_group_bands(get_observed(df_income)).to_parquet(get_version_path('income', VERSION, GROUP_BANDS_FILE), index=False)
+
+# Bit-packed availability matrix (country x indicator x year), so the sections can skip a
+# selection without data before they retrieve it
+write_availability(df_income, get_version_path('income', VERSION, AVAILABILITY_FILE))
+
+# Publish the version (the dashboards swap to it in the background, see get_data_version)
+publish_version('income', VERSION)
 
 print(df_income)
 
@@ -1,96 +1,179 @@
+import os
 import streamlit as st 
-import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.express as px
+from app_functions.data_store import load_metadata, load_availability, get_data_version, get_page_data, get_tab_data, get_years, get_data_path
+from app_functions.figure_cache import get_figure, apply_layout, select_years
+from app_functions.downloads import get_download_path, load_download, export_selection, DOWNLOAD_FORMATS, EXPORT_FORMATS
+from app_functions.lazy_tabs import lazy_tabs
+from app_functions.availability import has_data, get_coverage_year, NO_DATA_MESSAGE
+from app_functions.cross_section import show_cross_section
+from app_functions.peer_suggestions import set_suggested_peers
+from app_functions.lazy_imports import lazy_import
+from app_functions.profiling import start_profile, plotly_chart, show_profile
+
+# Heavy libraries are only imported on first use, after the sidebar is shown (see lazy_import)
+pd = lazy_import('pandas')
+px = lazy_import('plotly.express')
 
 # Git checkout
 # Use full screen 
 st.set_page_config(layout="wide")
 
+# Profile of the run (only if enabled, see app_functions/profiling.py)
+start_profile('production')
 
-#---------------------------------- LOAD DATA AND PARAMETERS ---------------------------------#
 
-# Create import function with cache (cache so data is only loaded once)
-@st.cache_data
-def load_data(path):
-    df = pd.read_excel(path, engine='openpyxl')
-    return df
+#---------------------------------- LOAD DATA AND PARAMETERS ---------------------------------#
 
-# Load data 
-df_prod = load_data("data/production_data.xlsx")
+# Load the metadata of the data (written by the ETL next to the dataset, so the sidebar
+# is shown before the dataset itself is loaded with the first selections of the page)
+# The whole run uses the version of the data that is served when it starts (see get_data_version)
+DATA_VERSION = get_data_version('production')
+DATA_PATH = get_data_path('production', DATA_VERSION)
+metadata = load_metadata('production', DATA_VERSION)
 
 # Get a country, region and indicator list
-df_countries = df_prod['Country'].unique().tolist()
-df_indicators = df_prod['Indicator'].unique().tolist()
-df_regions = df_prod['Region'].unique().tolist()
-df_subregion = df_prod['Sub-region'].unique().tolist()
+df_countries = list(metadata['countries'])
+df_indicators = list(metadata['indicators'])
+df_regions = list(metadata['regions'])
+df_subregion = list(metadata['subregions'])
 df_sub_region = df_regions + df_subregion
 
-# Turn years into int (str necessary first because Streamlit)
-df_prod['Year'] = df_prod['Year'].astype(str)
-df_prod['Year'] = df_prod['Year'].astype(int)
-
 # Define start and end year 
-df_years = df_prod['Year'].unique().tolist()
+df_years = list(metadata['years'])
 START_YEAR = min(df_years)
 END_YEAR = min(df_years)
 
 #------------------------------ Functions  ------------------------------------#
 
-# Data Selection 
+# Charts (only built if the figure is not in the figure cache yet)
+def build_chart1(chart1_data):
 
-def get_filtered_data(country_selec, start_year_selec, end_year_selec, indicator_selec):
+    """
+    Chart 1 and 2 - GDP per capita and GDP (constant 2017 international $).
 
     """
-    Function takes the user selection of the dashboard as an input and retrieves the
-    corresponding data from the dataset. The output is a filtered dataframe. 
+
+    # ### Group data by year
+    chart1_data = chart1_data.groupby([chart1_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
+
+    # Configure plot
+    fig = px.line(chart1_data,
+                    x="Year", 
+                    y="Value",   
+                    color='Country',
+                    hover_name="Value",
+                    color_discrete_sequence=px.colors.qualitative.Plotly,
+                    labels={
+                    "Value": "US Dollar (constant 2017 international $)",
+                }
+                    )
+
+    # Legend and y-axis fixed to zero with margin
+    return apply_layout(fig, y_range=[0, ((max(chart1_data.Value))*1.2)])
+
+
+def build_chart3(chart3_data):
 
     """
+    Chart 3 - Total Population.
 
-    # Turn country selection into list if not list 
-    if isinstance(country_selec, str):
-        country_selec = [country_selec]
+    """
 
-    # Create a dataframe with all years and indicators first
-    ## This is necessary to add the missing years with "None" values
-    df_empty = pd.DataFrame([(year, indicator, country) 
-                            for year in range(start_year_selec, end_year_selec+1)
-                            for indicator in indicator_selec
-                            for country in country_selec],
-                            columns=['Year', 'Indicator', 'Country'])
+    # ### Group data by year
+    chart3_data = chart3_data.groupby([chart3_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
 
-    
-    # Retrieve the selected data from df
-    df_fltr = df_prod[(df_prod['Country'].isin(country_selec)) & 
-                       (df_prod['Year'] >= start_year_selec) & 
-                       (df_prod['Indicator'].isin(indicator_selec)) &
-                       (df_prod['Year'] <= end_year_selec)]
-    
-    ## Merge 
-    df_merged = pd.merge(df_empty, df_fltr, on=['Year', 'Indicator', 'Country'], how='left')
+    # Configure plot
+    fig = px.line(chart3_data,
+                    x="Year", 
+                    y="Value",   
+                    color='Country',
+                    #title='Chart 3 - Total Population',
+                    hover_name="Value",
+                    color_discrete_sequence=px.colors.qualitative.Plotly,
+                    labels={
+                        "Value": "Number of people",
+                    }
+                    )
 
-    ## Fill other columns 
-    df_merged['Indicator Code'] = df_merged.groupby('Indicator')['Indicator Code'].apply(lambda x: x.fillna(method='ffill').fillna(method='bfill'))
+    # Legend and y-axis fixed to zero with margin
+    return apply_layout(fig, y_range=[0, ((max(chart3_data.Value))*1.5)])
 
-    for col in ['Country Code', 'Region', 'Sub-region', 'Income Group', 'Least Developed Countries (LDC)', 'Land Locked Developing Countries (LLDC)', 'Small Island Developing States (SIDS)']:
-        df_merged[col] = df_merged.groupby('Country')[col].apply(lambda x: x.fillna(method='ffill').fillna(method='bfill'))
 
-    # Turn year column into datetime format
+def build_chart4(chart4_data):
 
-    return df_merged
+    """
+    Chart 4 - Capital stock.
+
+    """
 
-# Year Selection 
-def get_years(country_input): 
+    # Group data by year
+    chart4_data = chart4_data.groupby([chart4_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
+
+    # Configure plot
+    fig = px.line(chart4_data,
+                    x="Year", 
+                    y="Value",   
+                    color='Country',
+                    hover_name="Value",
+                    color_discrete_sequence=px.colors.qualitative.Plotly,
+                    labels={
+                        "Value": "US Dollar (in bil. 2011US$)",
+                    }
+                    )
+
+    # Legend and y-axis fixed to zero with margin
+    return apply_layout(fig, y_range=[0, ((max(chart4_data.Value))*1.5)])
+
+
+def build_chart5(chart5_data):
 
     """
-    Takes a country as an input and retrieves the corresponding minimum and maximum year
-    available. This can be used to adjust the year slider. 
+    Chart 5 - Annual growth rates.
 
     """
-    start_year_country = int(df_prod[df_prod['Country'] == country_input]['Year'].min())
-    end_year_country = int(df_prod[df_prod['Country'] == country_input]['Year'].max())
 
-    return start_year_country, end_year_country
+    # ### Group data by year
+    chart5_data = chart5_data.groupby([chart5_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
+
+    # Configure plot
+    fig = px.line(chart5_data,
+                    x="Year", 
+                    y="Value",   
+                    color='Indicator',
+                    #title=f"Chart 5 - {selected_country}'s Annual Growth Rates [%]",
+                    hover_name="Value",
+                    color_discrete_sequence=px.colors.qualitative.Plotly,
+                    labels={
+                        "Value": "Percentage",
+                    }
+                    )
+
+    # Move legend 
+    apply_layout(fig, legend=dict(
+        #orientation="h",
+        yanchor="bottom",
+        y=-0.6,
+        xanchor="left",
+        x=-0.05
+        ))
+
+    # Update legend names
+    newnames = {'Population Growth Rate': 'Population growth rate', 
+                'GDP Growth': 'GDP growth rate', 
+                'Growth rate in total capital (%)': 'Total capital growth rate (%)'}
+
+    fig.for_each_trace(lambda t: t.update(name = newnames[t.name],
+                                          legendgroup = newnames[t.name],
+                                          hovertemplate = t.hovertemplate.replace(t.name, newnames[t.name])
+                                         )
+                      )
+    # Fix y-axis to zero and add margin
+    if (min(chart5_data.Value)) < 0:
+        fig.update_yaxes(range = [((min(chart5_data.Value)) - 5), ((max(chart5_data.Value)) + 5)])
+    else:
+        fig.update_yaxes(range = [((min(chart5_data.Value)) + 5), ((max(chart5_data.Value)) + 5)])
+
+    return fig
 
 #---------------------------------------- SIDEBAR ---------------------------------
 
@@ -116,37 +199,36 @@ st.sidebar.caption("""If you want to compare the values of the chosen country
 # PEER COUNTRY INPUT WIDGET
 selected_peer = st.sidebar.multiselect(
     "Choose comparison countries",
-    df_countries
+    df_countries,
+    key='production_peers'
     )
 
+# Suggestion of the countries most similar to the chosen country (see suggest_peers)
+st.sidebar.button("Suggest similar countries", on_click=set_suggested_peers,
+                  args=('production', DATA_VERSION, selected_country, 'production_peers'))
+
 # START AND END YEAR SLIDER 
 
 # # Update based on data availability for chosen country 
-START_YEAR, END_YEAR = get_years(selected_country)
+START_YEAR, END_YEAR = get_years(metadata, selected_country)
 
-# Widget
-selected_years = st.sidebar.slider(
-     "Select the range",
-     START_YEAR, END_YEAR, (START_YEAR,END_YEAR-1),
-    )
+# Availability of the data (bit-packed matrix written by the ETL, see app_functions/availability.py):
+# the sections test it before they retrieve their data and the slider shows the latest year with
+# data for all indicators
+availability = load_availability('production', DATA_VERSION)
+
+# Widget (or all years with the range sliders of the charts, see select_years)
+selected_years = select_years("Select the range", START_YEAR, END_YEAR,
+                              get_coverage_year(availability, [selected_country], df_indicators))
 selected_start_year = selected_years[0]
 selected_end_year = selected_years[1]
 
-# DOWNLOAD WIDGET 
-
-# Create a csv version of the dataframe (cache so it doesn't rerun)
-@st.cache_data
-def convert_df(df):
-    return df.to_csv().encode('utf-8')
-
-csv = convert_df(df_prod)
+# DOWNLOAD WIDGET (filled in once the selections of the page are retrieved, see below)
 
 # Add empty space to create some distance 
 st.sidebar.header("")
 
-st.sidebar.download_button(label="Download full data as csv file",
-                   data=csv, 
-                   file_name='production_data.csv')
+download_box = st.sidebar.container()
 
 st.sidebar.header("")
 
@@ -158,6 +240,51 @@ st.sidebar.info("""Please note that this dashboard is a prototype.
                 make no warranties or guarantees regarding its performance, 
                 reliability, or suitability for any specific purpose.""")
 
+#---------------------------------------- PAGE SELECTIONS ---------------------------------------
+
+# Declare all selections of the page so they are retrieved with one pass over the dataset
+page_selections = {
+    'chart3': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Total population']),
+    'chart4': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Capital stock (in bil. 2011US$)']),
+    'chart5': ([selected_country], selected_start_year, selected_end_year, ['Population Growth Rate', 'GDP Growth', 'Growth rate in total capital (%)'])
+    }
+
+# Selections of the tabs (only retrieved once their tab is shown, see lazy_tabs)
+tab_selections = {
+    'chart1': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['GDP per capita']),
+    'chart2': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['GDP'])
+    }
+page_data = get_page_data('production', page_selections, DATA_VERSION)
+
+
+#---------------------------------------- DOWNLOAD ---------------------------------------------
+
+with download_box:
+
+    # Full data or only the current selection (country, peers, years and indicators of the page)
+    download_scope = st.radio("Choose the data", ["Full data", "Current selection"])
+
+    # The download files of the full data are written by the ETL next to the dataset and only read from disk
+    if download_scope == "Full data":
+        download_format = st.selectbox("Choose the file format", list(DOWNLOAD_FORMATS))
+        download_path, download_mime = get_download_path(DATA_PATH, download_format)
+        download_data = load_download('production', DATA_VERSION, download_format)
+        download_name = os.path.basename(download_path)
+
+    # The export of the current selection is created from the retrieved data of the page
+    else:
+        download_format = st.selectbox("Choose the file format", list(EXPORT_FORMATS))
+        download_ending, download_mime = EXPORT_FORMATS[download_format]
+        download_data = export_selection({**page_selections, **tab_selections}, DATA_VERSION, download_format,
+                                         get_page_data('production', {**page_selections, **tab_selections}, DATA_VERSION))
+        download_name = os.path.splitext(os.path.basename(DATA_PATH))[0] + f"_{selected_country}{download_ending}"
+
+    st.download_button(label=f"Download {download_scope.lower()}",
+                       data=download_data,
+                       file_name=download_name,
+                       mime=download_mime)
+
+
 #---------------------------------------- MAIN PAGE --------------------------------------------
 
 # Add a title and intro text
@@ -189,353 +316,262 @@ with st.expander("ℹ️ - About the data sources", expanded=False):
         """,unsafe_allow_html=True)
     
 
+# The rows of the page are fragments (st.fragment): a widget inside a row only reruns that
+# row. Every row takes the inputs it depends on as arguments.
+
 ############################ ROW 1 ###################################
 
-st.subheader("")
+@st.fragment
+def show_row1(selected_country, tab_selections):
+
+    """
+    Row 1 - GDP per capita and GDP (Chart 1 and 2).
+
+    """
+
+
+    st.subheader("")
 
-# Display subheading 
-st.subheader("Everyone is talking about  Gross Domestic Product (GDP) - but what does it actually mean?")
-st.subheader("")
+    # Display subheading 
+    st.subheader("Everyone is talking about  Gross Domestic Product (GDP) - but what does it actually mean?")
+    st.subheader("")
 
 
-# Configure columns
-col1, col2, col3 = st.columns([1,0.02,1])
+    # Configure columns
+    col1, col2, col3 = st.columns([1,0.02,1])
 
-with col1:
+    with col1:
     
-    with col1: 
-
-    #### Explanatory text box 1
-        st.markdown("""<div style="text-align: justify;">The best way to understand GDP is probably
-                    by breaking it down into its components. Let us start with <strong>Product</strong>: 
-                    The GDP measures all <em>final goods</em> and <em>services</em> that 
-                    have been produced within a defined time period (typically a year).  If this year, 
-                    someone sells a house that has been build two years ago, it will not be part of 
-                    this year's GDP. Also, if someone resells a car that has been both, manufactured 
-                    and bought this year, it will only be counted once 
-                    into GDP since reselling is not producing.</div> 
-                    <br>
-                    <div style="text-align: justify;">Examples for <strong>services</strong> are a haircut, entertainment, a taxi ride, 
-                    consultancy, a craft activity, renting out an apartment, formal schooling, or health care. 
-                    They all have in common that you cannot store them. <strong>Goods</strong>, in turn, can 
-                    be stored as they are tangible things such as food, clothes, books, 
-                    computers, mobiles, machines in general, and even buildings.  What does the term <strong>final</strong> 
-                    mean? A car is a final good – but the steel and glass a car manufacturer buys to produce 
-                    the car are not final goods. That is: All the goods and services which directly end up 
-                    in a product are not final goods. Machines, however, are final goods since they are used 
-                    to produce goods, but do not directly end up in them. <strong>Domestic</strong>: Only those 
-                    final goods and services are part of the GDP that are produced 
-                    in the considered country. Whether a domestic factory belongs to a foreign owner or 
-                    a domestic one does not matter - it only matters that the good is produced in the regarded country.</div>""", unsafe_allow_html=True
-        )
+        with col1: 
+
+        #### Explanatory text box 1
+            st.markdown("""<div style="text-align: justify;">The best way to understand GDP is probably
+                        by breaking it down into its components. Let us start with <strong>Product</strong>: 
+                        The GDP measures all <em>final goods</em> and <em>services</em> that 
+                        have been produced within a defined time period (typically a year).  If this year, 
+                        someone sells a house that has been build two years ago, it will not be part of 
+                        this year's GDP. Also, if someone resells a car that has been both, manufactured 
+                        and bought this year, it will only be counted once 
+                        into GDP since reselling is not producing.</div> 
+                        <br>
+                        <div style="text-align: justify;">Examples for <strong>services</strong> are a haircut, entertainment, a taxi ride, 
+                        consultancy, a craft activity, renting out an apartment, formal schooling, or health care. 
+                        They all have in common that you cannot store them. <strong>Goods</strong>, in turn, can 
+                        be stored as they are tangible things such as food, clothes, books, 
+                        computers, mobiles, machines in general, and even buildings.  What does the term <strong>final</strong> 
+                        mean? A car is a final good – but the steel and glass a car manufacturer buys to produce 
+                        the car are not final goods. That is: All the goods and services which directly end up 
+                        in a product are not final goods. Machines, however, are final goods since they are used 
+                        to produce goods, but do not directly end up in them. <strong>Domestic</strong>: Only those 
+                        final goods and services are part of the GDP that are produced 
+                        in the considered country. Whether a domestic factory belongs to a foreign owner or 
+                        a domestic one does not matter - it only matters that the good is produced in the regarded country.</div>""", unsafe_allow_html=True
+            )
 
-    st.header("")
+        st.header("")
 
-#### Graph 1
+    #### Graph 1
 
-with col3: 
+    with col3: 
 
-    # Create tabs 
-    tab1, tab2 = st.tabs(['GDP per capita', 'GDP'])
+        # Create tabs 
+        tab_labels = ['GDP per capita', 'GDP']
+        tab = lazy_tabs(tab_labels, key='production_row1_tabs')
 
-    with tab1: 
+        # Tabs without data for the selection are skipped before their data is retrieved (see has_data)
+        if tab == tab_labels[0] and not has_data(availability, tab_selections['chart1']):
+            st.error(NO_DATA_MESSAGE)
 
-        # Title
-        st.subheader("")
-        st.markdown(f"""<div style="text-align: justify;"><b>Chart 1 - GDP per capita for {selected_country}</div></b>""", unsafe_allow_html=True)
-
-        # Get data
-        chart1_data = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, ['GDP per capita'])
-
-        # ### Group data by year
-        chart1_data = chart1_data.groupby([chart1_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
-
-        # Configure plot
-        fig = px.line(chart1_data,
-                        x="Year", 
-                        y="Value",   
-                        color='Country',
-                        #title='Chart 1 - GDP per capita (constant 2017 international $)',
-                        hover_name="Value",
-                        color_discrete_sequence=px.colors.qualitative.Plotly,
-                        labels={
-                        "Value": "US Dollar (constant 2017 international $)",
-                    }
-                        )
-
-        # Move legend 
-        fig.update_layout(legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.4,
-            xanchor="left",
-            x=-0.05
-            ))
-        
-        # Fix y-axis to zero and add margin
-        fig.update_yaxes(range = [0, ((max(chart1_data.Value))*1.2)])
+        elif tab == tab_labels[0]:
 
-        # Display graph
-        st.plotly_chart(fig, use_container_width=True)
+            # Title
+            st.subheader("")
+            st.markdown(f"""<div style="text-align: justify;"><b>Chart 1 - GDP per capita for {selected_country}</div></b>""", unsafe_allow_html=True)
 
-        # Subtitle
-        st.caption("Data Source: World Bank (for more information see data sources tab above)")
-        st.header("")
+            # Get data and figure
+            chart1_data = get_tab_data('production', tab_selections, 'chart1', DATA_VERSION)
+            fig = get_figure('production_chart1', tab_selections['chart1'], DATA_VERSION, build_chart1, chart1_data)
 
-        # Caption graph
-        #st.caption('Data Sources: World Development Indicators (WDI)')
+            # Display graph
+            plotly_chart(fig, use_container_width=True)
+
+            # Subtitle
+            st.caption("Data Source: World Bank (for more information see data sources tab above)")
+            st.header("")
+
+            # Caption graph
+            #st.caption('Data Sources: World Development Indicators (WDI)')
     
-    with tab2: 
+        elif tab == tab_labels[1] and not has_data(availability, tab_selections['chart2']):
+            st.error(NO_DATA_MESSAGE)
+
+        elif tab == tab_labels[1]:
         
-        # Title
-        st.subheader("")
-        st.markdown(f"""<div style="text-align: justify;"><b>Chart 2 - GDP for {selected_country}</div></b>""", unsafe_allow_html=True)
+            # Title
+            st.subheader("")
+            st.markdown(f"""<div style="text-align: justify;"><b>Chart 2 - GDP for {selected_country}</div></b>""", unsafe_allow_html=True)
         
-        # Get data
-        chart2_data = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, ['GDP'])
-
-        # ### Group data by year
-        chart2_data = chart2_data.groupby([chart2_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
-       
-        # Configure plot
-        fig = px.line(chart2_data,
-                        x="Year", 
-                        y="Value",   
-                        color='Country',
-                        #title = 'Chart 2 - GDP (constant 2017 international $)',
-                        hover_name="Value",
-                        color_discrete_sequence=px.colors.qualitative.Plotly,
-                        labels={
-                        "Value": "US Dollar (constant 2017 international $)",
-                    }
-                        )
-
-        # Move legend 
-        fig.update_layout(legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.4,
-            xanchor="left",
-            x=-0.05
-            ))
-        
-        # Fix y-axis to zero and add margin
-        fig.update_yaxes(range = [0, ((max(chart2_data.Value))*1.2)])
+            # Get data and figure
+            chart2_data = get_tab_data('production', tab_selections, 'chart2', DATA_VERSION)
+            fig = get_figure('production_chart2', tab_selections['chart2'], DATA_VERSION, build_chart1, chart2_data)
 
-        # Display graph
-        st.plotly_chart(fig, use_container_width=True)
+            # Display graph
+            plotly_chart(fig, use_container_width=True)
 
-        # Subtitle
-        st.caption("Data Source: World Bank (for more information see data sources tab above)")
-        st.header("")
+            # Subtitle
+            st.caption("Data Source: World Bank (for more information see data sources tab above)")
+            st.header("")
         
-        # Caption graph
-        #st.caption('Data Source: World Development Indicators (WDI)')
+            # Caption graph
+            #st.caption('Data Source: World Development Indicators (WDI)')
 
+show_row1(selected_country, tab_selections)
 
 ############################# ROW 2 ###################################
 
-# Text 
-st.subheader("So how do people actually manage that their economies grow?")
-st.header("")
+@st.fragment
+def show_row2(selected_country, chart3_data, chart4_data, page_selections):
 
-# Configure columns
-col1, col2, col3 = st.columns([1,0.02,1])
+    """
+    Row 2 - Population and capital stock (Chart 3 and 4).
+
+    """
 
-with col1:
+
+    # Text 
+    st.subheader("So how do people actually manage that their economies grow?")
+    st.header("")
+
+    # Configure columns
+    col1, col2, col3 = st.columns([1,0.02,1])
+
+    with col1:
     
-    st.markdown("""<div style="text-align: justify;">In chart 1, we can see that 
-                the economies of a lot of countries (if selected) tend to grow. That is, 
-                year by year most countries manage to establish new "high scores" in terms 
-                of the total value of final goods and services they have produced in that 
-                year (GDP). <strong>So how do people actually manage that their economies grow?</strong></div>  
-                <br>
-                <div style="text-align: justify;">Production depends on three so-called factors of production: Economists 
-                call the first <strong>land</strong> – which is a synonym for natural resources. They 
-                provide the material input for all the goods and services that an economy 
-                produces. Obviously, the material boundaries of our planet set an upper 
-                limit for material growth on earth.</div>   
-                <br>
-                <div style="text-align: justify;">The second factor is <strong>capital</strong>: Capital are all those products that can 
-                be used to produce further products and do not end up in them: machines, 
-                tools and equipment, patents, buildings, a country's infrastructure. The 
-                more of these products are available, the more goods and services an economy 
-                can produce. Or, in turn, without any factories there will not be any industrial 
-                products. Hence, increasing the capital stock is one way to make an economy grow.</div>  
-                <br>
-                <div style="text-align: justify;">The last and third factor of production is <strong>labour</strong>. Labour is provided by people. 
-                That means, if the population is growing, there are more people around who can work. Thus, usually, an economy grows when its population is growing (for more 
-                information on employment, check out our other <a href="https://employment-dashboard.streamlit.app/">employment dashboard)</a>).
-                </div>""", unsafe_allow_html=True
-        )    
+        st.markdown("""<div style="text-align: justify;">In chart 1, we can see that 
+                    the economies of a lot of countries (if selected) tend to grow. That is, 
+                    year by year most countries manage to establish new "high scores" in terms 
+                    of the total value of final goods and services they have produced in that 
+                    year (GDP). <strong>So how do people actually manage that their economies grow?</strong></div>  
+                    <br>
+                    <div style="text-align: justify;">Production depends on three so-called factors of production: Economists 
+                    call the first <strong>land</strong> – which is a synonym for natural resources. They 
+                    provide the material input for all the goods and services that an economy 
+                    produces. Obviously, the material boundaries of our planet set an upper 
+                    limit for material growth on earth.</div>   
+                    <br>
+                    <div style="text-align: justify;">The second factor is <strong>capital</strong>: Capital are all those products that can 
+                    be used to produce further products and do not end up in them: machines, 
+                    tools and equipment, patents, buildings, a country's infrastructure. The 
+                    more of these products are available, the more goods and services an economy 
+                    can produce. Or, in turn, without any factories there will not be any industrial 
+                    products. Hence, increasing the capital stock is one way to make an economy grow.</div>  
+                    <br>
+                    <div style="text-align: justify;">The last and third factor of production is <strong>labour</strong>. Labour is provided by people. 
+                    That means, if the population is growing, there are more people around who can work. Thus, usually, an economy grows when its population is growing (for more 
+                    information on employment, check out our other <a href="https://employment-dashboard.streamlit.app/">employment dashboard)</a>).
+                    </div>""", unsafe_allow_html=True
+            )    
     
-    st.subheader("")
+        st.subheader("")
     
-with col1:
+    with col1:
                 
-    st.markdown("""<div style="text-align: justify;">Besides the pure quantity of people and capital items around, the 
-                <strong>quality</strong> of 
-                both factors matters as well: If people are better educated and trained they 
-                will, most likely, be able to work more efficient and will consequently produce 
-                more per hour than before. In this context, one also often refers to the 
-                term “human capital”</div>
-                <br>
-                <div style="text-align: justify;">What education is to humans, innovation (or science) is 
-                to capital: If the same number of machines and production processes suddenly 
-                function with a more efficient technology, due to an innovation, then again 
-                production increases – thus, the economy grows.</div>""", unsafe_allow_html=True
-        )
+        st.markdown("""<div style="text-align: justify;">Besides the pure quantity of people and capital items around, the 
+                    <strong>quality</strong> of 
+                    both factors matters as well: If people are better educated and trained they 
+                    will, most likely, be able to work more efficient and will consequently produce 
+                    more per hour than before. In this context, one also often refers to the 
+                    term “human capital”</div>
+                    <br>
+                    <div style="text-align: justify;">What education is to humans, innovation (or science) is 
+                    to capital: If the same number of machines and production processes suddenly 
+                    function with a more efficient technology, due to an innovation, then again 
+                    production increases – thus, the economy grows.</div>""", unsafe_allow_html=True
+            )
 
 
-### Chart Population ###
+    ### Chart Population ###
 
-with col3: 
+    with col3: 
 
-    # Title
-    st.markdown(f"""<div style="text-align: justify;"><b>Chart 3 - Total Population of {selected_country}</div></b>""", unsafe_allow_html=True)
+        # Title
+        st.markdown(f"""<div style="text-align: justify;"><b>Chart 3 - Total Population of {selected_country}</div></b>""", unsafe_allow_html=True)
     
-    # Get data
-    chart3_data = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Total population'])
+        # Check if data available (see has_data)
+        if has_data(availability, page_selections['chart3']):
+            # Get figure
+            fig = get_figure('production_chart3', page_selections['chart3'], DATA_VERSION, build_chart3, chart3_data)
 
-    # ### Group data by year
-    chart3_data = chart3_data.groupby([chart3_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
-          
-    # Configure plot
-    fig = px.line(chart3_data,
-                    x="Year", 
-                    y="Value",   
-                    color='Country',
-                    #title='Chart 3 - Total Population',
-                    hover_name="Value",
-                    color_discrete_sequence=px.colors.qualitative.Plotly,
-                    labels={
-                        "Value": "Number of people",
-                    }
-                    )
+            # Display graph
+            plotly_chart(fig, use_container_width=True)
+        else:
+            st.error(NO_DATA_MESSAGE)
 
-    # Move legend 
-    fig.update_layout(legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.4,
-        xanchor="left",
-        x=-0.05
-        ))
+        # Caption graph
+        st.caption("Data Source: World Bank (for more information see data sources tab above)")
+        st.header("")
+
+
+    ### Chart Capital ###
+
+    with col3:
+
+        # Title
+        st.markdown(f"""<div style="text-align: justify;"><b>Chart 4 - Capital stock in {selected_country}</div></b>""", unsafe_allow_html=True) 
     
-    # Fix y-axis to zero and add margin
-    fig.update_yaxes(range = [0, ((max(chart3_data.Value))*1.5)])
+        # Check if data available (see has_data)
+        if has_data(availability, page_selections['chart4']):
+            # Get figure
+            fig = get_figure('production_chart4', page_selections['chart4'], DATA_VERSION, build_chart4, chart4_data)
 
-    # Display graph
-    st.plotly_chart(fig, use_container_width=True)
+            # Display graph
+            plotly_chart(fig, use_container_width=True)
+        else:
+            st.error(NO_DATA_MESSAGE)
 
-    # Caption graph
-    st.caption("Data Source: World Bank (for more information see data sources tab above)")
-    st.header("")
+        # Subtitle
+        st.caption("Data Source: IMF (for more information see data sources tab above)")
+        st.subheader("")
 
+show_row2(selected_country, page_data['chart3'], page_data['chart4'], page_selections)
 
-### Chart Capital ###
+############################# ROW 3 ###################################
 
-with col3:
+@st.fragment
+def show_row3(selected_country, chart5_data, page_selections):
 
-    # Title
-    st.markdown(f"""<div style="text-align: justify;"><b>Chart 4 - Capital stock in {selected_country}</div></b>""", unsafe_allow_html=True) 
-    
-    # Get data
-    chart4_data = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Capital stock (in bil. 2011US$)'])
+    """
+    Row 3 - Annual growth rates (Chart 5).
 
-    # Group data by year
-    chart4_data = chart4_data.groupby([chart4_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
-        
-    # Configure plot
-    fig = px.line(chart4_data,
-                    x="Year", 
-                    y="Value",   
-                    color='Country',
-                    hover_name="Value",
-                    color_discrete_sequence=px.colors.qualitative.Plotly,
-                    labels={
-                        "Value": "US Dollar (in bil. 2011US$)",
-                    }
-                    )
+    """
 
-   # Move legend 
-    fig.update_layout(legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.4,
-        xanchor="left",
-        x=-0.05
-        ))
-    
-    # Fix y-axis to zero and add margin
-    fig.update_yaxes(range = [0, ((max(chart4_data.Value))*1.5)])
 
-    # Display graph
-    st.plotly_chart(fig, use_container_width=True)
+    ### Chart Annual Growth Rates ###
+
+    # Title
+    st.markdown(f"""<div style="text-align: justify;"><b>Chart 5 - {selected_country}'s Annual Growth Rates [%]</div></b>""", unsafe_allow_html=True) 
+  
+    # Check if data available (see has_data)
+    if has_data(availability, page_selections['chart5']):
+        # Get figure
+        fig = get_figure('production_chart5', page_selections['chart5'], DATA_VERSION, build_chart5, chart5_data)
+
+        # Display graph
+        st.header("")
+        plotly_chart(fig, use_container_width=True)
+    else:
+        st.error(NO_DATA_MESSAGE)
 
     # Subtitle
-    st.caption("Data Source: IMF (for more information see data sources tab above)")
+    st.caption(f"Data Sources: World Bank, IMF (for more information see data sources tab above)")
     st.subheader("")
 
+show_row3(selected_country, page_data['chart5'], page_selections)
 
-### Chart Annual Growth Rates ###
+############################# ROW 4 ###################################
 
-# Title
-st.markdown(f"""<div style="text-align: justify;"><b>Chart 5 - {selected_country}'s Annual Growth Rates [%]</div></b>""", unsafe_allow_html=True) 
-  
-# Get data
-chart5_data = get_filtered_data([selected_country], selected_start_year, selected_end_year, ['Population Growth Rate', 'GDP Growth', 'Growth rate in total capital (%)'])
-
-# ### Group data by year
-chart5_data = chart5_data.groupby([chart5_data.Indicator],group_keys=False,sort=False).apply(pd.DataFrame.sort_values,'Year')
-
-# Configure plot
-fig = px.line(chart5_data,
-                x="Year", 
-                y="Value",   
-                color='Indicator',
-                #title=f"Chart 5 - {selected_country}'s Annual Growth Rates [%]",
-                hover_name="Value",
-                color_discrete_sequence=px.colors.qualitative.Plotly,
-                labels={
-                    "Value": "Percentage",
-                }
-                )
-
-# Move legend 
-fig.update_layout(legend=dict(
-    #orientation="h",
-    yanchor="bottom",
-    y=-0.6,
-    xanchor="left",
-    x=-0.05
-    ))
-
-# Fix y-axis to zero and add margin
-fig.update_yaxes(range = [((min(chart5_data.Value))*1.2), ((max(chart5_data.Value))*1.2)])
-
-# Update legend names
-newnames = {'Population Growth Rate': 'Population growth rate', 
-            'GDP Growth': 'GDP growth rate', 
-            'Growth rate in total capital (%)': 'Total capital growth rate (%)'}
-
-fig.for_each_trace(lambda t: t.update(name = newnames[t.name],
-                                      legendgroup = newnames[t.name],
-                                      hovertemplate = t.hovertemplate.replace(t.name, newnames[t.name])
-                                     )
-                  )
-# Fix y-axis to zero and add margin
-if (min(chart5_data.Value)) < 0:
-    fig.update_yaxes(range = [((min(chart5_data.Value)) - 5), ((max(chart5_data.Value)) + 5)])
-else:
-    fig.update_yaxes(range = [((min(chart5_data.Value)) + 5), ((max(chart5_data.Value)) + 5)])
-
-
-
-# Display graph
-st.header("")
-st.plotly_chart(fig, use_container_width=True)
-
-# Subtitle
-st.caption(f"Data Sources: World Bank, IMF (for more information see data sources tab above)")
-st.subheader("")
+# World map and ranking of an indicator for all countries (see show_cross_section)
+show_cross_section('production', DATA_VERSION, df_indicators, selected_country)
+
+# Debug panel with the profile of the run (only if enabled)
+show_profile()
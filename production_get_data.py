@@ -1,6 +1,11 @@
 import pandas as pd 
 from api_functions.wb_data import get_wb_data
 from api_functions.imf_data import get_imf_data
+from app_functions.downloads import write_downloads
+from app_functions.data_store import write_metadata, get_data_path
+from app_functions.group_stats import build_group_ranks, build_group_bands, GROUP_RANKS_FILE, GROUP_BANDS_FILE
+from app_functions.availability import write_availability, AVAILABILITY_FILE
+from app_functions.data_versions import create_version, publish_version, get_version_path
 
 ########################### SPECIFY START AND END YEAR ###############################
 
@@ -88,5 +93,23 @@ df_prod = pd.concat([wb_data, imf_data])
 #     mean_values = mean_values[~(mean_values[ele] == 0)]
 #     df_prod = pd.concat([df_prod, mean_values])
 
-# Save as excel file
-df_prod.to_excel('data/production_data.xlsx', index=False)
\ No newline at end of file
+# Save as excel file (in the directory of a new version of the data)
+VERSION = create_version('production')
+DATA_PATH = get_data_path('production', VERSION)
+df_prod.to_excel(DATA_PATH, index=False)
+
+# Write the download files (compressed csv and parquet) and the metadata sidecar next to the dataset
+write_downloads(df_prod, DATA_PATH)
+write_metadata(df_prod, DATA_PATH)
+
+# Precompute the percentile ranks and quantile bands of the countries within their groups
+# (region, sub-region, income group, LDC/LLDC/SIDS) so the dashboards only have to look them up
+build_group_ranks(df_prod).to_parquet(get_version_path('production', VERSION, GROUP_RANKS_FILE), index=False)
+build_group_bands(df_prod).to_parquet(get_version_path('production', VERSION, GROUP_BANDS_FILE), index=False)
+
+# Bit-packed availability matrix (country x indicator x year), so the sections can skip a
+# selection without data before they retrieve it
+write_availability(df_prod, get_version_path('production', VERSION, AVAILABILITY_FILE))
+
+# Publish the version (the dashboards swap to it in the background, see get_data_version)
+publish_version('production', VERSION)
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+from app_functions.aggregates import build_aggregates
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+WEIGHTS = {'Unemployment rate': 'Labour force'}
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def make_data():
+
+    """
+    Small long format dataset of three African countries in 2020: the labour force (a level)
+    and the unemployment rate (a rate weighted with the labour force). Togo has no labour
+    force, Chad belongs to another sub-region.
+
+    """
+
+    rows = [('Ghana', 'GHA', 'Western Africa', 'Labour force', 100.0),
+            ('Ghana', 'GHA', 'Western Africa', 'Unemployment rate', 10.0),
+            ('Kenya', 'KEN', 'Eastern Africa', 'Labour force', 300.0),
+            ('Kenya', 'KEN', 'Eastern Africa', 'Unemployment rate', 2.0),
+            ('Togo', 'TGO', 'Western Africa', 'Unemployment rate', 50.0)]
+
+    df = pd.DataFrame(rows, columns=['Country', 'Country Code', 'Sub-region', 'Indicator', 'Value'])
+
+    return df.assign(**{'Indicator Code': df['Indicator'].map({'Labour force': 'SL.TLF.TOTL.IN', 'Unemployment rate': 'SL.UEM.TOTL.ZS'}),
+                        'Year': 2020,
+                        'Region': 'Africa',
+                        'Income Group': 'Low income',
+                        'Least Developed Countries (LDC)': 0,
+                        'Land Locked Developing Countries (LLDC)': 0,
+                        'Small Island Developing States (SIDS)': 0})
+
+
+def get_value(aggregates, country, indicator):
+
+    """
+    Returns the value of an aggregate and indicator (NaN if there is no such row).
+
+    """
+
+    values = aggregates.loc[(aggregates['Country'] == country) & (aggregates['Indicator'] == indicator), 'Value']
+
+    return values.iloc[0] if len(values) else np.nan
+
+
+def test_build_aggregates():
+
+    """
+    Levels are summed and rates are averaged with the weight of the same country and year,
+    countries without a weight are not counted in the rate.
+
+    """
+
+    aggregates = build_aggregates(make_data(), WEIGHTS)
+
+    assert get_value(aggregates, 'Africa (region)', 'Labour force') == 400.0
+    assert get_value(aggregates, 'Africa (region)', 'Unemployment rate') == (10.0 * 100 + 2.0 * 300) / 400
+    assert get_value(aggregates, 'Western Africa (sub-region)', 'Unemployment rate') == 10.0
+    assert get_value(aggregates, 'Low income (income group)', 'Labour force') == 400.0
+
+
+def test_build_aggregates_rows():
+
+    """
+    The aggregates are rows like the dataset: the name of the aggregate as country, no
+    country code, the indicator code and the group in the column of its group type.
+
+    """
+
+    aggregates = build_aggregates(make_data(), WEIGHTS)
+    row = aggregates[(aggregates['Country'] == 'Eastern Africa (sub-region)') & (aggregates['Indicator'] == 'Labour force')]
+
+    assert len(row) == 1
+    assert row[['Indicator Code', 'Year', 'Value', 'Sub-region']].iloc[0].tolist() == ['SL.TLF.TOTL.IN', 2020, 300.0, 'Eastern Africa']
+    assert row['Region'].isna().all() and 'Country Code' not in aggregates
+
+    # Groups without countries (no flags set) have no aggregates
+    assert set(aggregates['Country'].str.extract(r'\((.*)\)')[0]) == {'region', 'sub-region', 'income group'}
@@ -0,0 +1,55 @@
+import numpy as np
+from app_functions.animation import get_animation_data, build_animation, COUNTRY_COLOR, PEER_COLOR
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def make_cube():
+
+    """
+    Small cube (indicators x years x countries, see build_cube) of one indicator, three
+    countries and the years 2010 to 2013 with a year without values and an unchanged year.
+
+    """
+
+    values = np.array([[[1.0, 2.0, 3.0],
+                        [np.nan, np.nan, np.nan],
+                        [1.0, 2.0, 3.0],
+                        [1.0, 2.0, 3.0]]])
+
+    return {'values': values,
+            'indicators': {'Gini index': 0},
+            'first_year': 2010,
+            'country_index': {'Ghana': 0, 'Kenya': 1, 'Togo': 2}}
+
+
+def test_get_animation_data_all_years():
+
+    """
+    Every year of the selected range is a frame, the years without values and the years
+    outside the cube have NaN values.
+
+    """
+
+    years, countries, values = get_animation_data(make_cube(), (['Kenya', 'Ghana'], 2009, 2014, ['Gini index']))
+
+    assert years.tolist() == [2009, 2010, 2011, 2012, 2013, 2014]
+    assert countries == ['Kenya', 'Ghana']
+    np.testing.assert_array_equal(values, [[np.nan, np.nan], [2, 1], [np.nan, np.nan],
+                                           [2, 1], [2, 1], [np.nan, np.nan]])
+
+
+def test_build_animation_colors():
+
+    """
+    The chosen country is highlighted by name, also if it is not in the cube (the first
+    country of the chart is then a comparison country).
+
+    """
+
+    fig = build_animation((make_cube(), (['Chad', 'Kenya', 'Togo'], 2010, 2013, ['Gini index']), 'Title', 'Value'))
+    assert list(fig.data[0].marker.color) == [PEER_COLOR, PEER_COLOR]
+
+    fig = build_animation((make_cube(), (['Togo', 'Kenya'], 2010, 2013, ['Gini index']), 'Title', 'Value'))
+    assert list(fig.data[0].marker.color) == [COUNTRY_COLOR, PEER_COLOR]
+    assert [frame.name for frame in fig.frames] == ['2010', '2011', '2012', '2013']
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+from app_functions.availability import build_availability, has_data
+from app_functions.gap_filling import fill_gaps
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def get_availability(df):
+
+    """
+    Returns the availability matrix of a dataset as read by the dashboards (see
+    read_availability).
+
+    """
+
+    availability = build_availability(df)
+
+    return {**availability,
+            'country_index': {country: i for i, country in enumerate(availability['countries'])},
+            'indicator_index': {indicator: i for i, indicator in enumerate(availability['indicators'])}}
+
+
+def test_has_data_filled_only():
+
+    """
+    A country with only filled values in the selected years has no observed data, but has
+    data once the filled values are included (so the chart with the toggle is shown).
+
+    """
+
+    df = pd.DataFrame({'Country': ['Ghana'] * 4,
+                       'Indicator': ['Gini index'] * 4,
+                       'Year': [2010, 2011, 2012, 2013],
+                       'Value': [40.0, np.nan, np.nan, 43.0]})
+    availability = get_availability(fill_gaps(df, {'Gini index': ('linear', 5)}))
+
+    selection = ('Ghana', 2011, 2012, ['Gini index'])
+    assert not has_data(availability, selection)
+    assert has_data(availability, selection, filled=True)
+
+    # Years with observed values
+    assert has_data(availability, ('Ghana', 2010, 2012, ['Gini index']))
+
+
+def test_has_data_without_filled_values():
+
+    """
+    Without filled values, the availability has one matrix and filled has no effect.
+
+    """
+
+    df = pd.DataFrame({'Country': ['Ghana', 'Ghana'],
+                       'Indicator': ['Gini index', 'Gini index'],
+                       'Year': [2010, 2012],
+                       'Value': [40.0, np.nan]})
+    availability = get_availability(df)
+
+    assert 'filled_bits' not in availability
+    assert not has_data(availability, ('Ghana', 2011, 2012, ['Gini index']), filled=True)
+    assert has_data(availability, ('Ghana', 2010, 2012, ['Gini index']), filled=True)
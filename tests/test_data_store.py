@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app_functions.data_store import set_read_only, prepare_dataset, cache_versions
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def make_data():
+
+    """
+    Small dataset with compact dtypes (see prepare_dataset): categoricals, int16 years,
+    float values and nullable boolean flags.
+
+    """
+
+    df = pd.DataFrame({'Country Code': ['DEU', 'FRA'],
+                       'Country': ['Germany', 'France'],
+                       'Indicator Code': ['SP.POP.TOTL', 'SP.POP.TOTL'],
+                       'Indicator': ['Population', 'Population'],
+                       'Year': [2020, 2020],
+                       'Value': [83.2, 67.4],
+                       'Region': ['Europe', 'Europe'],
+                       'Sub-region': ['Western Europe', 'Western Europe'],
+                       'Income Group': ['High income', 'High income'],
+                       'Least Developed Countries (LDC)': [0, 0],
+                       'Land Locked Developing Countries (LLDC)': [0, 0],
+                       'Small Island Developing States (SIDS)': [0, 1]})
+
+    return set_read_only(prepare_dataset(df))
+
+
+@pytest.mark.parametrize('column, value', [('Country', 'France'),
+                                           ('Least Developed Countries (LDC)', True),
+                                           ('Value', 1.0),
+                                           ('Year', 2000)])
+def test_set_read_only(column, value):
+
+    """
+    In-place changes of the categorical, nullable boolean, float and integer columns of a
+    shared dataset raise an error and leave the dataset unchanged.
+
+    """
+
+    df = make_data()
+    before = df[column].copy()
+
+    with pytest.raises(ValueError, match='read-only'):
+        df.loc[0, column] = value
+
+    pd.testing.assert_series_equal(df[column], before)
+
+
+def test_set_read_only_reads():
+
+    """
+    The write-protected dataset can still be filtered, grouped and copied (copies are
+    writeable).
+
+    """
+
+    df = make_data()
+
+    assert df.loc[df['Country'] == 'Germany', 'Value'].tolist() == [83.2]
+    assert df.groupby('Country', observed=True)['Value'].sum().to_dict() == {'France': 67.4, 'Germany': 83.2}
+
+    df_copy = df.copy()
+    df_copy.loc[0, 'Country'] = 'France'
+    assert df_copy['Country'].tolist() == ['France', 'France']
+    assert np.array_equal(df['Country'].cat.codes, [1, 0])
+
+
+def test_cache_versions_per_domain():
+
+    """
+    The loaders keep the objects of the last CACHED_VERSIONS versions of every domain, so
+    the versions of one domain do not evict the version of another domain.
+
+    """
+
+    calls = []
+
+    @cache_versions
+    def load(domain, version):
+        calls.append((domain, version))
+        return (domain, version)
+
+    load('employ', 'v1')
+    for version in ['v1', 'v2', 'v3', 'v4']:
+        load('trade', version)
+
+    assert load('employ', 'v1') == ('employ', 'v1')
+    assert load('trade', 'v4') == ('trade', 'v4')
+    assert calls.count(('employ', 'v1')) == 1
+
+    # Only the last CACHED_VERSIONS versions of trade are kept
+    load('trade', 'v1')
+    assert calls.count(('trade', 'v1')) == 2
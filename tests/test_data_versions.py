@@ -0,0 +1,34 @@
+import os
+import time
+from app_functions import data_versions
+from app_functions.data_versions import publish_version, read_manifest
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def test_publish_version_prunes_by_version_time(tmp_path, monkeypatch):
+
+    """
+    The oldest versions are removed by the time in the version, so touching the directory
+    of an old version does not get a newer version removed. The previous current version
+    is kept.
+
+    """
+
+    monkeypatch.setattr(data_versions, 'DATA_DIR', str(tmp_path))
+    monkeypatch.setattr(data_versions, 'MANIFEST_PATH', str(tmp_path / 'manifest.json'))
+    monkeypatch.setattr(data_versions, '_manifest', (None, {}))
+
+    for version in ['initial', '20240101-000000', '20240201-000000']:
+        os.makedirs(tmp_path / 'trade' / version)
+    publish_version('trade', '20240201-000000')
+
+    # The initial version is touched after the newer versions were created
+    time.sleep(0.01)
+    os.utime(tmp_path / 'trade' / 'initial')
+    os.makedirs(tmp_path / 'trade' / '20240301-000000')
+
+    publish_version('trade', '20240301-000000')
+
+    assert read_manifest()['trade'] == '20240301-000000'
+    assert sorted(os.listdir(tmp_path / 'trade')) == ['20240101-000000', '20240201-000000', '20240301-000000']
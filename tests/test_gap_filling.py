@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+from app_functions.gap_filling import fill_gaps, IMPUTED_COLUMN
+
+#-------------------------------------- PARAMETERS ---------------------------------------------
+
+GAP_FILLING = {'Gini index': ('linear', 5),
+               'Logistics performance index': ('locf', 1)}
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def make_data():
+
+    """
+    Small long format dataset with gaps: two countries of the linear indicator (one in
+    reverse order) and one country of the locf indicator.
+
+    """
+
+    return pd.DataFrame({'Country': ['Kenya'] * 4 + ['Ghana'] * 3 + ['Kenya'] * 3,
+                         'Indicator': ['Gini index'] * 7 + ['Logistics performance index'] * 3,
+                         'Year': [2010, 2011, 2012, 2013, 2012, 2011, 2010, 2010, 2011, 2012],
+                         'Value': [1.0, np.nan, np.nan, 4.0, 30.0, np.nan, 10.0, 2.0, np.nan, np.nan]})
+
+
+def test_fill_gaps():
+
+    """
+    Gaps are filled within each country and indicator, the dataset keeps its order.
+
+    """
+
+    df = fill_gaps(make_data(), GAP_FILLING)
+
+    np.testing.assert_allclose(df['Value'], [1, 2, 3, 4, 30, 20, 10, 2, 2, np.nan])
+    assert df[IMPUTED_COLUMN].tolist() == [False, True, True, False, False, True, False, False, True, False]
+
+
+def test_fill_gaps_duplicated_index():
+
+    """
+    The index of the dataset may have repeated labels (e.g. after pd.concat without
+    ignore_index), the filled values are put back by position and the index is kept.
+
+    """
+
+    df = make_data()
+    df = pd.concat([df.iloc[:6], df.iloc[6:]])
+    df.index = [0, 1, 2, 3, 4, 5, 0, 1, 2, 3]
+
+    filled = fill_gaps(df, GAP_FILLING)
+
+    np.testing.assert_allclose(filled['Value'], fill_gaps(make_data(), GAP_FILLING)['Value'])
+    assert filled.index.tolist() == df.index.tolist()
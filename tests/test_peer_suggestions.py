@@ -0,0 +1,38 @@
+import numpy as np
+from app_functions.peer_suggestions import build_peer_index, suggest_peers
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def make_cube():
+
+    """
+    Small cube (indicators x years x countries, see build_cube) of the exports and imports
+    of four countries in one year: two large and two small economies, with Ghana trading
+    like Germany (exports twice the imports) and Togo like France.
+
+    """
+
+    countries = np.array(['Germany', 'France', 'Ghana', 'Togo'])
+    values = np.array([[[1000.0, 900.0, 20.0, 5.0]],
+                       [[500.0, 1000.0, 10.0, 6.0]]])
+
+    return {'values': values,
+            'indicators': {'Exports': 0, 'Imports': 1},
+            'first_year': 2020,
+            'countries': countries,
+            'country_index': {country: i for i, country in enumerate(countries)}}
+
+
+def test_suggest_peers_ratio_features():
+
+    """
+    With the ratio of the levels as the feature, the countries are matched on how they
+    trade and not on their size (with the levels, the large economies are the peers).
+
+    """
+
+    cube = make_cube()
+
+    assert suggest_peers(build_peer_index(cube, [('Exports', 'Imports')]), 'Germany', k=1) == ['Ghana']
+    assert suggest_peers(build_peer_index(cube), 'Germany', k=1) == ['France']
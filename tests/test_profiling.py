@@ -0,0 +1,33 @@
+import logging
+import types
+from app_functions import profiling
+from app_functions.profiling import profile_section
+
+#--------------------------------------FUNCTIONS---------------------------------------------
+
+
+def test_profile_section_nested(monkeypatch):
+
+    """
+    The time of a nested section (load_data within filter_data) is only counted once: the
+    self time of the parent section is its time without the nested section.
+
+    """
+
+    profile = {'page': 'test', 'run': 'run', 'sections': [], 'open': []}
+    monkeypatch.setattr(profiling, 'st', types.SimpleNamespace(session_state={'_profile': profile}))
+    monkeypatch.setattr(profiling, 'get_script_run_ctx', lambda: types.SimpleNamespace(session_id='session'))
+    monkeypatch.setattr(profiling, '_get_logger', lambda: logging.getLogger('test.profile'))
+
+    times = iter([0.0, 1.0, 3.0, 4.0])
+    monkeypatch.setattr(profiling, 'time', types.SimpleNamespace(perf_counter=lambda: next(times)))
+
+    with profile_section('filter_data'):
+        with profile_section('load_data'):
+            pass
+
+    nested, parent = profile['sections']
+
+    assert (nested['section'], nested['depth'], nested['seconds'], nested['self_seconds']) == ('load_data', 1, 2.0, 2.0)
+    assert (parent['section'], parent['depth'], parent['seconds'], parent['self_seconds']) == ('filter_data', 0, 4.0, 2.0)
+    assert profile['open'] == []
@@ -1,93 +1,167 @@
+import os
 import streamlit as st 
-import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
+from app_functions.data_store import load_metadata, load_availability, get_data_version, get_page_data, get_tab_data, get_years, get_data_path
+from app_functions.figure_cache import get_figure, apply_layout, select_years
+from app_functions.downloads import get_download_path, load_download, export_selection, DOWNLOAD_FORMATS, EXPORT_FORMATS
+from app_functions.lazy_tabs import lazy_tabs
+from app_functions.availability import has_data, get_coverage_year, NO_DATA_MESSAGE
+from app_functions.cross_section import show_cross_section
+from app_functions.peer_suggestions import set_suggested_peers
+from app_functions.animation import get_animated_figure
+from app_functions.gap_filling import select_gap_filling
+from app_functions.lazy_imports import lazy_import
+from app_functions.profiling import start_profile, plotly_chart, show_profile
+
+# Heavy libraries are only imported on first use, after the sidebar is shown (see lazy_import)
+pd = lazy_import('pandas')
+px = lazy_import('plotly.express')
 
 
 # Git checkout
 # Use full screen 
 st.set_page_config(layout="wide")
 
-#---------------------------------- LOAD DATA AND PARAMETERS ---------------------------------#
+# Profile of the run (only if enabled, see app_functions/profiling.py)
+start_profile('trade')
 
-# Create import function with cache (cache so data is only loaded once)
-@st.cache_data
-def load_data(path):
-    df = pd.read_excel(path, engine='openpyxl')
-    return df
+#---------------------------------- LOAD DATA AND PARAMETERS ---------------------------------#
 
-# Load data 
-df_trade = load_data("data/trade_data.xlsx")
+# Load the metadata of the data (written by the ETL next to the dataset, so the sidebar
+# is shown before the dataset itself is loaded with the first selections of the page)
+# The whole run uses the version of the data that is served when it starts (see get_data_version)
+DATA_VERSION = get_data_version('trade')
+DATA_PATH = get_data_path('trade', DATA_VERSION)
+metadata = load_metadata('trade', DATA_VERSION)
 
 # Get a country, region and indicator list
-df_countries = df_trade['Country'].unique().tolist()
-df_indicators = df_trade['Indicator'].unique().tolist()
-df_regions = df_trade['Region'].unique().tolist()
-df_subregion = df_trade['Sub-region'].unique().tolist()
+df_countries = list(metadata['countries'])
+df_indicators = list(metadata['indicators'])
+df_regions = list(metadata['regions'])
+df_subregion = list(metadata['subregions'])
 df_sub_region = df_regions + df_subregion
 
-# Turn years into int (str necessary first because Streamlit)
-df_trade['Year'] = df_trade['Year'].astype(str)
-df_trade['Year'] = df_trade['Year'].astype(int)
-
 
 #------------------------------ Functions  ------------------------------------#
 
-# Data Selection 
+# Charts (only built if the figure is not in the figure cache yet)
+def build_chart1(chart1_data):
 
-def get_filtered_data(country_selec, start_year_selec, end_year_selec, indicator_selec):
+    """
+    Chart 1 - Exports and imports of goods and services.
 
     """
-    Function takes the user selection of the dashboard as an input and retrieves the
-    corresponding data from the dataset. The output is a filtered dataframe. 
+
+    # Configure plot
+    fig = px.line(chart1_data,
+                    x="Year", 
+                    y="Value", 
+                    title= "Chart 1 - Exports and imports of goods and services",
+                    color='Indicator',
+                    hover_name="Value",
+                    labels= {
+                        "Value": "current US $"
+                    }
+                    )
+
+    # Legend and y-axis fixed to zero with margin
+    return apply_layout(fig, y_range=[0, ((max(chart1_data.Value))*1.2)])
+
+
+def build_chart2(chart2_data):
 
     """
+    Chart 2 - Merchandise and service exports. Takes the data of chart 2 and chart 1 as
+    an input (same y-axis as chart 1).
 
-    # Turn country selection into list if not list 
-    if isinstance(country_selec, str):
-        country_selec = [country_selec]
+    """
 
-    # Create a dataframe with all years and indicators first
-    ## This is necessary to add the missing years with "None" values
-    df_empty = pd.DataFrame([(year, indicator, country) 
-                            for year in range(start_year_selec, end_year_selec+1)
-                            for indicator in indicator_selec
-                            for country in country_selec],
-                            columns=['Year', 'Indicator', 'Country'])
+    chart2_data, chart1_data = chart2_data
 
-    
-    # Retrieve the selected data from df
-    df_fltr = df_trade[(df_trade['Country'].isin(country_selec)) & 
-                       (df_trade['Year'] >= start_year_selec) & 
-                       (df_trade['Indicator'].isin(indicator_selec)) &
-                       (df_trade['Year'] <= end_year_selec)]
-    
-    ## Merge 
-    df_merged = pd.merge(df_empty, df_fltr, on=['Year', 'Indicator', 'Country'], how='left')
+    # Configure plot
+    fig = px.line(chart2_data,
+                    x="Year", 
+                    y="Value", 
+                    color='Indicator',
+                    title= 'Chart 2 - Merchandise and service exports',
+                    hover_name="Value",
+                    labels={
+                        "Value": "current US $"
+                    }
+                    )
 
-    ## Fill other columns 
-    df_merged['Indicator Code'] = df_merged.groupby('Indicator')['Indicator Code'].apply(lambda x: x.fillna(method='ffill').fillna(method='bfill'))
+    # Legend and y-axis fixed to zero with margin
+    return apply_layout(fig, y_range=[0, ((max(chart1_data.Value))*1.2)])
 
-    for col in ['Country Code', 'Region', 'Sub-region', 'Income Group', 'Least Developed Countries (LDC)', 'Land Locked Developing Countries (LLDC)', 'Small Island Developing States (SIDS)']:
-        df_merged[col] = df_merged.groupby('Country')[col].apply(lambda x: x.fillna(method='ffill').fillna(method='bfill'))
 
-    # Turn year column into datetime format
+def build_chart3(chart3_data):
 
-    return df_merged
+    """
+    Chart 3 - Trade openness.
 
-# Year Selection 
-def get_years(country_input): 
+    """
+
+    # Configure plot
+    fig = px.line(chart3_data,
+                  x="Year",
+                  y="Value",
+                  color='Indicator',
+                  title='Chart 3 – Trade openness (in trade as % of GDP)',
+                  hover_name="Value",
+                  labels={
+                      "Value": "Percentage"}
+                      )
+
+    # Legend and y-axis fixed to zero with margin
+    return apply_layout(fig, y_range=[0, ((max(chart3_data.Value))*1.2)])
+
+
+def build_chart4(chart4_data):
+
+    """
+    Chart 4.1 to 4.3 - Logistics performance index. Takes the data and the title of the
+    chart as an input.
+
+    """
+
+    chart4_data, title = chart4_data
+
+    # Configure plot
+    fig = px.bar(chart4_data,
+                x="Year",
+                y="Value",
+                color='Country',
+                title=title,
+                barmode='group',
+                hover_name='Value',
+                labels={
+                    'Value':'Score'
+                })
+
+    # Legend
+    return apply_layout(fig)
+
+
+def build_chart5(chart5_data):
 
     """
-    Takes a country as an input and retrieves the corresponding minimum and maximum year
-    available. This can be used to adjust the year slider. 
+    Chart 5 - Applied trade-weighted tariff rate.
 
     """
-    start_year_country = int(df_trade[df_trade['Country'] == country_input]['Year'].min())
-    end_year_country = int(df_trade[df_trade['Country'] == country_input]['Year'].max())
 
-    return start_year_country, end_year_country
+    # Configure plot
+    fig = px.line(chart5_data,
+                  x="Year",
+                  y="Value",
+                  color='Country',
+                  title='Chart 5 – Applied trade-weighted tariff rate, <br>all products (%)',
+                  hover_name="Value",
+                  labels={
+                      'Value': 'current US $'
+                    }
+                  )
+
+    # Legend
+    return apply_layout(fig)
 
 
 
@@ -121,37 +195,36 @@ st.sidebar.caption("""If you want to compare the values of the chosen country
 # PEER COUNTRY INPUT WIDGET
 selected_peer = st.sidebar.multiselect(
     "Choose comparison countries",
-    df_countries
+    df_countries,
+    key='trade_peers'
     )
 
+# Suggestion of the countries most similar to the chosen country (see suggest_peers)
+st.sidebar.button("Suggest similar countries", on_click=set_suggested_peers,
+                  args=('trade', DATA_VERSION, selected_country, 'trade_peers'))
+
 # START AND END YEAR SLIDER 
 
 # Update based on data availability for chosen country 
-START_YEAR, END_YEAR = get_years(selected_country)
+START_YEAR, END_YEAR = get_years(metadata, selected_country)
 
-# Widget
-selected_years = st.sidebar.slider(
-     "Select the range",
-     START_YEAR, END_YEAR, (START_YEAR,END_YEAR-1),
-    )
+# Availability of the data (bit-packed matrix written by the ETL, see app_functions/availability.py):
+# the sections test it before they retrieve their data and the slider shows the latest year with
+# data for all indicators
+availability = load_availability('trade', DATA_VERSION)
+
+# Widget (or all years with the range sliders of the charts, see select_years)
+selected_years = select_years("Select the range", START_YEAR, END_YEAR,
+                              get_coverage_year(availability, [selected_country], df_indicators))
 selected_start_year = selected_years[0]
 selected_end_year = selected_years[1]
 
-# DOWNLOAD WIDGET 
-
-# Create a csv version of the dataframe (cache so it doesn't rerun)
-@st.cache_data
-def convert_df(df):
-    return df.to_csv().encode('utf-8')
-
-csv = convert_df(df_trade)
+# DOWNLOAD WIDGET (filled in once the selections of the page are retrieved, see below)
 
 # Add empty space to create some distance 
 st.sidebar.header("")
 
-st.sidebar.download_button(label="Download full data as csv file",
-                   data=csv, 
-                   file_name='trade_data.csv')
+download_box = st.sidebar.container()
 
 st.sidebar.header("")
 
@@ -164,6 +237,53 @@ st.sidebar.info("""Please note that this dashboard is a prototype.
                 reliability, or suitability for any specific purpose.""")
 
 
+#---------------------------------------- PAGE SELECTIONS ---------------------------------------
+
+# Declare all selections of the page so they are retrieved with one pass over the dataset
+page_selections = {
+    'chart1': (selected_country, selected_start_year, selected_end_year, ['Exports of goods and services (current US$)', 'Imports of goods and services (current US$)']),
+    'chart2': (selected_country, selected_start_year, selected_end_year, ['Merchandise exports (current US$)', 'Service exports (BoP, current US$)']),
+    'chart3': (selected_country, selected_start_year, selected_end_year, ['Trade (% of GDP)']),
+    'chart5': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Tariff rate, applied, weighted mean, all products (%)'])
+    }
+
+# Selections of the tabs (only retrieved once their tab is shown, see lazy_tabs)
+tab_selections = {
+    'chart4': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Logistics performance index: Overall (1=low to 5=high)']),
+    'chart4_efficiency': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Logistics performance index: Efficiency of customs clearance process (1=low to 5=high)']),
+    'chart4_quality': ([selected_country] + selected_peer, selected_start_year, selected_end_year, ['Logistics performance index: Quality of trade and transport-related infrastructure (1=low to 5=high)'])
+    }
+page_data = get_page_data('trade', page_selections, DATA_VERSION)
+
+
+#---------------------------------------- DOWNLOAD ---------------------------------------------
+
+with download_box:
+
+    # Full data or only the current selection (country, peers, years and indicators of the page)
+    download_scope = st.radio("Choose the data", ["Full data", "Current selection"])
+
+    # The download files of the full data are written by the ETL next to the dataset and only read from disk
+    if download_scope == "Full data":
+        download_format = st.selectbox("Choose the file format", list(DOWNLOAD_FORMATS))
+        download_path, download_mime = get_download_path(DATA_PATH, download_format)
+        download_data = load_download('trade', DATA_VERSION, download_format)
+        download_name = os.path.basename(download_path)
+
+    # The export of the current selection is created from the retrieved data of the page
+    else:
+        download_format = st.selectbox("Choose the file format", list(EXPORT_FORMATS))
+        download_ending, download_mime = EXPORT_FORMATS[download_format]
+        download_data = export_selection({**page_selections, **tab_selections}, DATA_VERSION, download_format,
+                                         get_page_data('trade', {**page_selections, **tab_selections}, DATA_VERSION))
+        download_name = os.path.splitext(os.path.basename(DATA_PATH))[0] + f"_{selected_country}{download_ending}"
+
+    st.download_button(label=f"Download {download_scope.lower()}",
+                       data=download_data,
+                       file_name=download_name,
+                       mime=download_mime)
+
+
 #---------------------------------------- MAIN PAGE --------------------------------------------
 
 # Add a title and intro text
@@ -194,319 +314,279 @@ with st.expander("ℹ️ - About the data sources", expanded=False):
         </ul>
         """,unsafe_allow_html=True)
     
+# The rows of the page are fragments (st.fragment): a widget inside a row only reruns that
+# row. Every row takes the inputs it depends on as arguments.
+
 ############################# ROW 1 ###################################
-st.header("")
-st.subheader(f"What does {selected_country}’s trade look like? ")
 
-col1, col2, col3 = st.columns([1,0.05,1])
+@st.fragment
+def show_row1(selected_country, chart1_data, chart2_data, page_selections):
+
+    """
+    Row 1 - Exports and imports (Chart 1 and 2).
+
+    """
 
-with col1: 
-    # Create distance
     st.header("")
-    #### Explanatory text box 1
-    st.markdown("""<div style="text-align: justify;">
-                Trade is composed of exports and imports of goods and services. 
-                <ul>
-                <li>Exports of <b>goods</b> are goods produced <i>domestically</i> and sold to <i> a foreign country</i>. </li>
-                <li>Imports of <b>goods</b> are goods produced in <i>a foreign country</i> and sold <i>domestically</i>. </li>
-                <li>Exports of <b>services</b> are services provided <i>domestically</i> for a national or resident of <i>a foreign country</i>.</li> 
-                <li>Similarly, imports of <b>services</b> are services provided in <i>a foreign country</i> for a 
-                national or resident of <i>the domestic country</i>. </li>
-                </ul>
-                While trade in goods is rather intuitive, trade in services has different modes of supply and 
-                can be illustrated through the following examples:                
-                <ol type="i">
-                <li>Tourism services are typically provided domestically for nationals or residents of a foreign country. </li>
-                <li>Telecommunication services are typically provided to nationals or residents in a foreign country through 
-                the foreign subsidiary of a domestic telecommunication company. </li>
-                <li>Professional services such as consulting services can be provided to nationals or residents 
-                in a foreign country both domestically or through the dispatch of domestic staff to the foreign country. </li>
-                </ol>
-                For more details on the differences between goods and services take a look at our 
-                <a href="https://gdp-dashboard.streamlit.app/">production dashboard</a>. 
-                High exports of goods and services are typically seen as a benchmark for success. However, exports are not an end. 
-                Rather, high exports are the mean that allows a country to specialize in those sectors in which it has a relatively 
-                high productivity (comparative advantage) and to purchase and consume goods and services from abroad.
-                A country’s trade performance can be assessed in terms of outcomes and drivers. Outcomes measure how much is traded 
-                and what the structure of trade is. Drivers measure how easy it is to trade and the extent of tariff and non-tariff 
-                barriers. In chart 1, the indicator <i>trade in goods and services</i> measures total exports and respectively imports  
-                in terms of their value in current US-Dollars. In chart 2, total exports can be further broken down into 
-                <i>merchandise exports</i> and <i>exports of services</i>, also in terms of their value in current US-Dollars.
-                </li> </div>""", unsafe_allow_html=True
-    )
+    st.subheader(f"What does {selected_country}’s trade look like? ")
+
+    col1, col2, col3 = st.columns([1,0.05,1])
+
+    with col1: 
+        # Create distance
+        st.header("")
+        #### Explanatory text box 1
+        st.markdown("""<div style="text-align: justify;">
+                    Trade is composed of exports and imports of goods and services. 
+                    <ul>
+                    <li>Exports of <b>goods</b> are goods produced <i>domestically</i> and sold to <i> a foreign country</i>. </li>
+                    <li>Imports of <b>goods</b> are goods produced in <i>a foreign country</i> and sold <i>domestically</i>. </li>
+                    <li>Exports of <b>services</b> are services provided <i>domestically</i> for a national or resident of <i>a foreign country</i>.</li> 
+                    <li>Similarly, imports of <b>services</b> are services provided in <i>a foreign country</i> for a 
+                    national or resident of <i>the domestic country</i>. </li>
+                    </ul>
+                    While trade in goods is rather intuitive, trade in services has different modes of supply and 
+                    can be illustrated through the following examples:                
+                    <ol type="i">
+                    <li>Tourism services are typically provided domestically for nationals or residents of a foreign country. </li>
+                    <li>Telecommunication services are typically provided to nationals or residents in a foreign country through 
+                    the foreign subsidiary of a domestic telecommunication company. </li>
+                    <li>Professional services such as consulting services can be provided to nationals or residents 
+                    in a foreign country both domestically or through the dispatch of domestic staff to the foreign country. </li>
+                    </ol>
+                    For more details on the differences between goods and services take a look at our 
+                    <a href="https://gdp-dashboard.streamlit.app/">production dashboard</a>. 
+                    High exports of goods and services are typically seen as a benchmark for success. However, exports are not an end. 
+                    Rather, high exports are the mean that allows a country to specialize in those sectors in which it has a relatively 
+                    high productivity (comparative advantage) and to purchase and consume goods and services from abroad.
+                    A country’s trade performance can be assessed in terms of outcomes and drivers. Outcomes measure how much is traded 
+                    and what the structure of trade is. Drivers measure how easy it is to trade and the extent of tariff and non-tariff 
+                    barriers. In chart 1, the indicator <i>trade in goods and services</i> measures total exports and respectively imports  
+                    in terms of their value in current US-Dollars. In chart 2, total exports can be further broken down into 
+                    <i>merchandise exports</i> and <i>exports of services</i>, also in terms of their value in current US-Dollars.
+                    </li> </div>""", unsafe_allow_html=True
+        )
     
 
-with col3: 
-    # Get data
-    chart1_data = get_filtered_data(selected_country, selected_start_year, selected_end_year, 
-                                    ['Exports of goods and services (current US$)', 
-                                     'Imports of goods and services (current US$)'])
-    chart2_data = get_filtered_data(selected_country, selected_start_year, selected_end_year,
-                                    ['Merchandise exports (current US$)',
-                                    'Service exports (BoP, current US$)'])
-    # Configure plot
-    fig = px.line(chart1_data,
-                    x="Year", 
-                    y="Value", 
-                    title= "Chart 1 - Exports and imports of goods and services",
-                    color='Indicator',
-                    hover_name="Value",
-                    labels= {
-                        "Value": "current US $"
-                    }
-                    )
-        
-    # Move legend 
-    fig.update_layout(legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.4,
-        xanchor="left",
-        x=-0.05
-        ))
-        
-    # Fix y-axis to always show (100%)
-    fig.update_yaxes(range = [0, ((max(chart1_data.Value))*1.2)])
-
-    # Display graph
-    st.plotly_chart(fig, use_container_width=True)
+    with col3: 
+        # Check if data available (see has_data)
+        if has_data(availability, page_selections['chart1']):
+            # Get figure
+            fig = get_figure('trade_chart1', page_selections['chart1'], DATA_VERSION, build_chart1, chart1_data)
 
-    fig = px.line(chart2_data,
-                    x="Year", 
-                    y="Value", 
-                    color='Indicator',
-                    title= 'Chart 2 - Merchandise and service exports',
-                    hover_name="Value",
-                    labels={
-                        "Value": "current US $"
-                    }
-                    )
-        
-    # Move legend 
-    fig.update_layout(legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.4,
-        xanchor="left",
-        x=-0.05
-        ))
-        
-    # Fix y-axis to always show (100%)
-    fig.update_yaxes(range = [0, ((max(chart1_data.Value))*1.2)])
-
-    # Display graph
-    st.plotly_chart(fig, use_container_width=True)
-    # Caption graph
-    st.caption('Data Source: World Bank (for more information see data sources tab above)')
+            # Display graph
+            plotly_chart(fig, use_container_width=True)
+        else:
+            st.error(NO_DATA_MESSAGE)
 
+        if has_data(availability, page_selections['chart2']):
+            # Get figure
+            fig = get_figure('trade_chart2', page_selections['chart2'], DATA_VERSION, build_chart2, (chart2_data, chart1_data))
+
+            # Display graph
+            plotly_chart(fig, use_container_width=True)
+        else:
+            st.error(NO_DATA_MESSAGE)
+        # Caption graph
+        st.caption('Data Source: World Bank (for more information see data sources tab above)')
+
+show_row1(selected_country, page_data['chart1'], page_data['chart2'], page_selections)
 
 ############################# ROW 2 ###################################
-st.header("")
-st.subheader("How can trade openness be assessed?")
 
-col1, col2, col3 = st.columns([1,0.05,1])
+@st.fragment
+def show_row2(selected_country, chart3_data, page_selections):
 
-with col1:
-    # Create distance
-    st.header("")
-    st.markdown(f"""<div style="text-align: justify;">
-                A frequently used indicator for trade openness is the share of trade in gross domestic product (GDP). 
-                As explained above, trade is defined as the sum of exports and imports of goods and services. 
-                The indicator measures trade openness as an outcome. Factors such as barriers to trade (e.g., 
-                tariffs, technical barriers to trade  such as labelling or certification requirements), 
-                geographic remoteness and the size and structure of the economy influence how high or low the 
-                share of trade in GDP is.
-                </div>""", unsafe_allow_html=True
-            )
-    
-with col3:
-    # Get data
-    chart3_data = get_filtered_data(selected_country, selected_start_year, selected_end_year, 
-                                    ['Trade (% of GDP)'])
-    # Configure plot
-    fig = px.line(chart3_data,
-                  x="Year",
-                  y="Value",
-                  color='Indicator',
-                  title='Chart 3 – Trade openness (in trade as % of GDP)',
-                  hover_name="Value",
-                  labels={
-                      "Value": "Percentage"}
-                      )
-        
-    # Move legend 
-    fig.update_layout(legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.4,
-        xanchor="left",
-        x=-0.05
-        ))
-
-    # Fix y-axis to always show (100%)
-    fig.update_yaxes(range = [0, ((max(chart3_data.Value))*1.2)])
-
-    # Display graph
-    st.plotly_chart(fig, use_container_width=True)
-    # Caption graph
-    st.caption('Data Source: World Bank (for more information see data sources tab above)')
+    """
+    Row 2 - Trade openness (Chart 3).
 
-############################# ROW 3 ###################################
-st.header("")
-st.subheader("What are insights from the World Bank’s Logistics Performance Index? ")
+    """
 
-col1, col2, col3 = st.columns([1,0.05,1])
-with col1:
-    # Create distance
     st.header("")
-    st.markdown(f"""<div style="text-align: justify;">
-                The World Bank’s <i>Logistics Performance Index (LPI)</i> ranks countries’ performance on 
-                trade logistics, based on quantitative data on the performance of the logistics chain as 
-                well as responses from a survey among logistics operators. The LPI is composed of six 
-                sub-components, of which <i>“Efficiency of customs clearance process”</i> (e.g., speed, simplicity 
-                and predictability of formalities) and <i>“Quality of trade and transport-related infrastructure”</i>  
-                (e.g., ports, railroads, roads, information technology) are reported here.
+    st.subheader("How can trade openness be assessed?")
+
+    col1, col2, col3 = st.columns([1,0.05,1])
+
+    with col1:
+        # Create distance
+        st.header("")
+        st.markdown(f"""<div style="text-align: justify;">
+                    A frequently used indicator for trade openness is the share of trade in gross domestic product (GDP). 
+                    As explained above, trade is defined as the sum of exports and imports of goods and services. 
+                    The indicator measures trade openness as an outcome. Factors such as barriers to trade (e.g., 
+                    tariffs, technical barriers to trade  such as labelling or certification requirements), 
+                    geographic remoteness and the size and structure of the economy influence how high or low the 
+                    share of trade in GDP is.
                     </div>""", unsafe_allow_html=True
                 )
+    
+    with col3:
+        # Check if data available (see has_data)
+        if has_data(availability, page_selections['chart3']):
+            # Get figure
+            fig = get_figure('trade_chart3', page_selections['chart3'], DATA_VERSION, build_chart3, chart3_data)
 
-with col3:
-    # Get data
-    chart4_data = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, 
-                                    ['Logistics performance index: Overall (1=low to 5=high)'])
-
-    chart4_data_efficiency = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year,
-                                    ['Logistics performance index: Efficiency of customs clearance process (1=low to 5=high)'])
-
-    chart4_data_quality = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year,
-                                    ['Logistics performance index: Quality of trade and transport-related infrastructure (1=low to 5=high)'])
-
-    #Graphs
-    tab1, tab2, tab3 = st.tabs(["Overall", "Efficiency", "Quality"])                                
-    with tab1:
-        fig = px.bar(chart4_data,
-                    x="Year",
-                    y="Value",
-                    color='Country',
-                    title='Chart 4.1 – LPI: Overall (1=low to 5=high)',
-                    barmode='group',
-                    hover_name='Value',
-                    labels={
-                        'Value':'Score'
-                    })
-            
-        # Move legend 
-        fig.update_layout(legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.4,
-            xanchor="left",
-            x=-0.05
-            ))
-            
             # Display graph
-        st.plotly_chart(fig, use_container_width=True)
+            plotly_chart(fig, use_container_width=True)
+        else:
+            st.error(NO_DATA_MESSAGE)
         # Caption graph
         st.caption('Data Source: World Bank (for more information see data sources tab above)')
 
+show_row2(selected_country, page_data['chart3'], page_selections)
 
-    with tab2:
-        fig = px.bar(chart4_data_efficiency,
-                    x="Year",
-                    y="Value",
-                    color='Country',
-                    title='Chart 4.2 – LPI: Efficiency of customs clearance <br>process (1=low to 5=high)',
-                    barmode='group',
-                    hover_name="Value",
-                    labels={
-                        'Value':'Score'
-                    }
+############################# ROW 3 ###################################
+
+@st.fragment
+def show_row3(selected_country, tab_selections):
+
+    """
+    Row 3 - Logistics Performance Index (Chart 4 tabs).
+
+    """
+
+    st.header("")
+    st.subheader("What are insights from the World Bank’s Logistics Performance Index? ")
+
+    col1, col2, col3 = st.columns([1,0.05,1])
+    with col1:
+        # Create distance
+        st.header("")
+        st.markdown(f"""<div style="text-align: justify;">
+                    The World Bank’s <i>Logistics Performance Index (LPI)</i> ranks countries’ performance on 
+                    trade logistics, based on quantitative data on the performance of the logistics chain as 
+                    well as responses from a survey among logistics operators. The LPI is composed of six 
+                    sub-components, of which <i>“Efficiency of customs clearance process”</i> (e.g., speed, simplicity 
+                    and predictability of formalities) and <i>“Quality of trade and transport-related infrastructure”</i>  
+                    (e.g., ports, railroads, roads, information technology) are reported here.
+                        </div>""", unsafe_allow_html=True
                     )
-            
-        # Move legend 
-        fig.update_layout(legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.4,
-            xanchor="left",
-            x=-0.05
-            ))
-            
-        # Display graph
-        st.plotly_chart(fig, use_container_width=True)
-        # Caption graph
-        st.caption('Data Source: World Bank (for more information see data sources tab above)')
 
-    with tab3:
-        fig = px.bar(chart4_data_quality,
-                    x="Year",
-                    y="Value",
-                    color='Country',
-                    title='Chart 4.3 – LPI: Quality of trade and transport-related <br>infrastructure (1=low to 5=high)',
-                    barmode='group',
-                    hover_name='Value',
-                    labels={
-                        'Value':'Score'
-                    }                    
+    with col3:
+        #Graphs
+        tab_labels = ["Overall", "Efficiency", "Quality"]
+        tab = lazy_tabs(tab_labels, key='trade_row3_tabs')
+
+        # Animation through the years (the toggle only reruns this row)
+        animate = st.toggle("Animate the years", key='trade_row3_animate')
+
+        # Tabs without data for the selection are skipped before their data is retrieved (see has_data,
+        # the filled values included unless the years are animated)
+        if tab == tab_labels[0] and not has_data(availability, tab_selections['chart4'], filled=not animate):
+            st.error(NO_DATA_MESSAGE)
+
+        elif tab == tab_labels[0]:
+            # Get data and figure (or the animation from the year-sliced index). The gaps can be
+            # filled if the ETL filled them (see select_gap_filling)
+            if animate:
+                fig = get_animated_figure('trade', DATA_VERSION, 'trade_chart4', tab_selections['chart4'],
+                                          'Chart 4.1 – LPI: Overall (1=low to 5=high)', 'Score')
+            else:
+                chart4_data = get_tab_data('trade', tab_selections, 'chart4', DATA_VERSION)
+                chart4_data, filled = select_gap_filling(chart4_data, 'trade_chart4_fill_gaps',
+                                                         has_data(availability, tab_selections['chart4']))
+                fig = None if chart4_data is None else get_figure('trade_chart4' + filled, tab_selections['chart4'], DATA_VERSION,
+                                                                  build_chart4, (chart4_data, 'Chart 4.1 – LPI: Overall (1=low to 5=high)'))
+
+            # Display graph (no chart if the selection only has filled values and the toggle is off)
+            if fig is not None:
+                plotly_chart(fig, use_container_width=True)
+            # Caption graph
+            st.caption('Data Source: World Bank (for more information see data sources tab above)')
+
+
+        elif tab == tab_labels[1] and not has_data(availability, tab_selections['chart4_efficiency'], filled=not animate):
+            st.error(NO_DATA_MESSAGE)
+
+        elif tab == tab_labels[1]:
+            # Get data and figure (or the animation from the year-sliced index)
+            if animate:
+                fig = get_animated_figure('trade', DATA_VERSION, 'trade_chart4_efficiency', tab_selections['chart4_efficiency'],
+                                          'Chart 4.2 – LPI: Efficiency of customs clearance <br>process (1=low to 5=high)', 'Score')
+            else:
+                chart4_data_efficiency = get_tab_data('trade', tab_selections, 'chart4_efficiency', DATA_VERSION)
+                chart4_data_efficiency, filled = select_gap_filling(chart4_data_efficiency, 'trade_chart4_efficiency_fill_gaps',
+                                                                    has_data(availability, tab_selections['chart4_efficiency']))
+                fig = None if chart4_data_efficiency is None else get_figure('trade_chart4_efficiency' + filled, tab_selections['chart4_efficiency'], DATA_VERSION,
+                                                                             build_chart4, (chart4_data_efficiency, 'Chart 4.2 – LPI: Efficiency of customs clearance <br>process (1=low to 5=high)'))
+
+            # Display graph (no chart if the selection only has filled values and the toggle is off)
+            if fig is not None:
+                plotly_chart(fig, use_container_width=True)
+            # Caption graph
+            st.caption('Data Source: World Bank (for more information see data sources tab above)')
+
+        elif tab == tab_labels[2] and not has_data(availability, tab_selections['chart4_quality'], filled=not animate):
+            st.error(NO_DATA_MESSAGE)
+
+        elif tab == tab_labels[2]:
+            # Get data and figure (or the animation from the year-sliced index)
+            if animate:
+                fig = get_animated_figure('trade', DATA_VERSION, 'trade_chart4_quality', tab_selections['chart4_quality'],
+                                          'Chart 4.3 – LPI: Quality of trade and transport-related <br>infrastructure (1=low to 5=high)', 'Score')
+            else:
+                chart4_data_quality = get_tab_data('trade', tab_selections, 'chart4_quality', DATA_VERSION)
+                chart4_data_quality, filled = select_gap_filling(chart4_data_quality, 'trade_chart4_quality_fill_gaps',
+                                                                 has_data(availability, tab_selections['chart4_quality']))
+                fig = None if chart4_data_quality is None else get_figure('trade_chart4_quality' + filled, tab_selections['chart4_quality'], DATA_VERSION,
+                                                                          build_chart4, (chart4_data_quality, 'Chart 4.3 – LPI: Quality of trade and transport-related <br>infrastructure (1=low to 5=high)'))
+
+            # Display graph (no chart if the selection only has filled values and the toggle is off)
+            if fig is not None:
+                plotly_chart(fig, use_container_width=True)
+
+            # Caption graph
+            st.caption('Data Source: World Bank (for more information see data sources tab above)')
+
+show_row3(selected_country, tab_selections)
+
+############################# ROW 4 ###################################
+
+@st.fragment
+def show_row4(selected_country, chart5_data, page_selections):
+
+    """
+    Row 4 - Tariffs (Chart 5).
+
+    """
+
+    st.header("")
+    st.subheader("How do tariffs come into play? ")
+
+    col1, col2, col3 = st.columns([1,0.05,1])
+    with col1:
+        # Create distance
+        st.header("")
+        st.markdown(f"""<div style="text-align: justify;">
+                    The <i>trade-weighted tariff rate</i> is the weighted average tariff on imported goods. 
+                    The indicator is calculated by weighting each tariff of an imported good by the 
+                    total value (price times amount) of that good. Thereby, it is assured that those 
+                    tariffs on goods which are traded a lot are weighted more than tariffs on goods 
+                    that are barely traded. Considered are only those tariffs that are actually applied 
+                    by customs authorities; i.e., an exporter might avail to tariffs under WTO 
+                    (World Trade Organisation) rules or tariffs under the rules of a trade agreement (if there is one).
+                    </div>""", unsafe_allow_html=True
                     )
-            
-        # Move legend 
-        fig.update_layout(legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=-0.4,
-            xanchor="left",
-            x=-0.05
-            ))
-        # Display graph
-        st.plotly_chart(fig, use_container_width=True)
 
+    with col3:
+        # Check if data available (see has_data)
+        if has_data(availability, page_selections['chart5']):
+            # Get figure
+            fig = get_figure('trade_chart5', page_selections['chart5'], DATA_VERSION, build_chart5, chart5_data)
+
+            # Display graph
+            plotly_chart(fig, use_container_width=True)
+        else:
+            st.error(NO_DATA_MESSAGE)
         # Caption graph
         st.caption('Data Source: World Bank (for more information see data sources tab above)')
 
-############################# ROW 4 ###################################
-st.header("")
-st.subheader("How do tariffs come into play? ")
+show_row4(selected_country, page_data['chart5'], page_selections)
 
-col1, col2, col3 = st.columns([1,0.05,1])
-with col1:
-    # Create distance
-    st.header("")
-    st.markdown(f"""<div style="text-align: justify;">
-                The <i>trade-weighted tariff rate</i> is the weighted average tariff on imported goods. 
-                The indicator is calculated by weighting each tariff of an imported good by the 
-                total value (price times amount) of that good. Thereby, it is assured that those 
-                tariffs on goods which are traded a lot are weighted more than tariffs on goods 
-                that are barely traded. Considered are only those tariffs that are actually applied 
-                by customs authorities; i.e., an exporter might avail to tariffs under WTO 
-                (World Trade Organisation) rules or tariffs under the rules of a trade agreement (if there is one).
-                </div>""", unsafe_allow_html=True
-                )
+############################# ROW 5 ###################################
 
-with col3:
-    # Get data
-    chart5_data = get_filtered_data([selected_country] + selected_peer, selected_start_year, selected_end_year, 
-                                    ['Tariff rate, applied, weighted mean, all products (%)'])
-    fig = px.line(chart5_data,
-                  x="Year",
-                  y="Value",
-                  color='Country',
-                  title='Chart 5 – Applied trade-weighted tariff rate, <br>all products (%)',
-                  hover_name="Value",
-                  labels={
-                      'Value': 'current US $'
-                    }
-                  )
-            
-    # Move legend 
-    fig.update_layout(legend=dict(
-        orientation="h",
-        yanchor="bottom",
-        y=-0.4,
-        xanchor="left",
-        x=-0.05,
-        ))
-
-    # Display graph
-    st.plotly_chart(fig, use_container_width=True)  
-    # Caption graph
-    st.caption('Data Source: World Bank (for more information see data sources tab above)')
+# World map and ranking of an indicator for all countries (see show_cross_section)
+show_cross_section('trade', DATA_VERSION, df_indicators, selected_country)
+
+# Debug panel with the profile of the run (only if enabled)
+show_profile()